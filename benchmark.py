@@ -0,0 +1,591 @@
+"""
+오프라인 벤치마크 실행기
+
+질문 코퍼스(JSONL)를 FinancialAnalysisGraph.invoke로 재생하면서 ChatOpenAI, OpenAIEmbeddings,
+TavilyClient를 기록/재생(record/replay) 스텁으로 바꿔 네트워크 없이 반복 가능한 성능을 측정합니다.
+
+사용법:
+    # 저장된 응답(없으면 합성 응답)으로 오프라인 실행
+    python benchmark.py --corpus benchmark_questions.jsonl --cassette benchmark_cassette.json
+
+    # 실제 API를 호출해 응답을 기록 (OPENAI_API_KEY, TAVILY_API_KEY 필요)
+    python benchmark.py --mode record --cassette benchmark_cassette.json
+
+    # 프롬프트의 대표 ROE/ROA/다중 조건 예시 SQL을 SQLite와 DuckDB에서 실행해 비교 (duckdb와 build_db.py로 만든 .duckdb 파일 필요)
+    python benchmark.py --compare-engines
+
+코퍼스 형식: 한 줄에 하나의 JSON 객체 ({"question": ...} 또는 {"title": ...}),
+선택적으로 "session"(같은 값이면 같은 대화 세션)과 "route"(기대 라우트)를 지정할 수 있습니다.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage
+
+from conversation_memory import count_tokens
+
+
+ROUTES = ["no_retrieval", "single_shot_rag", "iterative_rag"]
+GRAPH_NODES = ["analyze_query", "no_retrieval", "single_shot_rag", "iterative_rag", "generate_response"]
+
+# 라우팅 판단용 키워드 (합성 응답 생성 시 사용)
+_ITERATIVE_KEYWORDS = ["비교", "원인", "이유", "배경", "검색", "인터넷", "회사 정보", "회사 소개"]
+_WEB_KEYWORDS = ["원인", "이유", "배경", "검색", "인터넷", "뉴스", "회사 정보", "회사 소개"]
+_FINANCIAL_KEYWORDS = ["매출", "영업이익", "순이익", "자산", "부채", "자본", "현금흐름", "이익률", "ROE", "ROA"]
+
+
+# ----------------------------------------------------------------------
+# 측정 기록
+# ----------------------------------------------------------------------
+class BenchmarkRecorder:
+    """질문 하나를 실행하는 동안의 노드/SQL/LLM/검색 측정값을 모읍니다."""
+
+    def __init__(self):
+        self.records = []
+        self.current = None
+
+    def start(self, question: str):
+        self.current = {
+            "question": question,
+            "route": "",
+            "total_seconds": 0.0,
+            "node_seconds": defaultdict(float),
+            "sql_seconds": 0.0,
+            "sql_calls": 0,
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "embedding_calls": 0,
+            "search_calls": 0,
+            "replay_misses": 0,
+        }
+
+    def add(self, key: str, value=1):
+        if self.current is not None:
+            self.current[key] += value
+
+    def add_node(self, node: str, seconds: float):
+        if self.current is not None:
+            self.current["node_seconds"][node] += seconds
+
+    def finish(self, route: str, total_seconds: float):
+        self.current["route"] = route
+        self.current["total_seconds"] = total_seconds
+        self.current["node_seconds"] = dict(self.current["node_seconds"])
+        self.records.append(self.current)
+        self.current = None
+
+
+recorder = BenchmarkRecorder()
+
+
+# ----------------------------------------------------------------------
+# 기록/재생 저장소
+# ----------------------------------------------------------------------
+class Cassette:
+    """LLM/검색 응답을 요청 해시로 저장하는 JSON 파일입니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {"llm": {}, "search": {}}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries.update(json.load(f))
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+    def get(self, kind: str, key: str):
+        return self.entries[kind].get(key)
+
+    def put(self, kind: str, key: str, value):
+        self.entries[kind][key] = value
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+
+
+class StubSettings:
+    """스텁 동작 설정 (모드, 저장소, 모의 지연 시간)."""
+
+    mode = "replay"
+    cassette: Cassette = None
+    llm_latency = 0.0
+    llm_latency_per_token = 0.0
+    embedding_latency = 0.0
+    search_latency = 0.0
+    real_chat_class = None
+    real_embeddings_class = None
+    real_tavily_class = None
+
+
+def _prompt_text(prompt) -> str:
+    """문자열/PromptValue/메시지 리스트를 문자열로 변환합니다."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, list):
+        return "\n".join(getattr(m, "content", str(m)) for m in prompt)
+    return str(prompt)
+
+
+def _simulate(seconds: float):
+    if StubSettings.mode == "replay" and seconds > 0:
+        time.sleep(seconds)
+
+
+# ----------------------------------------------------------------------
+# 합성 응답 (재생 모드에서 저장된 응답이 없을 때)
+# ----------------------------------------------------------------------
+_company_vocabulary = None
+
+
+def _companies_in(text: str) -> List[str]:
+    global _company_vocabulary
+    if _company_vocabulary is None:
+        from database import db
+        from entity_vocabulary import CompanyVocabulary
+        _company_vocabulary = CompanyVocabulary(db.get_all_companies())
+    return _company_vocabulary.extract(text)
+
+
+def _synthetic_text(prompt: str) -> str:
+    """그래프가 정상 경로로 진행되도록 프롬프트 종류별 결정적 응답을 만듭니다."""
+    if '"no_retrieval", "single_shot_rag", "iterative_rag" 중 하나만' in prompt:
+        match = re.search(r'현재 질문: "(.*?)"\n', prompt, re.S)
+        question = match.group(1) if match else prompt
+        if any(k in question for k in _ITERATIVE_KEYWORDS):
+            return "iterative_rag"
+        if any(k in question for k in _FINANCIAL_KEYWORDS) or _companies_in(question):
+            return "single_shot_rag"
+        return "no_retrieval"
+
+    if '형식: "선택: [선택값] | 쿼리: [구체적인 쿼리]"' in prompt:
+        match = re.search(r"결정해주세요:\n\n(.*?)\n\n\*\*질문에서 언급된 회사", prompt, re.S)
+        question = (match.group(1) if match else "").strip().splitlines()[-1:] or [""]
+        question = question[0]
+        if "아직 결과 없음" in prompt:
+            return f"선택: financial_query | 쿼리: {question}"
+        if any(k in question for k in _WEB_KEYWORDS) and "제목:" not in prompt:
+            return f"선택: web_search | 쿼리: {question}"
+        return "선택: final_answer"
+
+    if "갱신된 요약:" in prompt:
+        return "이전 대화에서 사용자는 회사별 재무 지표를 조회했습니다."
+
+    return "벤치마크용 합성 답변입니다. " + "조회된 수치와 근거를 바탕으로 요약하면 다음과 같습니다. " * 8
+
+
+def _synthetic_query(prompt: str) -> Dict:
+    """Text2SQL 구조화 출력용 합성 SQL을 만듭니다."""
+    question = prompt.rsplit("Question:", 1)[-1]
+    companies = _companies_in(question)[:5] or ["삼성전자"]
+    names = ", ".join("'" + c.replace("'", "''") + "'" for c in companies)
+    return {
+        "query": "SELECT 회사명, 항목명, 당기_반기_누적 FROM income_statement "
+                 f"WHERE 회사명 IN ({names}) AND 항목명 IN ('매출액', '영업수익', '영업이익', '반기순이익', '당기순이익') "
+                 "LIMIT 20"
+    }
+
+
+# ----------------------------------------------------------------------
+# 스텁 클래스
+# ----------------------------------------------------------------------
+class StubChatOpenAI:
+    """ChatOpenAI 대체 클래스 (record: 실제 호출 후 저장, replay: 저장된 응답 또는 합성 응답)."""
+
+    def __init__(self, *args, **kwargs):
+        self.model = kwargs.get("model", "")
+        self._real = StubSettings.real_chat_class(*args, **kwargs) if StubSettings.mode == "record" else None
+        self._schema = None
+        self._include_raw = False
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        structured = StubChatOpenAI.__new__(StubChatOpenAI)
+        structured.model = self.model
+        structured._real = self._real.with_structured_output(schema) if self._real is not None else None
+        structured._schema = schema
+        structured._include_raw = include_raw
+        return structured
+
+    def invoke(self, prompt, *args, **kwargs):
+        text = _prompt_text(prompt)
+        structured = self._schema is not None
+        key = Cassette.key("llm", self.model, structured, text)
+        cassette = StubSettings.cassette
+
+        if self._real is not None:
+            response = self._real.invoke(prompt, *args, **kwargs)
+            value = dict(response) if structured else response.content
+            cassette.put("llm", key, value)
+        else:
+            value = cassette.get("llm", key)
+            if value is None:
+                recorder.add("replay_misses")
+                value = _synthetic_query(text) if structured else _synthetic_text(text)
+
+        completion = json.dumps(value, ensure_ascii=False) if structured else value
+        prompt_tokens = count_tokens(text)
+        completion_tokens = count_tokens(completion)
+        recorder.add("llm_calls")
+        recorder.add("prompt_tokens", prompt_tokens)
+        recorder.add("completion_tokens", completion_tokens)
+        _simulate(StubSettings.llm_latency + StubSettings.llm_latency_per_token * completion_tokens)
+        if structured and self._include_raw:
+            raw = AIMessage(content=completion, usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            })
+            return {"raw": raw, "parsed": value, "parsing_error": None}
+        return value if structured else AIMessage(content=value)
+
+
+class StubEmbeddings:
+    """OpenAIEmbeddings 대체 클래스.
+
+    벡터는 용량이 커서 기록하지 않으며, 재생 모드에서는 문자 2-gram 해시 기반의
+    결정적 벡터를 반환합니다 (record 모드에서는 실제 임베딩을 그대로 사용).
+    """
+
+    dimensions = 256
+
+    def __init__(self, *args, **kwargs):
+        self._real = StubSettings.real_embeddings_class(*args, **kwargs) if StubSettings.mode == "record" else None
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        compact = text.replace(" ", "")
+        for i in range(max(len(compact) - 1, 1)):
+            bucket = int(hashlib.md5(compact[i:i + 2].encode("utf-8")).hexdigest(), 16) % self.dimensions
+            vector[bucket] += 1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        recorder.add("embedding_calls")
+        if self._real is not None:
+            return self._real.embed_documents(texts)
+        _simulate(StubSettings.embedding_latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        recorder.add("embedding_calls")
+        if self._real is not None:
+            return self._real.embed_query(text)
+        _simulate(StubSettings.embedding_latency)
+        return self._vector(text)
+
+
+class StubTavilyClient:
+    """TavilyClient 대체 클래스 (record: 실제 검색 후 저장, replay: 저장된 결과 또는 합성 결과)."""
+
+    def __init__(self, *args, **kwargs):
+        self._real = StubSettings.real_tavily_class(*args, **kwargs) if StubSettings.mode == "record" else None
+
+    def search(self, query: str, **kwargs) -> Dict:
+        key = Cassette.key("search", query, kwargs.get("max_results"))
+        cassette = StubSettings.cassette
+        recorder.add("search_calls")
+
+        if self._real is not None:
+            response = self._real.search(query=query, **kwargs)
+            cassette.put("search", key, response)
+            return response
+
+        response = cassette.get("search", key)
+        if response is None:
+            recorder.add("replay_misses")
+            response = {"results": [
+                {
+                    "title": f"{query} 관련 기사 {i + 1}",
+                    "content": f"{query}에 대한 분석 기사입니다. 업황 변화와 비용 구조가 실적에 영향을 주었습니다. " * 3,
+                    "url": f"https://example.com/bench/{i + 1}",
+                }
+                for i in range(kwargs.get("max_results", 5))
+            ]}
+        _simulate(StubSettings.search_latency)
+        return response
+
+
+# ----------------------------------------------------------------------
+# 계측 설치
+# ----------------------------------------------------------------------
+def _timed(func, on_done):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            on_done(time.perf_counter() - start)
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def install_stubs():
+    """외부 API 클래스를 스텁으로 바꾸고 그래프 노드/SQL 실행 시간을 계측합니다."""
+    import tavily
+    import tools
+    import graph
+    from database import FinancialDatabase
+
+    StubSettings.real_chat_class = tools.ChatOpenAI
+    StubSettings.real_embeddings_class = tools.OpenAIEmbeddings
+    StubSettings.real_tavily_class = tavily.TavilyClient
+
+    graph.ChatOpenAI = StubChatOpenAI
+    tools.ChatOpenAI = StubChatOpenAI
+    tools.OpenAIEmbeddings = StubEmbeddings
+    tavily.TavilyClient = StubTavilyClient
+
+    for node in GRAPH_NODES:
+        method_name = f"{node}_node"
+        method = getattr(graph.FinancialAnalysisGraph, method_name)
+        setattr(graph.FinancialAnalysisGraph, method_name,
+                _timed(method, lambda seconds, node=node: recorder.add_node(node, seconds)))
+
+    def on_sql(seconds):
+        recorder.add("sql_calls")
+        recorder.add("sql_seconds", seconds)
+
+    for method_name in ("execute_query", "get_company_metrics"):
+        setattr(FinancialDatabase, method_name, _timed(getattr(FinancialDatabase, method_name), on_sql))
+
+    # SQL_BACKEND=duckdb로 실행할 때의 SQL 시간도 함께 계측
+    try:
+        from duckdb_backend import DuckDBBackend
+    except ImportError:
+        return
+    DuckDBBackend.execute_query = _timed(DuckDBBackend.execute_query, on_sql)
+
+
+# ----------------------------------------------------------------------
+# 실행 및 보고
+# ----------------------------------------------------------------------
+def load_corpus(path: str) -> List[Dict]:
+    """JSONL 코퍼스를 읽어 {"question", "session", "route"} 목록으로 반환합니다."""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            question = entry.get("question") or entry.get("query") or entry.get("title")
+            if question:
+                items.append({
+                    "question": question,
+                    "session": entry.get("session"),
+                    "route": entry.get("route"),
+                })
+    return items
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """선형 보간 백분위수를 계산합니다."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_benchmark(corpus: List[Dict], repeat: int = 1) -> List[Dict]:
+    """코퍼스의 질문을 순서대로 실행하고 질문별 측정 기록을 반환합니다."""
+    from graph import FinancialAnalysisGraph
+
+    graph_instance = FinancialAnalysisGraph()
+    for round_index in range(repeat):
+        for index, item in enumerate(corpus):
+            thread_id = f"bench_{round_index}_{item['session'] or index}"
+            config = {"configurable": {"thread_id": thread_id}}
+
+            recorder.start(item["question"])
+            start = time.perf_counter()
+            graph_instance.invoke(item["question"], config)
+            elapsed = time.perf_counter() - start
+
+            route = graph_instance.graph.get_state(config).values.get("route_decision", "")
+            recorder.finish(route, elapsed)
+            record = recorder.records[-1]
+            record["expected_route"] = item["route"]
+            print(f"[{len(recorder.records)}] {route:<16} {elapsed * 1000:8.1f}ms  {item['question'][:40]}")
+    return recorder.records
+
+
+def summarize(records: List[Dict]) -> Dict:
+    """라우트별 p50/p95 요약을 만듭니다."""
+    summary = {}
+    for route in ROUTES + ["all"]:
+        selected = [r for r in records if route == "all" or r["route"] == route]
+        if not selected:
+            continue
+
+        def stats(values):
+            return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+        route_summary = {
+            "count": len(selected),
+            "total_ms": stats([r["total_seconds"] * 1000 for r in selected]),
+            "sql_ms": stats([r["sql_seconds"] * 1000 for r in selected]),
+            "llm_calls": stats([r["llm_calls"] for r in selected]),
+            "prompt_tokens": stats([r["prompt_tokens"] for r in selected]),
+            "completion_tokens": stats([r["completion_tokens"] for r in selected]),
+            "search_calls": stats([r["search_calls"] for r in selected]),
+            "nodes_ms": {},
+        }
+        for node in GRAPH_NODES:
+            values = [r["node_seconds"][node] * 1000 for r in selected if node in r["node_seconds"]]
+            if values:
+                route_summary["nodes_ms"][node] = stats(values)
+        mismatched = [r for r in selected if r.get("expected_route") and r["expected_route"] != r["route"]]
+        route_summary["route_mismatches"] = len(mismatched)
+        summary[route] = route_summary
+    return summary
+
+
+def print_summary(summary: Dict):
+    """요약을 표 형태로 출력합니다."""
+    for route, s in summary.items():
+        print(f"\n=== {route} (n={s['count']}, 기대 라우트 불일치 {s['route_mismatches']}건) ===")
+        print(f"{'항목':<28}{'p50':>12}{'p95':>12}")
+        rows = [("total (ms)", s["total_ms"]), ("sql (ms)", s["sql_ms"]), ("llm calls", s["llm_calls"]),
+                ("prompt tokens", s["prompt_tokens"]), ("completion tokens", s["completion_tokens"]),
+                ("search calls", s["search_calls"])]
+        rows += [(f"node:{node} (ms)", values) for node, values in s["nodes_ms"].items()]
+        for label, values in rows:
+            print(f"{label:<28}{values['p50']:>12.1f}{values['p95']:>12.1f}")
+
+
+# ----------------------------------------------------------------------
+# SQL 엔진 비교
+# ----------------------------------------------------------------------
+def canonical_queries(prompt: str, top_k: int = 10) -> List[Dict]:
+    """Text2SQL 프롬프트의 예시 SQL 중 질문 주석이 달린 조인 쿼리(ROE/ROA/다중 조건 등)를 추출합니다."""
+    queries = []
+    for block in re.findall(r"```sql\n(.*?)```", prompt, re.S):
+        for statement in block.split(";"):
+            statement = statement.strip().replace("{top_k}", str(top_k))
+            question = re.search(r'--\s*"(.+?)"', statement)
+            if question and re.search(r"\bJOIN\b", statement):
+                queries.append({"question": question.group(1), "sql": statement})
+    return queries
+
+
+def _normalized(rows: List) -> List:
+    """엔진 간 결과 비교용으로 행을 정렬하고 실수를 반올림합니다."""
+    return sorted(
+        (tuple(round(value, 4) if isinstance(value, float) else value for value in row) for row in rows),
+        key=repr,
+    )
+
+
+def compare_engines(repeat: int = 20) -> List[Dict]:
+    """대표 예시 SQL을 SQLite와 DuckDB에서 각각 repeat번 실행해 지연 시간과 결과 일치 여부를 비교합니다."""
+    from database import db
+    from duckdb_backend import DuckDBBackend, adapt_sql
+    from tools import FinancialAnalysisTools
+
+    engines = [("sqlite", db, lambda sql: sql), ("duckdb", DuckDBBackend(db), adapt_sql)]
+    results = []
+    for query in canonical_queries(FinancialAnalysisTools.QUERY_PROMPT):
+        result = {"question": query["question"]}
+        outputs = []
+        for name, backend, adapt in engines:
+            sql = adapt(query["sql"])
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                columns, rows = backend.execute_query(sql)
+                timings.append(time.perf_counter() - start)
+            outputs.append(_normalized(rows))
+            result[name] = {"rows": len(rows), "p50": percentile(timings, 50) * 1000,
+                            "p95": percentile(timings, 95) * 1000}
+        result["match"] = all(output == outputs[0] for output in outputs)
+        results.append(result)
+    return results
+
+
+def print_engine_comparison(results: List[Dict]):
+    """엔진 비교 결과를 표 형태로 출력합니다."""
+    print(f"\n{'질문':<44}{'행':>6}{'sqlite p50':>12}{'p95':>9}{'duckdb p50':>12}{'p95':>9}{'일치':>6}")
+    for r in results:
+        print(f"{r['question'][:40]:<44}{r['sqlite']['rows']:>6}{r['sqlite']['p50']:>12.2f}{r['sqlite']['p95']:>9.2f}"
+              f"{r['duckdb']['p50']:>12.2f}{r['duckdb']['p95']:>9.2f}{'O' if r['match'] else 'X':>6}")
+
+
+def main():
+    """벤치마크 CLI 진입점"""
+    parser = argparse.ArgumentParser(description="재무제표 분석 시스템 오프라인 벤치마크")
+    parser.add_argument("--corpus", default="benchmark_questions.jsonl", help="질문 코퍼스 (JSONL)")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassette", default="benchmark_cassette.json", help="기록/재생 응답 파일")
+    parser.add_argument("--repeat", type=int, default=1, help="코퍼스 반복 실행 횟수")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 호출당 모의 지연(초)")
+    parser.add_argument("--llm-latency-per-token", type=float, default=0.0, help="출력 토큰당 모의 지연(초)")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="임베딩 호출당 모의 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="웹 검색 호출당 모의 지연(초)")
+    parser.add_argument("--web-cache", action="store_true", help="웹 검색 캐시 사용 (기본: 끔)")
+    parser.add_argument("--output", help="질문별 측정 기록과 요약을 저장할 JSON 파일")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="코퍼스 대신 프롬프트의 대표 예시 SQL로 SQLite와 DuckDB를 비교")
+    parser.add_argument("--query-repeat", type=int, default=20, help="엔진 비교 시 쿼리별 반복 실행 횟수")
+    args = parser.parse_args()
+
+    if args.compare_engines:
+        results = compare_engines(repeat=args.query_repeat)
+        print_engine_comparison(results)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"engines": results}, f, ensure_ascii=False, indent=2)
+            print(f"측정 결과를 저장했습니다: {args.output}")
+        return
+
+    StubSettings.mode = args.mode
+    StubSettings.cassette = Cassette(args.cassette)
+    StubSettings.llm_latency = args.llm_latency
+    StubSettings.llm_latency_per_token = args.llm_latency_per_token
+    StubSettings.embedding_latency = args.embedding_latency
+    StubSettings.search_latency = args.search_latency
+
+    # 재생 모드는 실제 키가 필요 없고, 캐시로 인해 검색 경로가 측정에서 빠지지 않도록 기본으로 끔
+    if args.mode == "replay":
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+    os.environ["WEB_SEARCH_BACKEND"] = "tavily"
+    if not args.web_cache:
+        os.environ["WEB_SEARCH_CACHE_PATH"] = ""
+
+    install_stubs()
+    records = run_benchmark(load_corpus(args.corpus), repeat=args.repeat)
+    summary = summarize(records)
+    print_summary(summary)
+
+    misses = sum(r["replay_misses"] for r in records)
+    if args.mode == "replay" and misses:
+        print(f"\n참고: 저장된 응답이 없어 합성 응답을 사용한 호출 {misses}건")
+    if args.mode == "record":
+        StubSettings.cassette.save()
+        print(f"\n응답을 기록했습니다: {args.cassette}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "records": records}, f, ensure_ascii=False, indent=2)
+        print(f"측정 결과를 저장했습니다: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
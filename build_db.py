@@ -0,0 +1,167 @@
+"""
+오프라인 데이터베이스 빌드 명령
+
+data/ 디렉토리의 DART 재무제표 TSV 파일을 파싱하여 인덱스와 통계를 갖추고 VACUUM으로
+압축한 SQLite 파일과, 데이터 버전·원본 파일·보고 기간·행 수를 담은 매니페스트(JSON)를 만듭니다.
+서비스 프로세스는 이 파일을 읽기 전용으로 열기만 하므로 여러 인스턴스가 파싱 없이 바로 시작합니다.
+
+사용법:
+    # dist/financial_data-<데이터버전>.db 와 .manifest.json 생성
+    python build_db.py --data-dir data --output-dir dist
+
+    # 생성된 파일로 서버 실행 (시작 시 파싱 생략)
+    DATABASE_PATH=dist/financial_data-<데이터버전>.db DATABASE_READ_ONLY=true python main.py
+
+    # duckdb가 설치되어 있으면 SQL_BACKEND=duckdb용 dist/financial_data-<데이터버전>.duckdb 도 함께 생성됨
+    DATABASE_PATH=dist/financial_data-<데이터버전>.db DATABASE_READ_ONLY=true SQL_BACKEND=duckdb python main.py
+
+데이터 버전은 원본 파일 경로와 내용의 해시이므로, 같은 입력이면 같은 버전이 나옵니다.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from database import FinancialDatabase, duckdb_path, manifest_path, report_period_label
+from parser import FinancialDataParser
+
+
+# 파싱 대상 하위 디렉토리 (FinancialDataParser.parse_all_financial_statements와 동일)
+SOURCE_DIRS = ["balance_sheets", "income_statements", "cash_flow_statements"]
+
+MANIFEST_FORMAT = 1
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_source_files(data_dir: str) -> list:
+    """원본 파일 목록을 (상대 경로, 크기, sha256) 딕셔너리 리스트로 반환합니다."""
+    files = []
+    for sub_dir in SOURCE_DIRS:
+        for path in sorted(glob.glob(os.path.join(data_dir, sub_dir, "*.txt"))):
+            files.append({
+                "path": os.path.relpath(path, data_dir),
+                "bytes": os.path.getsize(path),
+                "sha256": _sha256_file(path),
+            })
+    return files
+
+
+def compute_data_version(source_files: list) -> str:
+    """원본 파일 경로와 내용 해시로 데이터 버전을 계산합니다."""
+    digest = hashlib.sha256()
+    for entry in source_files:
+        digest.update(f"{entry['path']}\0{entry['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def build_database(data_dir: str, output_path: str, data_version: str, source_files: list) -> dict:
+    """임시 파일에 데이터베이스를 만든 뒤 원자적으로 output_path로 옮기고 매니페스트를 반환합니다."""
+    building_path = output_path + ".building"
+    if os.path.exists(building_path):
+        os.remove(building_path)
+
+    started = time.perf_counter()
+    database = FinancialDatabase(building_path)
+    # 파서가 적재 후 인덱스와 통계까지 만듦
+    FinancialDataParser(data_dir, database=database).parse_all_financial_statements()
+    row_counts = database.get_row_counts()
+    report_periods = [report_period_label(period) for period in database.get_report_periods()]
+    database.compact()
+
+    os.replace(building_path, output_path)
+
+    return {
+        "format": MANIFEST_FORMAT,
+        "data_version": data_version,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "build_seconds": round(time.perf_counter() - started, 2),
+        "database": os.path.basename(output_path),
+        "database_bytes": os.path.getsize(output_path),
+        "database_sha256": _sha256_file(output_path),
+        "report_periods": report_periods,
+        "row_counts": row_counts,
+        "source_files": source_files,
+    }
+
+
+def write_manifest(manifest: dict, output_path: str) -> str:
+    """매니페스트를 데이터베이스 파일 옆에 저장하고 경로를 반환합니다."""
+    path = manifest_path(output_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def build_duckdb(db_path: str) -> Optional[str]:
+    """아티팩트와 같은 데이터를 담은 DuckDB 파일(SQL_BACKEND=duckdb용)을 만들고 경로를 반환합니다.
+
+    duckdb가 설치되지 않았으면 경고만 출력하고 None을 반환합니다.
+    """
+    try:
+        from duckdb_backend import export_to_duckdb
+    except ImportError:
+        print("경고: duckdb가 설치되지 않아 DuckDB 파일을 만들지 않습니다 (SQL_BACKEND=duckdb 사용 불가).")
+        return None
+
+    path = duckdb_path(db_path)
+    export_to_duckdb(FinancialDatabase(db_path, read_only=True), path)
+    return path
+
+
+def main():
+    """빌드 CLI 진입점"""
+    parser = argparse.ArgumentParser(description="재무제표 데이터베이스 아티팩트 빌드")
+    parser.add_argument("--data-dir", default="data", help="DART 재무제표 TSV 디렉토리")
+    parser.add_argument("--output-dir", default="dist", help="아티팩트를 저장할 디렉토리")
+    parser.add_argument("--output", help="데이터베이스 파일 경로 (지정하면 --output-dir 대신 사용)")
+    parser.add_argument("--force", action="store_true", help="같은 버전의 아티팩트가 있어도 다시 빌드")
+    args = parser.parse_args()
+
+    source_files = collect_source_files(args.data_dir)
+    if not source_files:
+        parser.error(f"원본 파일이 없습니다: {args.data_dir}")
+    data_version = compute_data_version(source_files)
+
+    output_path = args.output or os.path.join(args.output_dir, f"financial_data-{data_version}.db")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    manifest_file = manifest_path(output_path)
+
+    if not args.force and os.path.exists(output_path) and os.path.exists(manifest_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            if json.load(f).get("data_version") == data_version:
+                print(f"데이터 버전 {data_version}의 아티팩트가 이미 있습니다: {output_path}")
+                if not os.path.exists(duckdb_path(output_path)):
+                    build_duckdb(output_path)
+                return
+
+    print(f"데이터 버전 {data_version} 빌드 중 (원본 파일 {len(source_files)}개)...")
+    manifest = build_database(args.data_dir, output_path, data_version, source_files)
+    write_manifest(manifest, output_path)
+
+    print(f"\n데이터베이스: {output_path} ({manifest['database_bytes']:,} bytes)")
+    print(f"매니페스트: {manifest_file}")
+    print(f"보고 기간: {', '.join(manifest['report_periods'])}")
+    for table, count in manifest["row_counts"].items():
+        print(f"  {table}: {count:,}행")
+    duckdb_file = build_duckdb(output_path)
+    if duckdb_file:
+        print(f"DuckDB: {duckdb_file}")
+    print(f"\n실행: DATABASE_PATH={output_path} DATABASE_READ_ONLY=true python main.py")
+    if duckdb_file:
+        print("  (DuckDB에서 SQL 실행: SQL_BACKEND=duckdb 추가)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from langgraph.checkpoint.memory import MemorySaver
+
+
+class BoundedMemorySaver(MemorySaver):
+    """스레드(세션) 수, 유휴 시간, 메모리 사용량에 상한이 있는 MemorySaver입니다.
+
+    - 스레드마다 최근 max_checkpoints_per_thread개의 체크포인트만 보관합니다.
+    - ttl_seconds 동안 접근이 없는 스레드는 삭제합니다.
+    - 스레드 수가 max_threads를 넘거나 전체 크기가 max_bytes를 넘으면
+      가장 오래전에 사용된 스레드부터 삭제합니다 (LRU).
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 1000,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_checkpoints_per_thread: int = 20,
+    ):
+        super().__init__()
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+
+        # thread_id -> 마지막 접근 시각 (오래된 순서)
+        self._last_access = OrderedDict()
+        # thread_id -> 추정 크기(bytes)
+        self._thread_bytes = {}
+        # thread_id -> 해당 스레드의 blobs / writes 키
+        self._blob_keys = defaultdict(set)
+        self._write_keys = defaultdict(set)
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver 인터페이스
+    # ------------------------------------------------------------------
+    def get_tuple(self, config):
+        """체크포인트를 조회하며 해당 스레드의 접근 시각을 갱신합니다."""
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._expire_idle_threads()
+            if thread_id in self._last_access:
+                self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        """체크포인트를 저장한 뒤 오래된 체크포인트와 스레드를 정리합니다."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            for channel, version in new_versions.items():
+                self._blob_keys[thread_id].add((thread_id, checkpoint_ns, channel, version))
+            self._touch(thread_id)
+            self._prune_thread(thread_id, checkpoint_ns)
+            self._thread_bytes[thread_id] = self._measure_thread(thread_id)
+            self._evict()
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        """중간 쓰기(pending writes)를 저장합니다."""
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys[thread_id].add(
+                (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            )
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """스레드의 모든 체크포인트를 삭제합니다."""
+        with self._lock:
+            self._drop_thread(thread_id)
+
+    # ------------------------------------------------------------------
+    # 상태 조회
+    # ------------------------------------------------------------------
+    @property
+    def active_threads(self) -> int:
+        """현재 보관 중인 스레드(세션) 수를 반환합니다."""
+        return len(self._last_access)
+
+    @property
+    def total_bytes(self) -> int:
+        """보관 중인 체크포인트의 추정 크기(bytes)를 반환합니다."""
+        return sum(self._thread_bytes.values())
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+    def _touch(self, thread_id: str):
+        """스레드의 접근 시각을 갱신하고 LRU 순서의 맨 뒤로 옮깁니다."""
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str):
+        """스레드의 최근 체크포인트만 남기고, 더 이상 참조되지 않는 blob을 삭제합니다."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+
+        # checkpoint_id는 시간순으로 정렬 가능한 UUID6입니다
+        ordered_ids = sorted(checkpoints)
+        stale_ids = ordered_ids[:-self.max_checkpoints_per_thread]
+        for checkpoint_id in stale_ids:
+            del checkpoints[checkpoint_id]
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys[thread_id].discard(write_key)
+
+        # 남은 체크포인트가 참조하는 채널 버전만 유지
+        referenced = set()
+        for saved_checkpoint, _metadata, _parent_id in checkpoints.values():
+            channel_versions = self.serde.loads_typed(saved_checkpoint).get("channel_versions", {})
+            referenced.update((thread_id, checkpoint_ns, channel, version)
+                              for channel, version in channel_versions.items())
+        for blob_key in list(self._blob_keys[thread_id]):
+            if blob_key[1] == checkpoint_ns and blob_key not in referenced:
+                self.blobs.pop(blob_key, None)
+                self._blob_keys[thread_id].discard(blob_key)
+
+    def _measure_thread(self, thread_id: str) -> int:
+        """스레드가 차지하는 직렬화된 체크포인트/blob 크기를 계산합니다."""
+        size = 0
+        for checkpoints in self.storage.get(thread_id, {}).values():
+            for (_type, checkpoint_bytes), (_mtype, metadata_bytes), _parent_id in checkpoints.values():
+                size += len(checkpoint_bytes) + len(metadata_bytes)
+        for blob_key in self._blob_keys.get(thread_id, ()):
+            blob = self.blobs.get(blob_key)
+            if blob is not None:
+                size += len(blob[1])
+        return size
+
+    def _expire_idle_threads(self):
+        """ttl_seconds 동안 사용되지 않은 스레드를 삭제합니다."""
+        if not self.ttl_seconds:
+            return
+        deadline = time.monotonic() - self.ttl_seconds
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            if last_access >= deadline:
+                break
+            self._drop_thread(thread_id)
+
+    def _evict(self):
+        """TTL, 스레드 수, 메모리 상한을 초과하면 오래된 스레드부터 삭제합니다."""
+        self._expire_idle_threads()
+        while len(self._last_access) > self.max_threads:
+            self._drop_thread(next(iter(self._last_access)))
+        # 방금 사용한 스레드 하나는 상한을 넘더라도 유지
+        while self.total_bytes > self.max_bytes and len(self._last_access) > 1:
+            self._drop_thread(next(iter(self._last_access)))
+
+    def _drop_thread(self, thread_id: str):
+        """스레드와 관련된 모든 저장 데이터를 삭제합니다."""
+        self.storage.pop(thread_id, None)
+        for write_key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(write_key, None)
+        for blob_key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(blob_key, None)
+        self._last_access.pop(thread_id, None)
+        self._thread_bytes.pop(thread_id, None)
+
+
+def create_checkpointer():
+    """환경 변수 설정에 따라 LangGraph 체크포인터를 생성합니다.
+
+    CHECKPOINT_BACKEND=sqlite 이면 디스크 기반 SqliteSaver를 사용하고
+    (langgraph-checkpoint-sqlite 필요), 그 외에는 BoundedMemorySaver를 사용합니다.
+    """
+    backend = os.getenv("CHECKPOINT_BACKEND", "memory").lower()
+
+    if backend == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError:
+            print("경고: langgraph-checkpoint-sqlite가 설치되지 않아 메모리 체크포인터를 사용합니다.")
+        else:
+            db_path = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.db")
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            print(f"SQLite 체크포인터를 사용합니다: {db_path}")
+            return SqliteSaver(conn)
+
+    return BoundedMemorySaver(
+        max_threads=int(os.getenv("CHECKPOINT_MAX_THREADS", "1000")),
+        ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600")),
+        max_bytes=int(os.getenv("CHECKPOINT_MAX_BYTES", str(256 * 1024 * 1024))),
+        max_checkpoints_per_thread=int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20")),
+    )
@@ -0,0 +1,151 @@
+import os
+from typing import List, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage
+from tracing import tracer, traced
+
+
+def _load_encoder():
+    """tiktoken 인코더를 반환합니다 (사용할 수 없으면 None)."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+_encoder = _load_encoder()
+
+
+def count_tokens(text: str) -> int:
+    """텍스트의 토큰 수를 계산합니다 (tiktoken이 없으면 글자 수 기반으로 근사)."""
+    if not text:
+        return 0
+    if _encoder is not None:
+        return len(_encoder.encode(text))
+    # 한글은 대략 1~2글자당 1토큰
+    return len(text) // 2 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """텍스트를 최대 토큰 수 이내로 자릅니다."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoder is not None:
+        return _encoder.decode(_encoder.encode(text)[:max_tokens]) + "..."
+    return text[:max_tokens * 2] + "..."
+
+
+class ConversationMemory:
+    """대화 기록을 '누적 요약 + 최근 N턴' 형태로 토큰 예산 안에서 관리합니다.
+
+    예산을 넘는 오래된 턴은 LLM으로 요약에 합치고 상태의 messages에서 제거하므로,
+    긴 세션에서도 프롬프트와 체크포인트 크기가 일정하게 유지됩니다.
+    """
+
+    def __init__(self, llm, max_recent_turns: int = 3, token_budget: int = 1500, summary_token_budget: int = 400):
+        self.llm = llm
+        self.max_recent_turns = max_recent_turns
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+
+    def compact(self, history: List[BaseMessage], summary: str) -> Tuple[str, List[BaseMessage], List[BaseMessage]]:
+        """예산을 넘는 오래된 턴을 요약에 합칩니다.
+
+        Args:
+            history: 현재 질문을 제외한 이전 대화 메시지
+            summary: 지금까지의 누적 요약
+
+        Returns:
+            (갱신된 요약, 유지할 최근 메시지, 요약에 합쳐져 제거할 메시지)
+        """
+        turns = self._split_turns(history)
+        budget_left = self.token_budget - count_tokens(summary)
+
+        kept_turns = []
+        for turn in reversed(turns):
+            if len(kept_turns) >= self.max_recent_turns:
+                break
+            turn_tokens = sum(count_tokens(msg.content) for msg in turn)
+            if kept_turns and turn_tokens > budget_left:
+                break
+            kept_turns.insert(0, turn)
+            budget_left -= turn_tokens
+
+        folded_turns = turns[:len(turns) - len(kept_turns)]
+        folded = [msg for turn in folded_turns for msg in turn]
+        kept = [msg for turn in kept_turns for msg in turn]
+
+        if folded:
+            summary = self._summarize(summary, folded)
+        return summary, kept, folded
+
+    def build_context(self, summary: str, recent: List[BaseMessage]) -> str:
+        """요약과 최근 대화를 프롬프트에 넣을 문자열로 만듭니다."""
+        sections = []
+        if summary:
+            sections.append(f"이전 대화 요약: {summary}")
+
+        if recent:
+            # 최근 대화가 예산을 넘으면 메시지마다 같은 몫으로 자름
+            available = max(self.token_budget - count_tokens(summary), 0)
+            per_message = available // len(recent) if recent else 0
+            lines = [
+                f"{'User' if isinstance(msg, HumanMessage) else 'Bot'}: {truncate_to_tokens(msg.content, per_message)}"
+                for msg in recent
+            ]
+            sections.append("\n".join(lines))
+
+        return "\n".join(sections)
+
+    def _split_turns(self, history: List[BaseMessage]) -> List[List[BaseMessage]]:
+        """메시지를 사용자 질문 단위의 턴으로 묶습니다."""
+        turns = []
+        for msg in history:
+            if isinstance(msg, HumanMessage) or not turns:
+                turns.append([msg])
+            else:
+                turns[-1].append(msg)
+        return turns
+
+    @traced("memory.summarize")
+    def _summarize(self, summary: str, messages: List[BaseMessage]) -> str:
+        """기존 요약에 오래된 대화를 합쳐 새 요약을 만듭니다."""
+        transcript = "\n".join(
+            f"{'User' if isinstance(msg, HumanMessage) else 'Bot'}: {msg.content}" for msg in messages
+        )
+        prompt = f"""
+다음은 재무 분석 챗봇과 사용자의 대화입니다. 기존 요약에 새 대화 내용을 합쳐 하나의 요약으로 갱신해주세요.
+
+기존 요약:
+{summary if summary else "없음"}
+
+새 대화:
+{transcript}
+
+**규칙:**
+- 한국어로 {self.summary_token_budget}토큰 이내
+- 언급된 회사명, 재무 항목, 기간, 조회된 핵심 수치는 반드시 유지
+- 후속 질문 해석에 필요 없는 인사말이나 설명은 생략
+
+갱신된 요약:
+"""
+        try:
+            response = self.llm.invoke(prompt)
+            tracer.record_llm_usage(response)
+            new_summary = response.content.strip()
+        except Exception as e:
+            print(f"대화 요약 생성 중 오류: {e}")
+            new_summary = f"{summary}\n{transcript}".strip()
+        return truncate_to_tokens(new_summary, self.summary_token_budget)
+
+
+def create_conversation_memory(llm) -> ConversationMemory:
+    """환경 변수 설정으로 ConversationMemory를 생성합니다."""
+    return ConversationMemory(
+        llm,
+        max_recent_turns=int(os.getenv("CONVERSATION_RECENT_TURNS", "3")),
+        token_budget=int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500")),
+        summary_token_budget=int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "400")),
+    )
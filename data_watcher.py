@@ -0,0 +1,137 @@
+import glob
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from build_db import SOURCE_DIRS, build_database, build_duckdb, collect_source_files, compute_data_version, write_manifest
+from database import FinancialDatabase, duckdb_path, manifest_path
+from tracing import tracer
+
+
+class DataDirectoryWatcher:
+    """data/ 하위 재무제표 디렉토리를 주기적으로 확인하여 새 파일을 무중단으로 반영합니다.
+
+    변경이 감지되면 (복사 중인 파일을 피하도록 한 주기 동안 변화가 없을 때)
+    섀도 DB 파일에 전체를 다시 적재하고, 그 파일을 읽기 전용으로 여는 새 도구 인스턴스를
+    만든 뒤 전역 도구 인스턴스를 원자적으로 교체합니다. 진행 중인 요청은 이전 인스턴스로 끝납니다.
+    """
+
+    def __init__(self, data_dir: str = "data", output_dir: str = "dist",
+                 interval_seconds: float = 30, keep_versions: int = 2):
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.interval_seconds = interval_seconds
+        # 진행 중인 요청이 이전 파일을 계속 읽을 수 있도록 최근 몇 개 버전은 지우지 않음
+        self.keep_versions = max(keep_versions, 2)
+        # 현재 서비스 중인 데이터의 버전 (파일 시각만 바뀐 경우 재적재하지 않음)
+        self.data_version = compute_data_version(collect_source_files(data_dir))
+        self._last_snapshot = self.snapshot()
+        self._pending_snapshot: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """감시 대상 파일별 (수정 시각, 크기)를 반환합니다."""
+        files = {}
+        for sub_dir in SOURCE_DIRS:
+            for path in glob.glob(os.path.join(self.data_dir, sub_dir, "*.txt")):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def start(self) -> threading.Thread:
+        """감시 스레드를 시작합니다."""
+        self._thread = threading.Thread(target=self._run, name="data_watcher", daemon=True)
+        self._thread.start()
+        print(f"데이터 디렉토리 감시를 시작합니다: {self.data_dir} ({self.interval_seconds:g}초 간격)")
+        return self._thread
+
+    def stop(self):
+        """감시 스레드를 멈춥니다."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"데이터 재적재 중 오류 발생: {e}")
+
+    def check(self) -> bool:
+        """변경을 확인하고, 변경이 안정되었으면 재적재합니다. 재적재했으면 True를 반환합니다."""
+        current = self.snapshot()
+        if current == self._last_snapshot:
+            self._pending_snapshot = None
+            return False
+        if current != self._pending_snapshot:
+            # 파일 복사가 끝나지 않았을 수 있으므로 다음 주기에 같은 상태인지 확인
+            self._pending_snapshot = current
+            return False
+
+        self._pending_snapshot = None
+        self._last_snapshot = current
+        return self.reload()
+
+    def reload(self) -> bool:
+        """섀도 DB를 빌드하고 도구 인스턴스를 교체합니다."""
+        from screener import MetricScreener, swap_screener
+        from tools import FinancialAnalysisTools, get_tools_instance, swap_tools_instance
+
+        source_files = collect_source_files(self.data_dir)
+        data_version = compute_data_version(source_files)
+        if data_version == self.data_version:
+            return False
+
+        with tracer.span("data.reload", level="INFO", data_version=data_version, files=len(source_files)) as span:
+            os.makedirs(self.output_dir, exist_ok=True)
+            output_path = os.path.join(self.output_dir, f"financial_data-{data_version}.db")
+            if not os.path.exists(output_path):
+                manifest = build_database(self.data_dir, output_path, data_version, source_files)
+                write_manifest(manifest, output_path)
+                span.set(row_counts=manifest["row_counts"])
+            # SQL_BACKEND=duckdb인 새 도구 인스턴스가 읽을 DuckDB 파일도 교체 전에 만듦
+            if not os.path.exists(duckdb_path(output_path)):
+                build_duckdb(output_path)
+
+            # 새 인스턴스를 완전히 만든 뒤에 교체 (임베딩·웹 검색 캐시는 이어받음)
+            database = FinancialDatabase(output_path, read_only=True)
+            new_tools = FinancialAnalysisTools(database=database, previous=get_tools_instance())
+            swap_tools_instance(new_tools)
+            swap_screener(MetricScreener(database))
+
+        self.data_version = data_version
+        print(f"새 재무제표 데이터를 반영했습니다 (데이터 버전: {data_version})")
+        self._remove_old_versions(output_path)
+        return True
+
+    def _remove_old_versions(self, current_path: str):
+        """최근 keep_versions개를 제외한 이전 섀도 DB 파일을 삭제합니다."""
+        paths = sorted(
+            glob.glob(os.path.join(self.output_dir, "financial_data-*.db")),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        for path in paths[self.keep_versions:]:
+            if os.path.abspath(path) == os.path.abspath(current_path):
+                continue
+            for stale in (path, manifest_path(path), duckdb_path(path)):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+
+def create_data_watcher() -> Optional[DataDirectoryWatcher]:
+    """환경 변수 설정으로 DataDirectoryWatcher를 생성합니다 (DATA_WATCH_ENABLED=true일 때만)."""
+    if os.getenv("DATA_WATCH_ENABLED", "false").lower() != "true":
+        return None
+    return DataDirectoryWatcher(
+        data_dir="data",
+        output_dir=os.getenv("DATA_WATCH_OUTPUT_DIR", "dist"),
+        interval_seconds=float(os.getenv("DATA_WATCH_INTERVAL_SECONDS", "30")),
+    )
@@ -1,190 +1,738 @@
+import calendar
+import json
 import sqlite3
 import os
-from typing import Optional
+import statistics
+from datetime import date
+from typing import Dict, List, Optional
+from tracing import tracer
+
+# 재무제표 뷰(기존 테이블명) → (팩트 테이블, 금액 컬럼)
+FACT_TABLES = {
+    "balance_sheet": ("balance_sheet_facts", ["당기_반기말", "전기말", "전전기말"]),
+    "income_statement": (
+        "income_statement_facts",
+        ["당기_반기_3개월", "당기_반기_누적", "전기_반기_3개월", "전기_반기_누적", "전기", "전전기"],
+    ),
+    "cash_flow_statement": ("cash_flow_statement_facts", ["당기_반기말", "전기_반기말", "전기", "전전기"]),
+    "statement_of_changes_in_equity": ("statement_of_changes_in_equity_facts", ["당기", "전기", "전전기"]),
+}
+
+# 재무제표 테이블(뷰) 목록 (Text2SQL 스키마, 행 수 집계 등에 사용)
+FINANCIAL_TABLES = list(FACT_TABLES)
+
+# 기간별 롱 포맷 시계열 (재무제표 뷰 → [(금액 컬럼, 기간, 기간구분, 레이아웃, 보고서)])
+# 기간: 결산기준일 기준 '당기', '전년동기'(1년 전 같은 날), '전기말'/'전전기말'(직전/전전 회계연도 말)
+# 기간구분: '시점'(재무상태표 잔액), '3개월', '누적'(회계연도 시작부터, 회계연도 말이면 연간 금액)
+# 레이아웃: 금융업(은행/증권/보험/금융기타) 파일의 포괄손익계산서는 '당기 반기말, 전기말, 전전기말' 3개 컬럼이라
+#   반기 누적 금액이 당기_반기_3개월 컬럼에 저장됨 (None이면 업종 구분 없이 적용)
+# 보고서: 사업보고서는 '당기, 전기, 전전기' 3개 컬럼이라 앞쪽 컬럼부터 채워짐
+#   ('사업'이면 사업보고서, '분기'면 1분기/반기/3분기보고서, None이면 모든 보고서에 적용)
+TIMESERIES_COLUMNS = {
+    "balance_sheet": [
+        ("당기_반기말", "당기", "시점", None, None),
+        ("전기말", "전기말", "시점", None, None),
+        ("전전기말", "전전기말", "시점", None, None),
+    ],
+    "income_statement": [
+        ("당기_반기_3개월", "당기", "3개월", "일반", "분기"),
+        ("당기_반기_누적", "당기", "누적", "일반", "분기"),
+        ("전기_반기_3개월", "전년동기", "3개월", "일반", "분기"),
+        ("전기_반기_누적", "전년동기", "누적", "일반", "분기"),
+        ("전기", "전기말", "누적", "일반", "분기"),
+        ("전전기", "전전기말", "누적", "일반", "분기"),
+        ("당기_반기_3개월", "당기", "누적", "일반", "사업"),
+        ("당기_반기_누적", "전기말", "누적", "일반", "사업"),
+        ("전기_반기_3개월", "전전기말", "누적", "일반", "사업"),
+        ("당기_반기_3개월", "당기", "누적", "금융", None),
+        ("당기_반기_누적", "전년동기", "누적", "금융", None),
+    ],
+    "cash_flow_statement": [
+        ("당기_반기말", "당기", "누적", None, None),
+        ("전기_반기말", "전년동기", "누적", None, None),
+        ("전기", "전기말", "누적", None, "분기"),
+        ("전전기", "전전기말", "누적", None, "분기"),
+        ("전기", "전전기말", "누적", None, "사업"),
+    ],
+}
+
+# 금액 컬럼이 가리킬 수 있는 기간 (period_end 참고)
+PERIODS = ("당기", "전년동기", "전기말", "전전기말")
+
+# 사업보고서 (회계연도 전체 보고서)
+ANNUAL_REPORT = "사업보고서"
+
+# 시계열·성장률 뷰 목록 (Text2SQL 스키마에 함께 제공)
+TIMESERIES_TABLES = ["fact_timeseries", "fact_growth"]
+
+# 회사별 지표, 업종/시장별 집계와 순위 (Text2SQL 스키마에 함께 제공)
+SECTOR_TABLES = ["company_metrics", "sector_metrics", "metric_rankings"]
+
+# 업종 집계·순위의 분류 (회사 차원 컬럼, '전체'는 모든 회사)
+SECTOR_DIMENSIONS = ("전체", "업종구분", "시장구분", "업종명")
+
+# 업종 집계에 함께 저장할 상위/하위 기업 수
+SECTOR_TOP_K = 5
+
+# 재무제표 기준 (연결재무제표 / 별도재무제표)
+STATEMENT_BASES = ("연결", "별도")
+
+# DART 정기보고서 종류 (한 사업연도 안의 보고 순서)
+REPORT_TYPES = ("1분기보고서", "반기보고서", "3분기보고서", "사업보고서")
+
+# 재무제표 뷰(balance_sheet 등)가 보여주는 보고 기간: 가장 최근 보고서
+CURRENT_PERIOD_SQL = "(SELECT period_id FROM report_periods ORDER BY 기간순서 DESC LIMIT 1)"
+
+# DART 재무제표 파일의 업종 그룹 (파일명 '_은행_' 등, 구분이 없는 파일은 '일반')
+INDUSTRY_GROUPS = ("은행", "증권", "보험", "금융기타", "일반")
+DEFAULT_INDUSTRY_GROUP = "일반"
+
+
+def parse_statement_type(statement_type: str, file_name: str = "") -> tuple:
+    """재무제표종류(예: '손익계산서, 기능별 분류 - 연결')를 (연결구분, 재무제표구분)으로 나눕니다.
+    
+    재무제표종류에 기준이 없으면 파일명('_연결_' 포함 여부)으로 판단합니다.
+    """
+    statement_type = (statement_type or "").strip()
+    basis = statement_type.rsplit("-", 1)[-1].strip() if "-" in statement_type else ""
+    if basis not in STATEMENT_BASES:
+        basis = "연결" if "_연결_" in os.path.basename(file_name) else "별도"
+    kind = statement_type.split(",", 1)[0].strip()
+    return basis, kind
+
+
+def detect_industry_group(file_name: str) -> str:
+    """재무제표 파일명에서 업종 그룹을 찾습니다 (예: '..._포괄손익계산서_은행_연결_...' → '은행')."""
+    parts = os.path.splitext(os.path.basename(file_name))[0].split("_")
+    for group in INDUSTRY_GROUPS:
+        if group in parts:
+            return group
+    return DEFAULT_INDUSTRY_GROUP
+
+
+def period_end(settlement_date: str, settlement_month=None, period: str = "당기") -> str:
+    """결산기준일과 결산월로 금액 컬럼이 가리키는 기간의 말일(YYYY-MM-DD)을 계산합니다.
+    
+    예: 결산기준일 2025-06-30, 결산월 12 → 전년동기 2024-06-30, 전기말 2024-12-31, 전전기말 2023-12-31
+    """
+    current = date.fromisoformat(settlement_date)
+    if period == "당기":
+        return current.isoformat()
+    if period == "전년동기":
+        day = min(current.day, calendar.monthrange(current.year - 1, current.month)[1])
+        return current.replace(year=current.year - 1, day=day).isoformat()
+    
+    try:
+        month = int(settlement_month)
+    except (TypeError, ValueError):
+        month = 12
+    month = month if 1 <= month <= 12 else 12
+    # 결산기준일 이전(당일 제외)의 가장 최근 회계연도 말
+    year = current.year
+    if date(year, month, calendar.monthrange(year, month)[1]) >= current:
+        year -= 1
+    if period == "전전기말":
+        year -= 1
+    return date(year, month, calendar.monthrange(year, month)[1]).isoformat()
+
+
+def _layout_conditions(layout: Optional[str], report: Optional[str]) -> List[str]:
+    """TIMESERIES_COLUMNS의 레이아웃/보고서 구분을 SQL 조건 목록으로 바꿉니다 (companies c, report_periods r 기준)."""
+    conditions = []
+    if layout == "일반":
+        conditions.append(f"c.업종구분 = '{DEFAULT_INDUSTRY_GROUP}'")
+    elif layout == "금융":
+        conditions.append(f"c.업종구분 != '{DEFAULT_INDUSTRY_GROUP}'")
+    if report == "사업":
+        conditions.append(f"r.보고서종류 = '{ANNUAL_REPORT}'")
+    elif report == "분기":
+        conditions.append(f"r.보고서종류 != '{ANNUAL_REPORT}'")
+    return conditions
+
+
+def current_amount_sql(view: str, column: str) -> str:
+    """일반 업종 분기보고서 기준의 당기 금액 컬럼을 업종 레이아웃·보고서별로 맞는 컬럼을 고르는 SQL 식으로 바꿉니다.
+
+    예: income_statement의 당기_반기_누적 → 금융업이나 사업보고서면 당기_반기_3개월을 읽는 CASE 식
+    (팩트 테이블 f, companies c, report_periods r 기준, TIMESERIES_COLUMNS 참고)
+    """
+    mappings = TIMESERIES_COLUMNS.get(view, [])
+    kinds = [kind for mapped, period, kind, layout, report in mappings
+             if mapped == column and period == "당기" and layout in (None, "일반") and report in (None, "분기")]
+    if not kinds:
+        return f"f.{column}"
+    cases = []
+    for mapped, period, kind, layout, report in mappings:
+        if period != "당기" or kind != kinds[0]:
+            continue
+        conditions = _layout_conditions(layout, report)
+        if not conditions:
+            return f"f.{mapped}" if not cases else f"CASE {' '.join(cases)} ELSE f.{mapped} END"
+        cases.append(f"WHEN {' AND '.join(conditions)} THEN f.{mapped}")
+    return f"CASE {' '.join(cases)} END"
+
+
+def detect_report_period(file_name: str) -> Optional[tuple]:
+    """재무제표 파일명에서 보고 기간을 찾습니다 (예: '2025_반기보고서_01_...' → (2025, '반기보고서'))."""
+    parts = os.path.splitext(os.path.basename(file_name))[0].split("_")
+    if len(parts) >= 2 and parts[0].isdigit() and parts[1] in REPORT_TYPES:
+        return int(parts[0]), parts[1]
+    return None
+
+
+def report_period_label(period: tuple) -> str:
+    """보고 기간 (사업연도, 보고서종류)을 '2025_반기보고서' 형식으로 반환합니다."""
+    return f"{period[0]}_{period[1]}"
+
+
+def _format_number(value: float) -> str:
+    """집계 목록에 넣을 값을 표시합니다 (정수 금액은 천 단위 쉼표, 비율은 소수 둘째 자리)."""
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def summarize_values(members: list) -> tuple:
+    """(값, 회사명) 리스트를 업종 집계 한 행으로 요약합니다.
+    
+    Returns:
+        (회사수, 평균, 중앙값, 제1사분위, 제3사분위, 최소, 최대, 상위기업, 하위기업) 튜플
+        사분위는 양 끝값을 포함한 선형 보간(statistics.quantiles의 'inclusive'),
+        상위/하위 기업은 '회사명(값)'을 SECTOR_TOP_K개까지 쉼표로 이은 문자열
+        (members가 비어 있으면 회사수 0과 빈 통계)
+    """
+    if not members:
+        return (0, None, None, None, None, None, None, "", "")
+    ranked = sorted(members, key=lambda member: member[0], reverse=True)
+    values = [value for value, _name in ranked]
+    if len(values) > 1:
+        q1, median, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    else:
+        q1 = median = q3 = values[0]
+    top = ", ".join(f"{name}({_format_number(value)})" for value, name in ranked[:SECTOR_TOP_K])
+    bottom = ", ".join(f"{name}({_format_number(value)})" for value, name in ranked[::-1][:SECTOR_TOP_K])
+    return (len(values), round(statistics.fmean(values), 2), round(median, 2), round(q1, 2), round(q3, 2),
+            values[-1], values[0], top, bottom)
+
+
+def canonical_name(name: str) -> str:
+    """이름 검색용 표준형을 반환합니다 (공백 제거, 예: '자 산 총 계' → '자산총계')."""
+    return "".join((name or "").split())
+
+
+def normalize_stock_code(code: str) -> Optional[str]:
+    """'[005930]' 형식의 종목코드에서 괄호를 제거합니다 (비상장사의 '[null]'은 None)."""
+    code = (code or "").strip().strip("[]").strip()
+    return code if code and code.lower() != "null" else None
+
+
+def parse_amount(value):
+    """'1,234,000' 같은 금액 문자열을 정수(소수가 있으면 실수)로 변환합니다."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().replace(",", "")
+    if not text or text == "-":
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+
+def detect_basis(text: str) -> Optional[str]:
+    """질문에서 요청한 재무제표 기준(연결/별도)을 찾습니다 (언급이 없으면 None)."""
+    text = text or ""
+    if "연결" in text:
+        return "연결"
+    if "별도" in text or "개별" in text:
+        return "별도"
+    return None
+
+
+def manifest_path(db_path: str) -> str:
+    """데이터베이스 파일에 대응하는 매니페스트(build_db.py 생성) 경로를 반환합니다."""
+    return os.path.splitext(db_path)[0] + ".manifest.json"
+
+
+def duckdb_path(db_path: str) -> str:
+    """데이터베이스 파일에 대응하는 DuckDB 파일(SQL_BACKEND=duckdb용) 경로를 반환합니다."""
+    return os.path.splitext(db_path)[0] + ".duckdb"
+
 
 class FinancialDatabase:
-    def __init__(self, db_path: str = "financial_data.db"):
+    # Text2SQL 프롬프트에 알려줄 SQL 방언
+    dialect = "sqlite"
+    
+    def __init__(self, db_path: str = "financial_data.db", read_only: bool = False):
         self.db_path = db_path
-        self.init_database()
+        self.read_only = read_only
+        # 읽기 전용 아티팩트(build_db.py 결과물)는 스키마가 이미 있으므로 초기화하지 않음
+        if not read_only:
+            self.init_database()
     
     def get_connection(self) -> sqlite3.Connection:
         """데이터베이스 연결을 반환합니다."""
+        if self.read_only:
+            # immutable=1: 파일이 바뀌지 않는다고 보고 잠금/변경 감지를 생략 (여러 프로세스가 공유)
+            return sqlite3.connect(f"file:{self.db_path}?mode=ro&immutable=1", uri=True)
         return sqlite3.connect(self.db_path)
     
+    def load_manifest(self) -> dict:
+        """매니페스트가 있으면 읽어서 반환합니다 (없으면 빈 딕셔너리)."""
+        path = manifest_path(self.db_path)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
     def init_database(self):
-        """데이터베이스와 테이블들을 초기화합니다."""
+        """데이터베이스와 테이블들을 초기화합니다.
+        
+        차원 테이블(companies, statements, items)과 정수 키·금액만 담는 팩트 테이블을 만들고,
+        기존 테이블명(balance_sheet 등)과 컬럼명은 팩트와 차원을 조인한 뷰로 제공합니다.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # 재무상태표 (Balance Sheet)
+        # 이전 스키마(재무제표별 단일 테이블)는 뷰와 이름이 겹치므로 삭제 (데이터는 시작 시 다시 파싱됨)
+        for table in FINANCIAL_TABLES:
+            row = cursor.execute(
+                "SELECT type FROM sqlite_master WHERE name = ?", (table,)
+            ).fetchone()
+            if row and row[0] == "table":
+                cursor.execute(f"DROP TABLE {table}")
+                print(f"{table} 테이블을 차원/팩트 스키마로 재생성합니다.")
+        
+        # 보고 기간 도입 전 팩트 테이블은 기본키가 달라 삭제 (데이터는 시작 시 다시 파싱됨)
+        for view, (fact_table, _amount_columns) in FACT_TABLES.items():
+            fact_columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({fact_table})")]
+            if fact_columns and "period_id" not in fact_columns:
+                cursor.execute(f"DROP VIEW IF EXISTS {view}")
+                cursor.execute(f"DROP TABLE {fact_table}")
+                print(f"{fact_table} 테이블을 보고 기간별 키로 재생성합니다.")
+        
+        # 보고 기간 차원 (DART 파일의 사업연도·보고서종류, 기간순서가 클수록 최근)
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS balance_sheet (
-                재무제표종류 TEXT,
-                종목코드 TEXT,
-                회사명 TEXT,
-                시장구분 TEXT,
-                업종 TEXT,
-                업종명 TEXT,
-                결산월 TEXT,
-                결산기준일 TEXT,
-                보고서종류 TEXT,
-                통화 TEXT,
-                항목코드 TEXT,
-                항목명 TEXT,
-                당기_반기말 REAL,
-                전기말 REAL,
-                전전기말 REAL,
-                PRIMARY KEY (회사명, 결산기준일, 항목명)
+            CREATE TABLE IF NOT EXISTS report_periods (
+                period_id INTEGER PRIMARY KEY,
+                사업연도 INTEGER NOT NULL,
+                보고서종류 TEXT NOT NULL,
+                기간순서 INTEGER NOT NULL,
+                UNIQUE (사업연도, 보고서종류)
             )
         """)
         
-        # 손익계산서 (Income Statement)
+        # 회사 차원 (종목코드는 '[', ']'를 제거해 정규화, 비상장사는 NULL)
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS income_statement (
-                재무제표종류 TEXT,
+            CREATE TABLE IF NOT EXISTS companies (
+                company_id INTEGER PRIMARY KEY,
                 종목코드 TEXT,
-                회사명 TEXT,
+                회사명 TEXT NOT NULL,
                 시장구분 TEXT,
                 업종 TEXT,
                 업종명 TEXT,
                 결산월 TEXT,
-                결산기준일 TEXT,
-                보고서종류 TEXT,
-                통화 TEXT,
-                항목코드 TEXT,
-                항목명 TEXT,
-                당기_반기_3개월 REAL,
-                당기_반기_누적 REAL,
-                전기_반기_3개월 REAL,
-                전기_반기_누적 REAL,
-                전기 REAL,
-                전전기 REAL,
-                PRIMARY KEY (회사명, 결산기준일, 항목명)
+                업종구분 TEXT NOT NULL DEFAULT '일반',
+                UNIQUE (종목코드, 회사명)
             )
         """)
+        # 업종구분 도입 전 DB에는 컬럼 추가
+        company_columns = [row[1] for row in cursor.execute("PRAGMA table_info(companies)")]
+        if "업종구분" not in company_columns:
+            cursor.execute("ALTER TABLE companies ADD COLUMN 업종구분 TEXT NOT NULL DEFAULT '일반'")
         
-        # 현금흐름표 (Cash Flow Statement)
+        # 재무제표 차원 (종류·기준·결산기준일·보고서·통화 조합)
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cash_flow_statement (
+            CREATE TABLE IF NOT EXISTS statements (
+                statement_id INTEGER PRIMARY KEY,
                 재무제표종류 TEXT,
-                종목코드 TEXT,
-                회사명 TEXT,
-                시장구분 TEXT,
-                업종 TEXT,
-                업종명 TEXT,
-                결산월 TEXT,
-                결산기준일 TEXT,
+                연결구분 TEXT NOT NULL,
+                재무제표구분 TEXT NOT NULL,
+                결산기준일 TEXT NOT NULL,
                 보고서종류 TEXT,
                 통화 TEXT,
-                항목코드 TEXT,
-                항목명 TEXT,
-                당기_반기말 REAL,
-                전기_반기말 REAL,
-                전기 REAL,
-                전전기 REAL,
-                PRIMARY KEY (회사명, 결산기준일, 항목명)
+                UNIQUE (재무제표종류, 연결구분, 재무제표구분, 결산기준일, 보고서종류, 통화)
             )
         """)
         
-        # 자본변동표 (Statement of Changes in Equity)
+        # 재무항목 차원
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS statement_of_changes_in_equity (
-                재무제표종류 TEXT,
-                종목코드 TEXT,
-                회사명 TEXT,
-                시장구분 TEXT,
-                업종 TEXT,
-                업종명 TEXT,
-                결산월 TEXT,
-                결산기준일 TEXT,
-                보고서종류 TEXT,
-                통화 TEXT,
-                항목코드 TEXT,
-                항목명 TEXT,
-                당기 REAL,
-                전기 REAL,
-                전전기 REAL,
-                PRIMARY KEY (회사명, 결산기준일, 항목명)
+            CREATE TABLE IF NOT EXISTS items (
+                item_id INTEGER PRIMARY KEY,
+                항목코드 TEXT NOT NULL,
+                항목명 TEXT NOT NULL,
+                UNIQUE (항목코드, 항목명)
+            )
+        """)
+        
+        # 회사명/항목명 부분 문자열 검색용 FTS5 trigram 인덱스 (적재 시 차원 테이블과 함께 갱신)
+        # LIKE '%영업이익%' 같은 앞 와일드카드 검색도 3글자 이상이면 인덱스로 처리됨
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS name_index USING fts5(
+                name, kind UNINDEXED, original UNINDEXED, tokenize = 'trigram'
             )
         """)
         
+        for view, (fact_table, amount_columns) in FACT_TABLES.items():
+            amount_defs = ",\n".join(f"                {column} INTEGER" for column in amount_columns)
+            # 보고 기간이 기본키 맨 앞이라 기간마다 연속된 키 범위(파티션)에 저장되고,
+            # 그 안에서 같은 재무제표(연결구분 포함)의 행이 모여 저장됨
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {fact_table} (
+                    period_id INTEGER NOT NULL REFERENCES report_periods (period_id),
+                    statement_id INTEGER NOT NULL REFERENCES statements (statement_id),
+                    company_id INTEGER NOT NULL REFERENCES companies (company_id),
+                    item_id INTEGER NOT NULL REFERENCES items (item_id),
+{amount_defs},
+                    PRIMARY KEY (period_id, statement_id, company_id, item_id)
+                ) WITHOUT ROWID
+            """)
+            
+            # 호환 뷰: 기존 테이블명과 컬럼명을 그대로 유지 (Text2SQL 프롬프트용)
+            # 최신 보고 기간의 키 범위만 읽으므로 이력이 쌓여도 조회 비용이 늘지 않음
+            amount_selects = ", ".join(f"f.{column}" for column in amount_columns)
+            cursor.execute(f"""
+                CREATE VIEW IF NOT EXISTS {view} AS
+                SELECT s.재무제표종류, s.연결구분, s.재무제표구분,
+                       c.종목코드, c.회사명, c.시장구분, c.업종, c.업종명, c.결산월,
+                       s.결산기준일, s.보고서종류, s.통화,
+                       i.항목코드, i.항목명, {amount_selects}
+                FROM {fact_table} f
+                JOIN statements s ON s.statement_id = f.statement_id
+                JOIN companies c ON c.company_id = f.company_id
+                JOIN items i ON i.item_id = f.item_id
+                WHERE f.period_id = {CURRENT_PERIOD_SQL}
+            """)
+            # 이력 뷰: 모든 보고 기간 (사업연도·보고서종류로 조건을 주면 해당 기간만 읽음)
+            cursor.execute(f"""
+                CREATE VIEW IF NOT EXISTS {view}_history AS
+                SELECT p.사업연도, p.보고서종류, s.재무제표종류, s.연결구분, s.재무제표구분,
+                       c.종목코드, c.회사명, c.시장구분, c.업종, c.업종명, c.결산월,
+                       s.결산기준일, s.통화,
+                       i.항목코드, i.항목명, {amount_selects}
+                FROM {fact_table} f
+                JOIN report_periods p ON p.period_id = f.period_id
+                JOIN statements s ON s.statement_id = f.statement_id
+                JOIN companies c ON c.company_id = f.company_id
+                JOIN items i ON i.item_id = f.item_id
+            """)
+        
+        # 기간별 롱 포맷 시계열 (적재 시 팩트 테이블의 당기/전기/전전기 컬럼을 행으로 펼침)
+        # 항목·기간말이 기본키 앞쪽이라 '특정 항목의 특정 기간' 조회가 인덱스 범위 스캔 한 번으로 끝남
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS timeseries_facts (
+                item_id INTEGER NOT NULL REFERENCES items (item_id),
+                기간말 TEXT NOT NULL,
+                기간구분 TEXT NOT NULL,
+                company_id INTEGER NOT NULL REFERENCES companies (company_id),
+                연결구분 TEXT NOT NULL,
+                재무제표 TEXT NOT NULL,
+                금액 INTEGER,
+                PRIMARY KEY (item_id, 기간말, 기간구분, company_id, 연결구분, 재무제표)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS fact_timeseries AS
+            SELECT c.회사명, c.종목코드, c.업종구분, t.연결구분, t.재무제표,
+                   i.항목코드, i.항목명, t.기간말, t.기간구분, t.금액
+            FROM timeseries_facts t
+            JOIN companies c ON c.company_id = t.company_id
+            JOIN items i ON i.item_id = t.item_id
+        """)
+        
+        # 주요 지표의 성장률 (전년동기대비, 재무상태표는 전기말대비도 포함, 성장률 단위 %)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS growth_facts (
+                지표 TEXT NOT NULL,
+                비교구분 TEXT NOT NULL,
+                기간구분 TEXT NOT NULL,
+                기간말 TEXT NOT NULL,
+                company_id INTEGER NOT NULL REFERENCES companies (company_id),
+                연결구분 TEXT NOT NULL,
+                금액 INTEGER,
+                비교금액 INTEGER,
+                성장률 REAL,
+                PRIMARY KEY (지표, 비교구분, 기간구분, 기간말, company_id, 연결구분)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS fact_growth AS
+            SELECT c.회사명, c.종목코드, c.업종구분, g.연결구분, g.지표, g.비교구분,
+                   g.기간구분, g.기간말, g.금액, g.비교금액, g.성장률
+            FROM growth_facts g
+            JOIN companies c ON c.company_id = g.company_id
+        """)
+        
+        # 회사별 지표·비율 값 (시계열의 누적/시점 금액과 그 비율, 기간말 단위)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_facts (
+                지표 TEXT NOT NULL,
+                기간말 TEXT NOT NULL,
+                연결구분 TEXT NOT NULL,
+                company_id INTEGER NOT NULL REFERENCES companies (company_id),
+                값 REAL,
+                PRIMARY KEY (지표, 기간말, 연결구분, company_id)
+            ) WITHOUT ROWID
+        """)
+        
+        # 업종/시장별 집계 큐브 (분류: 전체/업종구분/시장구분/업종명 × 지표 × 기간말 × 연결구분)
+        # 기본키 순서대로 조건을 주면 '은행업 평균 부채비율' 같은 질문이 한 행 조회로 끝남
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sector_metrics (
+                지표 TEXT NOT NULL,
+                분류 TEXT NOT NULL,
+                분류값 TEXT NOT NULL,
+                기간말 TEXT NOT NULL,
+                연결구분 TEXT NOT NULL,
+                회사수 INTEGER,
+                평균 REAL,
+                중앙값 REAL,
+                제1사분위 REAL,
+                제3사분위 REAL,
+                최소 REAL,
+                최대 REAL,
+                상위기업 TEXT,
+                하위기업 TEXT,
+                PRIMARY KEY (지표, 분류, 분류값, 기간말, 연결구분)
+            ) WITHOUT ROWID
+        """)
+        # 회사 값과 그 회사 업종(업종명)의 집계를 한 행으로 (업종 내 위치 질문용)
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS company_metrics AS
+            SELECT c.회사명, c.종목코드, c.시장구분, c.업종명, c.업종구분, m.연결구분, m.지표, m.기간말, m.값,
+                   s.회사수 AS 업종회사수, s.평균 AS 업종평균, s.중앙값 AS 업종중앙값,
+                   s.제1사분위 AS 업종제1사분위, s.제3사분위 AS 업종제3사분위
+            FROM metric_facts m
+            JOIN companies c ON c.company_id = m.company_id
+            LEFT JOIN sector_metrics s ON s.지표 = m.지표 AND s.분류 = '업종명' AND s.분류값 = c.업종명
+                 AND s.기간말 = m.기간말 AND s.연결구분 = m.연결구분
+        """)
+        
+        # 지표별 순위 (값이 큰 순서, 분류별), 기본키 순서가 곧 순위라 상위 N개는 앞에서 N행만 읽음
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_ranks (
+                지표 TEXT NOT NULL,
+                분류 TEXT NOT NULL,
+                분류값 TEXT NOT NULL,
+                기간말 TEXT NOT NULL,
+                연결구분 TEXT NOT NULL,
+                순위 INTEGER NOT NULL,
+                company_id INTEGER NOT NULL REFERENCES companies (company_id),
+                값 REAL,
+                회사수 INTEGER,
+                PRIMARY KEY (지표, 분류, 분류값, 기간말, 연결구분, 순위, company_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS metric_rankings AS
+            SELECT r.지표, r.분류, r.분류값, r.기간말, r.연결구분, r.순위, r.회사수,
+                   c.회사명, c.종목코드, r.값
+            FROM metric_ranks r
+            JOIN companies c ON c.company_id = r.company_id
+        """)
+        
+        # 인덱스가 비어 있는데 차원 데이터가 있으면 (인덱스 도입 전 DB) 다시 채움
+        if cursor.execute("SELECT COUNT(*) FROM name_index").fetchone()[0] == 0:
+            self._rebuild_name_index(cursor)
+        
         conn.commit()
         conn.close()
         print(f"데이터베이스가 {self.db_path}에 초기화되었습니다.")
     
-    def clear_table(self, table_name: str):
-        """특정 테이블의 모든 데이터를 삭제합니다."""
+    def _rebuild_name_index(self, cursor: sqlite3.Cursor):
+        """차원 테이블의 회사명/항목명으로 이름 검색 인덱스를 다시 만듭니다."""
+        cursor.execute("DELETE FROM name_index")
+        rows = [("company", name, canonical_name(name))
+                for (name,) in cursor.execute("SELECT DISTINCT 회사명 FROM companies").fetchall()]
+        rows += [("item", name, canonical_name(name))
+                 for (name,) in cursor.execute("SELECT DISTINCT 항목명 FROM items").fetchall()]
+        cursor.executemany("INSERT INTO name_index (kind, original, name) VALUES (?, ?, ?)", rows)
+    
+    def create_indexes(self):
+        """조회에 자주 쓰이는 컬럼(회사명, 항목코드, 항목명, 연결구분)에 인덱스를 만듭니다."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute(f"DELETE FROM {table_name}")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_companies_name ON companies (회사명)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name ON items (항목명)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_statements_basis ON statements (연결구분, 재무제표구분)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_report_periods_order ON report_periods (기간순서)")
+        # 팩트 인덱스도 보고 기간을 맨 앞에 두어 한 기간의 조회가 그 기간의 범위만 읽도록 함
+        for fact_table, _amount_columns in FACT_TABLES.values():
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{fact_table}_company_item
+                ON {fact_table} (period_id, company_id, item_id)
+            """)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{fact_table}_item ON {fact_table} (period_id, item_id)")
+        # 시계열은 (항목, 기간말)이 기본키 앞쪽이므로 회사별 조회용 인덱스만 추가
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_timeseries_company ON timeseries_facts (company_id, item_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_metric_facts_company ON metric_facts (company_id, 지표)")
+        # 특정 회사의 순위 조회 ('삼성전자의 업종 내 매출 순위')
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_metric_ranks_company
+            ON metric_ranks (company_id, 지표, 기간말, 연결구분)
+        """)
+        # 성장률 스크리닝 ('영업이익 30% 이상 증가')을 인덱스 범위 스캔 한 번으로 처리
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_growth_screen
+            ON growth_facts (지표, 비교구분, 기간구분, 기간말, 성장률)
+        """)
         conn.commit()
         conn.close()
-        print(f"{table_name} 테이블의 데이터가 삭제되었습니다.")
+        print("인덱스 생성이 완료되었습니다.")
     
-    def insert_balance_sheet_data(self, data: list):
-        """재무상태표 데이터를 삽입합니다."""
+    def analyze(self):
+        """쿼리 플래너용 통계를 갱신(ANALYZE)합니다."""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.executemany("""
-            INSERT OR REPLACE INTO balance_sheet 
-            (재무제표종류, 종목코드, 회사명, 시장구분, 업종, 업종명, 결산월, 결산기준일, 
-             보고서종류, 통화, 항목코드, 항목명, 당기_반기말, 전기말, 전전기말)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, data)
-        
+        conn.execute("ANALYZE")
         conn.commit()
         conn.close()
-        print(f"{len(data)}개의 재무상태표 데이터가 삽입되었습니다.")
     
-    def insert_income_statement_data(self, data: list):
-        """손익계산서 데이터를 삽입합니다."""
+    def compact(self):
+        """통계를 갱신(ANALYZE)하고 파일을 압축(VACUUM)합니다."""
+        self.analyze()
+        conn = self.get_connection()
+        conn.execute("VACUUM")
+        conn.close()
+    
+    def get_row_counts(self) -> dict:
+        """테이블별 행 수를 반환합니다."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        cursor.executemany("""
-            INSERT OR REPLACE INTO income_statement 
-            (재무제표종류, 종목코드, 회사명, 시장구분, 업종, 업종명, 결산월, 결산기준일, 
-             보고서종류, 통화, 항목코드, 항목명, 당기_반기_3개월, 당기_반기_누적, 
-             전기_반기_3개월, 전기_반기_누적, 전기, 전전기)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, data)
-        
-        conn.commit()
+        counts = {}
+        for view, (fact_table, _amount_columns) in FACT_TABLES.items():
+            cursor.execute(f"SELECT COUNT(*) FROM {fact_table}")
+            counts[view] = cursor.fetchone()[0]
+        for table in ("report_periods", "companies", "statements", "items", "timeseries_facts", "growth_facts",
+                      "metric_facts", "sector_metrics", "metric_ranks"):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
         conn.close()
-        print(f"{len(data)}개의 손익계산서 데이터가 삽입되었습니다.")
+        return counts
     
-    def insert_cash_flow_data(self, data: list):
-        """현금흐름표 데이터를 삽입합니다."""
+    def clear_table(self, table_name: str, period: tuple = None):
+        """특정 재무제표의 데이터를 삭제합니다 (period를 지정하면 그 보고 기간만)."""
+        fact_table = FACT_TABLES[table_name][0]
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        cursor.executemany("""
-            INSERT OR REPLACE INTO cash_flow_statement 
-            (재무제표종류, 종목코드, 회사명, 시장구분, 업종, 업종명, 결산월, 결산기준일, 
-             보고서종류, 통화, 항목코드, 항목명, 당기_반기말, 전기_반기말, 전기, 전전기)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, data)
-        
+        if period is None:
+            cursor.execute(f"DELETE FROM {fact_table}")
+            print(f"{table_name} 테이블의 데이터가 삭제되었습니다.")
+        else:
+            cursor.execute(f"""
+                DELETE FROM {fact_table}
+                WHERE period_id = (SELECT period_id FROM report_periods WHERE 사업연도 = ? AND 보고서종류 = ?)
+            """, period)
+            print(f"{table_name} 테이블의 {report_period_label(period)} 데이터가 삭제되었습니다.")
         conn.commit()
         conn.close()
-        print(f"{len(data)}개의 현금흐름표 데이터가 삽입되었습니다.")
     
-    def insert_equity_data(self, data: list):
-        """자본변동표 데이터를 삽입합니다."""
+    def _period_id(self, cursor: sqlite3.Cursor, period: tuple) -> int:
+        """보고 기간 (사업연도, 보고서종류)의 키를 반환합니다 (없으면 추가)."""
+        year, report_type = period
+        row = cursor.execute(
+            "SELECT period_id FROM report_periods WHERE 사업연도 = ? AND 보고서종류 = ?", (year, report_type)
+        ).fetchone()
+        if row:
+            return row[0]
+        order = year * 10 + (REPORT_TYPES.index(report_type) if report_type in REPORT_TYPES else 0)
+        cursor.execute(
+            "INSERT INTO report_periods (사업연도, 보고서종류, 기간순서) VALUES (?, ?, ?)", (year, report_type, order)
+        )
+        return cursor.lastrowid
+    
+    def get_report_periods(self) -> list:
+        """적재된 보고 기간을 오래된 순서로 (사업연도, 보고서종류) 리스트로 반환합니다."""
+        conn = self.get_connection()
+        rows = conn.execute("SELECT 사업연도, 보고서종류 FROM report_periods ORDER BY 기간순서").fetchall()
+        conn.close()
+        return [tuple(row) for row in rows]
+    
+    def _insert_facts(self, table_name: str, data: list, period: tuple):
+        """파서 행(기존 테이블 컬럼 순서)을 차원 키와 정수 금액으로 바꿔 팩트 테이블에 저장합니다."""
+        fact_table, amount_columns = FACT_TABLES[table_name]
         conn = self.get_connection()
         cursor = conn.cursor()
+        period_id = self._period_id(cursor, period)
         
-        cursor.executemany("""
-            INSERT OR REPLACE INTO statement_of_changes_in_equity 
-            (재무제표종류, 종목코드, 회사명, 시장구분, 업종, 업종명, 결산월, 결산기준일, 
-             보고서종류, 통화, 항목코드, 항목명, 당기, 전기, 전전기)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, data)
+        # 이미 있는 차원 키를 메모리에 올려 행마다 조회하지 않도록 함
+        companies = {(code, name): key for key, code, name in
+                     cursor.execute("SELECT company_id, 종목코드, 회사명 FROM companies")}
+        statements = {tuple(row[1:]): row[0] for row in cursor.execute(
+            "SELECT statement_id, 재무제표종류, 연결구분, 재무제표구분, 결산기준일, 보고서종류, 통화 FROM statements")}
+        items = {(code, name): key for key, code, name in
+                 cursor.execute("SELECT item_id, 항목코드, 항목명 FROM items")}
+        indexed_names = set(cursor.execute("SELECT kind, original FROM name_index").fetchall())
+        
+        facts = []
+        for row in data:
+            company_key = (normalize_stock_code(row[3]), row[4])
+            if company_key not in companies:
+                cursor.execute(
+                    "INSERT INTO companies (종목코드, 회사명, 시장구분, 업종, 업종명, 결산월) VALUES (?, ?, ?, ?, ?, ?)",
+                    company_key + tuple(row[5:9]),
+                )
+                companies[company_key] = cursor.lastrowid
+                self._index_name(cursor, indexed_names, "company", row[4])
+            
+            statement_key = (row[0], row[1], row[2], row[9], row[10], row[11])
+            if statement_key not in statements:
+                cursor.execute(
+                    "INSERT INTO statements (재무제표종류, 연결구분, 재무제표구분, 결산기준일, 보고서종류, 통화) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    statement_key,
+                )
+                statements[statement_key] = cursor.lastrowid
+            
+            item_key = (row[12], row[13])
+            if item_key not in items:
+                cursor.execute("INSERT INTO items (항목코드, 항목명) VALUES (?, ?)", item_key)
+                items[item_key] = cursor.lastrowid
+                self._index_name(cursor, indexed_names, "item", row[13])
+            
+            facts.append(
+                (period_id, statements[statement_key], companies[company_key], items[item_key])
+                + tuple(parse_amount(value) for value in row[14:14 + len(amount_columns)])
+            )
+        
+        column_list = ", ".join(["period_id", "statement_id", "company_id", "item_id"] + amount_columns)
+        marks = ", ".join("?" for _ in range(4 + len(amount_columns)))
+        cursor.executemany(f"INSERT OR REPLACE INTO {fact_table} ({column_list}) VALUES ({marks})", facts)
         
         conn.commit()
         conn.close()
-        print(f"{len(data)}개의 자본변동표 데이터가 삽입되었습니다.")
+    
+    def _index_name(self, cursor: sqlite3.Cursor, indexed_names: set, kind: str, name: str):
+        """새 회사명/항목명을 이름 검색 인덱스에 추가합니다 (같은 이름은 한 번만)."""
+        if (kind, name) in indexed_names:
+            return
+        cursor.execute(
+            "INSERT INTO name_index (kind, original, name) VALUES (?, ?, ?)",
+            (kind, name, canonical_name(name)),
+        )
+        indexed_names.add((kind, name))
+    
+    def insert_balance_sheet_data(self, data: list, period: tuple):
+        """재무상태표 데이터를 보고 기간 (사업연도, 보고서종류)으로 삽입합니다."""
+        self._insert_facts("balance_sheet", data, period)
+        print(f"{len(data)}개의 재무상태표 데이터가 삽입되었습니다 ({report_period_label(period)}).")
+    
+    def insert_income_statement_data(self, data: list, period: tuple):
+        """손익계산서 데이터를 보고 기간 (사업연도, 보고서종류)으로 삽입합니다."""
+        self._insert_facts("income_statement", data, period)
+        print(f"{len(data)}개의 손익계산서 데이터가 삽입되었습니다 ({report_period_label(period)}).")
+    
+    def insert_cash_flow_data(self, data: list, period: tuple):
+        """현금흐름표 데이터를 보고 기간 (사업연도, 보고서종류)으로 삽입합니다."""
+        self._insert_facts("cash_flow_statement", data, period)
+        print(f"{len(data)}개의 현금흐름표 데이터가 삽입되었습니다 ({report_period_label(period)}).")
+    
+    def insert_equity_data(self, data: list, period: tuple):
+        """자본변동표 데이터를 보고 기간 (사업연도, 보고서종류)으로 삽입합니다."""
+        self._insert_facts("statement_of_changes_in_equity", data, period)
+        print(f"{len(data)}개의 자본변동표 데이터가 삽입되었습니다 ({report_period_label(period)}).")
     
     def get_table_info(self, table_name: str) -> list:
         """테이블의 스키마 정보를 반환합니다."""
@@ -195,6 +743,99 @@ class FinancialDatabase:
         conn.close()
         return result
     
+    def describe_tables(self, tables: list, sample_rows: int = 3) -> str:
+        """테이블(뷰)의 CREATE 문과 샘플 행을 Text2SQL 프롬프트용 텍스트로 반환합니다.
+        
+        뷰는 컬럼 타입을 PRAGMA table_info로 읽어 CREATE TABLE 형식으로 보여줍니다.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        sections = []
+        for table in tables:
+            columns = cursor.execute(f"PRAGMA table_info({table})").fetchall()
+            column_defs = ", \n".join(f"\t{name} {col_type or 'TEXT'}" for _cid, name, col_type, *_rest in columns)
+            section = f"CREATE TABLE {table} (\n{column_defs}\n)"
+            if sample_rows:
+                cursor.execute(f"SELECT * FROM {table} LIMIT {int(sample_rows)}")
+                rows = cursor.fetchall()
+                lines = ["\t".join(column[1] for column in columns)]
+                lines.extend("\t".join("None" if value is None else str(value) for value in row) for row in rows)
+                section += f"\n\n/*\n{len(rows)} rows from {table} table:\n" + "\n".join(lines) + "\n*/"
+            sections.append(section)
+        conn.close()
+        return "\n\n\n".join(sections)
+    
+    def adapt_prompt(self, prompt: str) -> str:
+        """Text2SQL 프롬프트를 이 백엔드의 방언에 맞춥니다 (예시 SQL이 SQLite 방언이므로 그대로 반환)."""
+        return prompt
+    
+    def execute_query(self, query: str) -> tuple:
+        """SQL 쿼리를 실행하고 (컬럼명 리스트, 결과 행 리스트)를 반환합니다."""
+        with tracer.span("db.query", operation="text2sql"):
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+        return columns, rows
+    
+    def get_company_metrics(self, companies: list, metric_sources: dict, basis: str = None) -> list:
+        """여러 회사의 여러 지표를 한 번의 쿼리로 조회합니다.
+        
+        Args:
+            companies: 회사명 리스트
+            metric_sources: 지표명 → (테이블, 금액 컬럼, 항목코드 리스트, 항목명 리스트)
+            basis: '연결' 또는 '별도' (지정하면 해당 기준의 행만 조회)
+        
+        Returns:
+            (회사명, 연결구분, 항목코드, 항목명, 금액) 튜플 리스트
+        """
+        if not companies or not metric_sources:
+            return []
+        
+        # 테이블별로 조회할 항목코드/항목명을 모아 UNION ALL 한 번으로 실행
+        by_table = {}
+        for table, column, codes, names in metric_sources.values():
+            entry = by_table.setdefault((table, column), (set(), set()))
+            entry[0].update(codes)
+            entry[1].update(names)
+        
+        company_marks = ", ".join("?" for _ in companies)
+        selects = []
+        params = []
+        for (table, column), (codes, names) in by_table.items():
+            code_marks = ", ".join("?" for _ in codes)
+            name_marks = ", ".join("?" for _ in names)
+            basis_filter = "s.연결구분 = ? AND " if basis else ""
+            # 금융업 포괄손익계산서·사업보고서는 당기 누적 금액이 다른 컬럼에 있으므로 레이아웃별로 컬럼 선택
+            selects.append(f"""
+                SELECT c.회사명, s.연결구분, i.항목코드, i.항목명, {current_amount_sql(table, column)}
+                FROM {FACT_TABLES[table][0]} f
+                JOIN report_periods r ON r.period_id = f.period_id
+                JOIN statements s ON s.statement_id = f.statement_id
+                JOIN companies c ON c.company_id = f.company_id
+                JOIN items i ON i.item_id = f.item_id
+                WHERE f.period_id = {CURRENT_PERIOD_SQL}
+                  AND {basis_filter}c.회사명 IN ({company_marks})
+                  AND (i.항목코드 IN ({code_marks}) OR i.항목명 IN ({name_marks}))
+            """)
+            if basis:
+                params.append(basis)
+            params.extend(companies)
+            params.extend(sorted(codes))
+            params.extend(sorted(names))
+        
+        with tracer.span("db.query", operation="company_metrics"):
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(" UNION ALL ".join(selects), params)
+            rows = cursor.fetchall()
+            conn.close()
+        return rows
+    
     def get_all_companies(self) -> list:
         """모든 회사명 목록을 반환합니다."""
         conn = self.get_connection()
@@ -208,6 +849,335 @@ class FinancialDatabase:
         companies = [row[0] for row in cursor.fetchall()]
         conn.close()
         return companies
+
+    def get_screening_data(self) -> tuple:
+        """스크리닝 엔진이 컬럼 배열로 적재할 회사 차원과 회사별 지표 값을 반환합니다.
+
+        Returns:
+            ([(company_id, 회사명, 종목코드, 시장구분, 업종명, 업종구분)],
+             [(지표, 기간말, 연결구분, company_id, 값)]) 튜플
+        """
+        conn = self.get_connection()
+        try:
+            with tracer.span("db.query", operation="screening_data"):
+                companies = conn.execute("""
+                    SELECT company_id, 회사명, 종목코드, 시장구분, 업종명, 업종구분
+                    FROM companies
+                    ORDER BY company_id
+                """).fetchall()
+                values = conn.execute("""
+                    SELECT 지표, 기간말, 연결구분, company_id, 값
+                    FROM metric_facts
+                    WHERE 값 IS NOT NULL
+                """).fetchall()
+        finally:
+            conn.close()
+        return companies, values
+
+    def update_industry_groups(self, groups: dict):
+        """(종목코드, 회사명) → 업종 그룹 딕셔너리로 회사의 업종구분을 갱신합니다."""
+        conn = self.get_connection()
+        conn.executemany(
+            "UPDATE companies SET 업종구분 = ? WHERE 종목코드 IS ? AND 회사명 = ?",
+            [(group, normalize_stock_code(code), name) for (code, name), group in groups.items()],
+        )
+        conn.commit()
+        conn.close()
+
+    def get_period_ends(self, periods: list) -> list:
+        """보고 기간 (사업연도, 보고서종류)들의 팩트가 가리키는 기간말 목록을 반환합니다 (파생 테이블 갱신 범위)."""
+        conn = self.get_connection()
+        pairs = set()
+        for fact_table, _amount_columns in FACT_TABLES.values():
+            for period in periods:
+                pairs.update(conn.execute(f"""
+                    SELECT DISTINCT s.결산기준일, c.결산월
+                    FROM {fact_table} f
+                    JOIN report_periods r ON r.period_id = f.period_id
+                    JOIN statements s ON s.statement_id = f.statement_id
+                    JOIN companies c ON c.company_id = f.company_id
+                    WHERE r.사업연도 = ? AND r.보고서종류 = ?
+                """, tuple(period)).fetchall())
+        conn.close()
+        return sorted({period_end(settlement_date, month, period)
+                       for settlement_date, month in pairs for period in PERIODS})
+    
+    def _refresh_scope(self, cursor: sqlite3.Cursor, table: str, period_ends: Optional[list],
+                       column: str = "기간말") -> str:
+        """갱신할 기간말의 기존 행을 지우고, INSERT 쿼리에 붙일 기간말 조건(column 기준)을 반환합니다.
+        
+        period_ends가 None이면 테이블 전체를 다시 만듭니다.
+        """
+        if period_ends is None:
+            cursor.execute(f"DELETE FROM {table}")
+            return "1 = 1"
+        cursor.execute("DROP TABLE IF EXISTS temp.refresh_period_ends")
+        cursor.execute("CREATE TEMP TABLE refresh_period_ends (기간말 TEXT PRIMARY KEY)")
+        cursor.executemany("INSERT OR IGNORE INTO refresh_period_ends VALUES (?)", [(end,) for end in period_ends])
+        cursor.execute(f"DELETE FROM {table} WHERE 기간말 IN (SELECT 기간말 FROM refresh_period_ends)")
+        return f"{column} IN (SELECT 기간말 FROM refresh_period_ends)"
+    
+    def _create_metric_items(self, cursor: sqlite3.Cursor, metric_sources: dict):
+        """지표별 항목 임시 테이블(metric_items)을 만듭니다 (항목명까지 맞는 항목이 우선순위 0)."""
+        cursor.execute("DROP TABLE IF EXISTS temp.metric_items")
+        cursor.execute("CREATE TEMP TABLE metric_items (item_id INTEGER, 재무제표 TEXT, 지표 TEXT, 우선순위 INTEGER)")
+        for metric, (table, _column, codes, names) in metric_sources.items():
+            code_marks = ", ".join("?" for _ in codes)
+            name_marks = ", ".join("?" for _ in names) or "NULL"
+            cursor.execute(f"""
+                INSERT INTO metric_items
+                SELECT item_id, ?, ?, 항목명 NOT IN ({name_marks})
+                FROM items WHERE 항목코드 IN ({code_marks})
+            """, [table, metric] + list(names) + list(codes))
+    
+    def build_timeseries(self, metric_sources: dict, period_ends: list = None):
+        """팩트 테이블의 기간 컬럼을 롱 포맷 시계열로 펼치고 주요 지표의 성장률을 미리 계산합니다.
+        
+        적재(parse_all_financial_statements)가 끝난 뒤 호출합니다.
+        같은 기간의 값이 여러 보고서에 있으면 보고 기간이 늦은 보고서(재작성된 비교표시 금액)를,
+        같은 보고서에서는 원화(KRW) 재무제표를 사용합니다.
+        
+        Args:
+            metric_sources: 지표명 → (테이블, 금액 컬럼, 항목코드 리스트, 항목명 리스트) (ratios.METRIC_SOURCES)
+            period_ends: 다시 계산할 기간말 목록 (get_period_ends, 없으면 전체를 다시 만듦)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        scope = self._refresh_scope(cursor, "timeseries_facts", period_ends)
+        
+        # (결산기준일, 결산월, 기간) → 기간말
+        settlement_dates = [row[0] for row in cursor.execute("SELECT DISTINCT 결산기준일 FROM statements")]
+        settlement_months = [row[0] for row in cursor.execute("SELECT DISTINCT 결산월 FROM companies")]
+        cursor.execute("DROP TABLE IF EXISTS temp.period_ends")
+        cursor.execute("CREATE TEMP TABLE period_ends (결산기준일 TEXT, 결산월 TEXT, 기간 TEXT, 기간말 TEXT)")
+        cursor.executemany("INSERT INTO period_ends VALUES (?, ?, ?, ?)", [
+            (settlement_date, month, period, period_end(settlement_date, month, period))
+            for settlement_date in settlement_dates
+            for month in settlement_months
+            for period in PERIODS
+        ])
+        
+        for view, mappings in TIMESERIES_COLUMNS.items():
+            fact_table = FACT_TABLES[view][0]
+            selects = []
+            params = []
+            for column, period, period_kind, layout, report in mappings:
+                layout_filter = "".join(f" AND {condition}" for condition in _layout_conditions(layout, report))
+                selects.append(f"""
+                    SELECT f.item_id, p.기간말, ? AS 기간구분, f.company_id, s.연결구분, f.{column} AS 금액,
+                           r.기간순서, s.통화
+                    FROM {fact_table} f
+                    JOIN report_periods r ON r.period_id = f.period_id
+                    JOIN statements s ON s.statement_id = f.statement_id
+                    JOIN companies c ON c.company_id = f.company_id
+                    JOIN period_ends p ON p.결산기준일 = s.결산기준일 AND p.결산월 IS c.결산월 AND p.기간 = ?
+                    WHERE f.{column} IS NOT NULL{layout_filter}
+                """)
+                params.extend([period_kind, period])
+            # 나중에 넣은 행이 남으므로 보고 기간, 원화 여부 순으로 정렬해 삽입
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO timeseries_facts
+                    (item_id, 기간말, 기간구분, company_id, 연결구분, 재무제표, 금액)
+                SELECT item_id, 기간말, 기간구분, company_id, 연결구분, ?, 금액
+                FROM ({" UNION ALL ".join(selects)})
+                WHERE {scope}
+                ORDER BY 기간순서, 통화 = 'KRW'
+            """, [view] + params)
+        
+        # 비교 기간: 전년동기대비(모든 기간구분), 전기말대비(재무상태표 잔액)
+        cursor.execute("DROP TABLE IF EXISTS temp.comparison_periods")
+        cursor.execute("CREATE TEMP TABLE comparison_periods (기간말 TEXT, 결산월 TEXT, 비교구분 TEXT, 비교기간말 TEXT)")
+        all_period_ends = [row[0] for row in cursor.execute("SELECT DISTINCT 기간말 FROM timeseries_facts")]
+        comparisons = [
+            (end, month, comparison, period_end(end, month, period))
+            for end in all_period_ends
+            for month in settlement_months
+            for comparison, period in (("전년동기대비", "전년동기"), ("전기말대비", "전기말"))
+        ]
+        cursor.executemany("INSERT INTO comparison_periods VALUES (?, ?, ?, ?)", comparisons)
+        
+        # 갱신한 기간말이 당기이거나 비교 기간인 성장률을 다시 계산
+        growth_period_ends = None
+        if period_ends is not None:
+            refreshed = set(period_ends)
+            growth_period_ends = sorted(refreshed | {end for end, _month, _comparison, base in comparisons
+                                                     if base in refreshed})
+        scope = self._refresh_scope(cursor, "growth_facts", growth_period_ends, "a.기간말")
+        self._create_metric_items(cursor, metric_sources)
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO growth_facts
+                (지표, 비교구분, 기간구분, 기간말, company_id, 연결구분, 금액, 비교금액, 성장률)
+            SELECT m.지표, p.비교구분, a.기간구분, a.기간말, a.company_id, a.연결구분, a.금액, b.금액,
+                   ROUND((a.금액 - b.금액) * 100.0 / ABS(b.금액), 2)
+            FROM timeseries_facts a
+            JOIN metric_items m ON m.item_id = a.item_id AND m.재무제표 = a.재무제표
+            JOIN companies c ON c.company_id = a.company_id
+            JOIN comparison_periods p ON p.기간말 = a.기간말 AND p.결산월 IS c.결산월
+                 AND (p.비교구분 = '전년동기대비' OR a.기간구분 = '시점')
+            JOIN timeseries_facts b ON b.item_id = a.item_id AND b.기간말 = p.비교기간말
+                 AND b.기간구분 = a.기간구분 AND b.company_id = a.company_id
+                 AND b.연결구분 = a.연결구분 AND b.재무제표 = a.재무제표
+            WHERE b.금액 != 0 AND {scope}
+            ORDER BY m.우선순위
+        """)
+        
+        timeseries_count = cursor.execute("SELECT COUNT(*) FROM timeseries_facts").fetchone()[0]
+        growth_count = cursor.execute("SELECT COUNT(*) FROM growth_facts").fetchone()[0]
+        conn.commit()
+        conn.close()
+        print(f"시계열 {timeseries_count}행, 성장률 {growth_count}행을 생성했습니다.")
+    
+    def build_sector_cube(self, metric_sources: dict, ratio_definitions: dict, period_ends: list = None):
+        """회사별 지표·비율 값(metric_facts)과 업종/시장별 집계 큐브(sector_metrics)를 만듭니다.
+        
+        build_timeseries 다음에 호출하며, 지표 값은 시계열에서 손익·현금흐름은 누적, 재무상태표는 시점 금액을,
+        비율은 같은 기간말·연결구분의 분자/분모 지표로 계산합니다.
+        
+        Args:
+            metric_sources: 지표명 → (테이블, 금액 컬럼, 항목코드 리스트, 항목명 리스트) (ratios.METRIC_SOURCES)
+            ratio_definitions: 비율명 → (분자 지표, 분모 지표, 배수, 단위) (ratios.RATIO_DEFINITIONS)
+            period_ends: 다시 계산할 기간말 목록 (get_period_ends, 없으면 전체를 다시 만듦)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        scope = self._refresh_scope(cursor, "metric_facts", period_ends, "t.기간말")
+        self._create_metric_items(cursor, metric_sources)
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO metric_facts (지표, 기간말, 연결구분, company_id, 값)
+            SELECT m.지표, t.기간말, t.연결구분, t.company_id, t.금액
+            FROM timeseries_facts t
+            JOIN metric_items m ON m.item_id = t.item_id AND m.재무제표 = t.재무제표
+            WHERE t.기간구분 = CASE WHEN t.재무제표 = 'balance_sheet' THEN '시점' ELSE '누적' END
+              AND t.금액 IS NOT NULL AND {scope}
+            ORDER BY m.우선순위
+        """)
+        ratio_scope = "1 = 1" if period_ends is None else "n.기간말 IN (SELECT 기간말 FROM refresh_period_ends)"
+        for ratio, (numerator, denominator, multiplier, _unit) in ratio_definitions.items():
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO metric_facts (지표, 기간말, 연결구분, company_id, 값)
+                SELECT ?, n.기간말, n.연결구분, n.company_id, ROUND(n.값 * ? / d.값, 2)
+                FROM metric_facts n
+                JOIN metric_facts d ON d.지표 = ? AND d.기간말 = n.기간말
+                     AND d.연결구분 = n.연결구분 AND d.company_id = n.company_id
+                WHERE n.지표 = ? AND d.값 != 0 AND {ratio_scope}
+            """, (ratio, multiplier, denominator, numerator))
+        
+        # 분류(전체/업종구분/시장구분/업종명)별로 회사 값을 모아 통계 계산
+        scope = self._refresh_scope(cursor, "sector_metrics", period_ends, "m.기간말")
+        groups: Dict[tuple, List[tuple]] = {}
+        for metric, end, basis, value, name, group, market, industry in cursor.execute(f"""
+            SELECT m.지표, m.기간말, m.연결구분, m.값, c.회사명, c.업종구분, c.시장구분, c.업종명
+            FROM metric_facts m
+            JOIN companies c ON c.company_id = m.company_id
+            WHERE {scope}
+        """).fetchall():
+            for dimension, member in zip(SECTOR_DIMENSIONS, ("전체", group, market, industry)):
+                if member:
+                    groups.setdefault((metric, end, basis, dimension, member), []).append((value, name))
+        cursor.executemany("""
+            INSERT INTO sector_metrics
+                (지표, 기간말, 연결구분, 분류, 분류값, 회사수, 평균, 중앙값, 제1사분위, 제3사분위,
+                 최소, 최대, 상위기업, 하위기업)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [key + summarize_values(members) for key, members in groups.items()])
+        
+        metric_count = cursor.execute("SELECT COUNT(*) FROM metric_facts").fetchone()[0]
+        sector_count = cursor.execute("SELECT COUNT(*) FROM sector_metrics").fetchone()[0]
+        conn.commit()
+        conn.close()
+        print(f"회사별 지표 {metric_count}행, 업종 집계 {sector_count}행을 생성했습니다.")
+
+    def build_metric_ranks(self, period_ends: list = None):
+        """metric_facts의 회사별 값으로 지표·분류별 순위 테이블(metric_ranks)을 만듭니다.
+        
+        build_sector_cube 다음에 호출하며, 값이 큰 회사가 1위입니다 (같은 값은 같은 순위).
+        
+        Args:
+            period_ends: 다시 계산할 기간말 목록 (get_period_ends, 없으면 전체를 다시 만듦)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        scope = self._refresh_scope(cursor, "metric_ranks", period_ends, "m.기간말")
+        dimension_columns = {"전체": "'전체'", "업종구분": "c.업종구분", "시장구분": "c.시장구분", "업종명": "c.업종명"}
+        for dimension in SECTOR_DIMENSIONS:
+            member = dimension_columns[dimension]
+            cursor.execute(f"""
+                INSERT INTO metric_ranks (지표, 분류, 분류값, 기간말, 연결구분, 순위, company_id, 값, 회사수)
+                SELECT m.지표, ?, {member}, m.기간말, m.연결구분,
+                       RANK() OVER (PARTITION BY m.지표, {member}, m.기간말, m.연결구분 ORDER BY m.값 DESC),
+                       m.company_id, m.값,
+                       COUNT(*) OVER (PARTITION BY m.지표, {member}, m.기간말, m.연결구분)
+                FROM metric_facts m
+                JOIN companies c ON c.company_id = m.company_id
+                WHERE m.값 IS NOT NULL AND {member} IS NOT NULL AND {scope}
+            """, (dimension,))
+        
+        rank_count = cursor.execute("SELECT COUNT(*) FROM metric_ranks").fetchone()[0]
+        conn.commit()
+        conn.close()
+        print(f"지표 순위 {rank_count}행을 생성했습니다.")
+
+    def get_company_groups(self) -> dict:
+        """회사명 → 업종 그룹 딕셔너리를 반환합니다."""
+        conn = self.get_connection()
+        rows = conn.execute("SELECT 회사명, 업종구분 FROM companies ORDER BY company_id").fetchall()
+        conn.close()
+        return {name: group for name, group in rows}
+
+    def get_item_usage(self) -> list:
+        """최신 보고 기간의 재무제표·업종 그룹·항목별로 그 항목을 보고한 회사 수를 반환합니다 (재무용어 사전 구축용).
+
+        Returns:
+            (테이블, 업종 그룹, 항목코드, 항목명, 회사 수) 튜플 리스트
+        """
+        conn = self.get_connection()
+        rows = []
+        for view, (fact_table, _amount_columns) in FACT_TABLES.items():
+            rows.extend(conn.execute(f"""
+                SELECT ?, c.업종구분, i.항목코드, i.항목명, COUNT(DISTINCT f.company_id)
+                FROM {fact_table} f
+                JOIN companies c ON c.company_id = f.company_id
+                JOIN items i ON i.item_id = f.item_id
+                WHERE f.period_id = {CURRENT_PERIOD_SQL}
+                GROUP BY c.업종구분, f.item_id
+            """, (view,)).fetchall())
+        conn.close()
+        return rows
+
+    def search_names(self, term: str, kind: str = None, limit: int = 20) -> list:
+        """회사명/항목명에서 부분 문자열을 검색합니다 (FTS5 trigram 인덱스).
+        
+        Args:
+            term: 검색어 (공백은 무시)
+            kind: 'company' 또는 'item' (없으면 둘 다)
+            limit: 최대 결과 수
+        
+        Returns:
+            (kind, 원래 이름) 튜플 리스트 (검색어로 시작하는 이름 우선, 그다음 짧은 이름 우선)
+        """
+        # LIKE 와일드카드 문자는 제거 (ESCAPE 절을 쓰면 trigram 인덱스를 사용하지 못함)
+        term = canonical_name(term).replace("%", "").replace("_", "")
+        if not term:
+            return []
+        # trigram 인덱스는 3글자 이상에서만 쓰임. 2글자 이하는 LIKE가 아무것도 찾지 못하므로
+        # (SQLite 버전에 따라 빈 결과) instr()로 인덱스 테이블 자체를 훑음
+        if len(term) >= 3:
+            match, pattern = "name LIKE ?", f"%{term}%"
+        else:
+            match, pattern = "instr(name, ?) > 0", term
+        kind_filter = "AND kind = ?" if kind else ""
+        params = [pattern] + ([kind] if kind else []) + [term, limit]
+        with tracer.span("db.query", operation="name_search"):
+            conn = self.get_connection()
+            rows = conn.execute(f"""
+                SELECT kind, original
+                FROM name_index
+                WHERE {match} {kind_filter}
+                ORDER BY instr(name, ?) != 1, length(name), name
+                LIMIT ?
+            """, params).fetchall()
+            conn.close()
+        return rows
     
     def get_all_items(self) -> list:
         """모든 재무항목명 목록을 반환합니다."""
@@ -243,6 +1213,39 @@ class FinancialDatabase:
         conn.close()
         return sorted(list(all_items))
 
+
+def create_database() -> FinancialDatabase:
+    """환경 변수 설정으로 FinancialDatabase를 생성합니다.
+    
+    DATABASE_PATH: 데이터베이스 파일 경로
+    DATABASE_READ_ONLY=true: build_db.py로 만든 아티팩트를 읽기 전용으로 열고 시작 시 파싱을 생략
+    """
+    return FinancialDatabase(
+        os.getenv("DATABASE_PATH", "financial_data.db"),
+        read_only=os.getenv("DATABASE_READ_ONLY", "false").lower() == "true",
+    )
+
+
+def create_sql_backend(database: FinancialDatabase = None):
+    """환경 변수 설정으로 Text2SQL 실행 백엔드를 생성합니다.
+    
+    SQL_BACKEND=duckdb 이면 같은 데이터를 옮긴 DuckDB 파일(<DB 경로>.duckdb)에서 실행하고
+    (duckdb 패키지 필요), 그 외에는 FinancialDatabase(SQLite)를 그대로 사용합니다.
+    """
+    database = database or db
+    backend = os.getenv("SQL_BACKEND", "sqlite").lower()
+    
+    if backend == "duckdb":
+        try:
+            from duckdb_backend import DuckDBBackend
+        except ImportError:
+            print("경고: duckdb가 설치되지 않아 SQLite 백엔드를 사용합니다.")
+        else:
+            return DuckDBBackend(database)
+    
+    return database
+
+
 # 전역 데이터베이스 인스턴스
-db = FinancialDatabase()
+db = create_database()
 
@@ -0,0 +1,174 @@
+import csv
+import os
+import re
+import tempfile
+from typing import List
+
+import duckdb
+
+from database import FINANCIAL_TABLES, SECTOR_TABLES, TIMESERIES_TABLES, FinancialDatabase, duckdb_path
+from tracing import tracer
+
+
+# DuckDB로 옮기는 Text2SQL 대상 (SQLite의 호환 뷰는 조인을 풀어 둔 컬럼 테이블로 저장)
+DUCKDB_RELATIONS = (
+    FINANCIAL_TABLES
+    + [f"{table}_history" for table in FINANCIAL_TABLES]
+    + TIMESERIES_TABLES
+    + SECTOR_TABLES
+    + ["metric_ranks"]
+)
+
+# SQLite 방언 예시를 DuckDB에 맞게 바꿀 때 프롬프트의 질문 앞에 붙이는 안내
+DUCKDB_PROMPT_NOTES = """## CRITICAL: DuckDB Dialect
+- Amount columns are BIGINT and ratio/metric columns are DOUBLE: compare and compute them directly
+- Use CAST(... AS DOUBLE) when dividing, never AS REAL (REAL is a 4-byte float in DuckDB)
+- Every non-aggregated column in SELECT must appear in GROUP BY (or wrap it in ANY_VALUE())
+- Use string_agg(x, ', ') instead of GROUP_CONCAT
+
+"""
+
+
+def adapt_sql(sql: str) -> str:
+    """SQLite 방언의 SQL(또는 예시가 든 프롬프트)을 DuckDB 방언으로 바꿉니다.
+
+    REAL은 DuckDB에서 4바이트 실수이므로 나눗셈 정밀도를 위해 DOUBLE로 바꿉니다.
+    """
+    return re.sub(r"\bAS REAL\b", "AS DOUBLE", sql)
+
+
+def _column_type(declared: str, values: List) -> str:
+    """SQLite 값(없으면 선언 타입)으로 DuckDB 컬럼 타입을 정합니다."""
+    kinds = {type(value) for value in values if value is not None}
+    if str in kinds or bytes in kinds:
+        return "VARCHAR"
+    if float in kinds:
+        return "DOUBLE"
+    if int in kinds:
+        return "BIGINT"
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return "BIGINT"
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return "DOUBLE"
+    return "VARCHAR"
+
+
+def export_to_duckdb(database: FinancialDatabase, path: str) -> dict:
+    """SQLite 데이터베이스의 Text2SQL 대상 뷰/테이블을 DuckDB 파일로 옮깁니다.
+
+    행은 CSV로 내보낸 뒤 read_csv로 한 번에 적재하고 (executemany보다 수백 배 빠름),
+    임시 파일에 만든 뒤 교체하므로 이전 파일을 읽는 연결은 영향을 받지 않습니다.
+
+    Returns:
+        {테이블: 행 수} 딕셔너리
+    """
+    temp_path = path + ".tmp"
+    for stale in (temp_path, temp_path + ".wal"):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    row_counts = {}
+    source = database.get_connection()
+    target = duckdb.connect(temp_path)
+    try:
+        with tracer.span("duckdb.export", level="INFO", relations=len(DUCKDB_RELATIONS)) as span:
+            for relation in DUCKDB_RELATIONS:
+                declared = {row[1]: row[2] for row in source.execute(f"PRAGMA table_info({relation})")}
+                cursor = source.execute(f"SELECT * FROM {relation}")
+                columns = [desc[0] for desc in cursor.description]
+                rows = cursor.fetchall()
+                types = [_column_type(declared.get(column), [row[i] for row in rows])
+                         for i, column in enumerate(columns)]
+
+                with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False,
+                                                 newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    writer.writerows(["\\N" if value is None else value for value in row] for row in rows)
+                    csv_path = f.name
+                try:
+                    spec = ", ".join(f"'{column}': '{column_type}'" for column, column_type in zip(columns, types))
+                    target.execute(
+                        f"CREATE TABLE {relation} AS SELECT * FROM read_csv(?, header = true, nullstr = '\\N', "
+                        f"quote = '\"', escape = '\"', columns = {{{spec}}})",
+                        [csv_path],
+                    )
+                finally:
+                    os.remove(csv_path)
+                row_counts[relation] = len(rows)
+            span.set(rows=sum(row_counts.values()))
+        target.execute("CHECKPOINT")
+    finally:
+        target.close()
+        source.close()
+
+    os.replace(temp_path, path)
+    print(f"DuckDB 파일을 만들었습니다: {path} ({len(row_counts)}개 테이블, {sum(row_counts.values())}행)")
+    return row_counts
+
+
+class DuckDBBackend:
+    """Text2SQL이 생성한 SQL을 임베디드 DuckDB 파일에서 실행하는 백엔드입니다.
+
+    SQLite에 적재된 데이터를 같은 테이블명·컬럼명으로 DuckDB 파일에 옮겨 두고 읽기 전용으로 엽니다.
+    회사 전체를 훑는 다중 셀프 조인·집계·범위 조건 쿼리를 컬럼 단위 벡터화 실행으로 처리합니다.
+    DuckDB 파일은 build_db.py와 데이터 감시기만 만들며, 여기서는 파일을 쓰지 않습니다.
+    """
+
+    # Text2SQL 프롬프트에 알려줄 SQL 방언
+    dialect = "duckdb"
+
+    def __init__(self, database: FinancialDatabase, path: str = None):
+        self.database = database
+        self.path = path or duckdb_path(database.db_path)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"DuckDB 파일이 없습니다: {self.path} (python build_db.py로 먼저 만드세요)")
+        if os.path.getmtime(self.path) < os.path.getmtime(database.db_path):
+            raise RuntimeError(f"DuckDB 파일이 {database.db_path}보다 오래되었습니다: {self.path} (python build_db.py로 다시 만드세요)")
+        self._connection = duckdb.connect(self.path, read_only=True)
+        print(f"DuckDB 백엔드를 사용합니다: {self.path}")
+
+    def adapt_prompt(self, prompt: str) -> str:
+        """SQLite 방언의 예시 SQL을 DuckDB 방언으로 바꾸고 질문 앞에 방언 안내를 넣습니다."""
+        prompt = adapt_sql(prompt)
+        head, question, tail = prompt.rpartition("Question: {input}")
+        if not question:
+            return prompt + "\n" + DUCKDB_PROMPT_NOTES
+        return head + DUCKDB_PROMPT_NOTES + question + tail
+
+    def describe_tables(self, tables: list, sample_rows: int = 3) -> str:
+        """테이블의 CREATE 문과 샘플 행을 Text2SQL 프롬프트용 텍스트로 반환합니다."""
+        cursor = self._connection.cursor()
+        sections = []
+        try:
+            for table in tables:
+                columns = cursor.execute(f"DESCRIBE {table}").fetchall()
+                column_defs = ", \n".join(f"\t{name} {column_type}" for name, column_type, *_rest in columns)
+                section = f"CREATE TABLE {table} (\n{column_defs}\n)"
+                if sample_rows:
+                    rows = cursor.execute(f"SELECT * FROM {table} LIMIT {int(sample_rows)}").fetchall()
+                    lines = ["\t".join(column[0] for column in columns)]
+                    lines.extend("\t".join("None" if value is None else str(value) for value in row) for row in rows)
+                    section += f"\n\n/*\n{len(rows)} rows from {table} table:\n" + "\n".join(lines) + "\n*/"
+                sections.append(section)
+        finally:
+            cursor.close()
+        return "\n\n\n".join(sections)
+
+    def execute_query(self, query: str) -> tuple:
+        """SQL 쿼리를 실행하고 (컬럼명 리스트, 결과 행 리스트)를 반환합니다."""
+        with tracer.span("db.query", operation="text2sql", backend=self.dialect):
+            # 스레드마다 같은 데이터베이스에 대한 별도 커서(연결) 사용
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute(query)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        return columns, rows
+
+    def close(self):
+        """DuckDB 연결을 닫습니다."""
+        self._connection.close()
@@ -0,0 +1,113 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+
+# 약칭/영문명 → DB의 대표 회사명 (대상 회사가 DB에 있을 때만 사용)
+COMPANY_ALIASES = {
+    "kt": "케이티",
+    "skt": "SK텔레콤",
+    "sk텔레콤": "SK텔레콤",
+    "에스케이텔레콤": "SK텔레콤",
+    "lgu+": "LG유플러스",
+    "lg유플러스": "LG유플러스",
+    "엘지유플러스": "LG유플러스",
+    "하이닉스": "SK하이닉스",
+    "sk하이닉스": "SK하이닉스",
+    "lg전자": "LG전자",
+    "엘지전자": "LG전자",
+}
+
+# 헤더 행 등 회사명이 아닌 값
+_NON_COMPANY_NAMES = {"회사명"}
+
+_ASCII_WORD = re.compile(r"[0-9A-Za-z]")
+_HANGUL = re.compile(r"[가-힣]")
+_HANGUL_RUN = re.compile(r"[가-힣]*")
+
+# 이 길이 이하의 한글 회사명(경방, 기아, 농심 등)은 일반 단어 안에서도 자주 나오므로
+# 앞은 단어 경계, 뒤는 단어 경계나 조사일 때만 매칭
+SHORT_NAME_LENGTH = 2
+
+# 짧은 회사명 뒤에 붙을 수 있는 조사
+_PARTICLES = {
+    "은", "는", "이", "가", "을", "를", "의", "와", "과", "도", "만", "에", "로", "으로", "랑", "이랑",
+    "하고", "보다", "처럼", "까지", "부터", "에서", "에는", "에서는", "와는", "과는", "와의", "과의",
+    "보다는", "만큼", "이나", "나", "이다", "입니다",
+}
+
+
+class CompanyVocabulary:
+    """DB의 회사명 목록으로 질문에서 회사명을 추출합니다 (LLM 호출 없음).
+
+    각 위치에서 가장 긴 회사명을 우선 매칭하므로 'SK'와 'SK하이닉스'처럼
+    접두어 관계인 회사명도 구분됩니다.
+    """
+
+    def __init__(self, companies: Iterable[str], aliases: Dict[str, str] = None):
+        self.companies = sorted({c for c in companies if c and c not in _NON_COMPANY_NAMES})
+        company_set = set(self.companies)
+
+        # 소문자 표기 → 대표 회사명
+        surface_forms = {name.lower(): name for name in self.companies}
+        for alias, target in (aliases if aliases is not None else COMPANY_ALIASES).items():
+            if target in company_set:
+                surface_forms.setdefault(alias.lower(), target)
+
+        # 첫 글자 → [(표기, 대표 회사명)] (긴 표기 우선)
+        self._index: Dict[str, List[Tuple[str, str]]] = {}
+        for surface, name in surface_forms.items():
+            if len(surface) < 2:
+                continue
+            self._index.setdefault(surface[0], []).append((surface, name))
+        for candidates in self._index.values():
+            candidates.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.companies
+
+    def extract(self, text: str) -> List[str]:
+        """텍스트에 언급된 회사명을 등장 순서대로 (중복 없이) 반환합니다."""
+        if not text:
+            return []
+        lowered = text.lower()
+        found = []
+        pos = 0
+        while pos < len(lowered):
+            match = self._match_at(lowered, pos)
+            if match is None:
+                pos += 1
+                continue
+            surface, name = match
+            if name not in found:
+                found.append(name)
+            pos += len(surface)
+        return found
+
+    def _match_at(self, lowered: str, pos: int):
+        """pos 위치에서 시작하는 가장 긴 회사명을 찾습니다."""
+        for surface, name in self._index.get(lowered[pos], ()):
+            if not lowered.startswith(surface, pos):
+                continue
+            # 영문/숫자로 끝나는 이름은 단어 중간에서 끊기지 않도록 경계를 확인
+            end = pos + len(surface)
+            if _ASCII_WORD.match(surface[-1]) and end < len(lowered) and _ASCII_WORD.match(lowered[end]):
+                continue
+            if _ASCII_WORD.match(surface[0]) and pos > 0 and _ASCII_WORD.match(lowered[pos - 1]):
+                continue
+            if len(surface) <= SHORT_NAME_LENGTH and not self._short_name_boundary(lowered, pos, end):
+                continue
+            return surface, name
+        return None
+
+    @staticmethod
+    def _short_name_boundary(lowered: str, pos: int, end: int) -> bool:
+        """짧은 한글 회사명이 다른 단어의 일부가 아닌지 확인합니다 ('기아의'는 허용, '남성복'은 거부)."""
+        if _HANGUL.match(lowered[pos]) and pos > 0 and _HANGUL.match(lowered[pos - 1]):
+            return False
+        if _HANGUL.match(lowered[end - 1]):
+            suffix = _HANGUL_RUN.match(lowered, end).group()
+            return not suffix or suffix in _PARTICLES
+        return True
@@ -0,0 +1,186 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from database import DEFAULT_INDUSTRY_GROUP, INDUSTRY_GROUPS
+from ratios import RATIO_DEFINITIONS
+
+
+# 업종 그룹별로 프롬프트에 보여줄 항목명 예시 수 (보고 회사 수가 많은 순)
+MAX_NAMES_PER_GROUP = 5
+
+DEFAULT_TERMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "financial_terms.json")
+
+_WORD_CHAR = re.compile(r"[0-9a-z가-힣]")
+
+
+def _surface(text: str) -> str:
+    """매칭용 표기 (소문자, 공백 제거)"""
+    return re.sub(r"\s+", "", text).lower()
+
+
+class FinancialTermDictionary:
+    """사용자 재무용어 → 업종 그룹별 항목코드/항목명 사전입니다.
+
+    용어별 후보 항목코드는 financial_terms.json에서 읽고, 각 업종 그룹(DART 파일 구분:
+    은행/증권/보험/금융기타/일반)에서 실제로 보고된 항목코드와 항목명은 DB의 항목 사용 현황으로
+    채웁니다. 질문의 용어를 SQL 생성 전에 항목코드로 바꿔 두므로 LLM이 매번 프롬프트의 매핑
+    규칙을 다시 해석할 필요가 없습니다.
+    """
+
+    def __init__(self, terms: List[Dict], item_usage: Iterable[Tuple] = (),
+                 company_groups: Dict[str, str] = None):
+        self.company_groups = dict(company_groups or {})
+
+        # (테이블, 업종 그룹, 항목코드) → {항목명: 회사 수}
+        usage: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        for table, group, code, name, count in item_usage:
+            usage.setdefault((table, group, code), {})[name] = count
+
+        # 대표 용어 → {"table", "groups": {그룹: {"codes", "names", "note"}}}
+        self.entries: Dict[str, Dict] = {}
+        surface_forms: Dict[str, str] = {}
+        for entry in terms:
+            term, table = entry["term"], entry["table"]
+            groups = {}
+            for group in INDUSTRY_GROUPS:
+                candidates = entry["codes"].get(group, entry["codes"].get("*", []))
+                # DB에 실제로 있는 항목코드만 사용 (데이터가 없으면 해당 그룹은 미해결)
+                codes = [code for code in candidates if (table, group, code) in usage]
+                if not codes:
+                    continue
+                name_counts: Dict[str, int] = {}
+                for code in codes:
+                    for name, count in usage[(table, group, code)].items():
+                        name_counts[name] = name_counts.get(name, 0) + count
+                names = sorted(name_counts, key=lambda name: (-name_counts[name], name))
+                groups[group] = {
+                    "codes": codes,
+                    "names": names[:MAX_NAMES_PER_GROUP],
+                    "note": entry.get("notes", {}).get(group),
+                }
+            self.entries[term] = {"table": table, "groups": groups}
+            for alias in [term] + entry.get("aliases", []):
+                surface_forms.setdefault(_surface(alias), term)
+
+        # 비율명 → 구성 지표 (영업이익률 → 영업이익, 매출액)
+        self.ratio_terms = {
+            _surface(ratio): [metric for metric in (numerator, denominator) if metric in self.entries]
+            for ratio, (numerator, denominator, _multiplier, _unit) in RATIO_DEFINITIONS.items()
+        }
+        for ratio in self.ratio_terms:
+            surface_forms.pop(ratio, None)
+
+        # 긴 표기 우선으로 매칭 ('매출원가'가 '매출'보다 먼저)
+        self._surfaces = sorted(
+            [(surface, [term]) for surface, term in surface_forms.items()]
+            + [(surface, metrics) for surface, metrics in self.ratio_terms.items() if metrics],
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def group_of(self, company: str) -> str:
+        """회사의 업종 그룹을 반환합니다."""
+        return self.company_groups.get(company, DEFAULT_INDUSTRY_GROUP)
+
+    def extract_terms(self, text: str, companies: Iterable[str] = ()) -> List[str]:
+        """텍스트에 언급된 재무용어를 대표 용어로 바꿔 등장 순서대로 (중복 없이) 반환합니다.
+
+        같은 위치에서는 가장 긴 표기를 사용하고, '자산'처럼 2글자 표기는 단어 첫머리에서만
+        인정합니다 ('금융자산'의 '자산'을 자산총계로 보지 않음).
+        """
+        lowered = text.lower()
+        for company in companies:
+            lowered = lowered.replace(company.lower(), " ")
+
+        found: List[str] = []
+        pos = 0
+        while pos < len(lowered):
+            if not _WORD_CHAR.match(lowered[pos]):
+                pos += 1
+                continue
+            word_start = pos == 0 or not _WORD_CHAR.match(lowered[pos - 1])
+            for surface, terms in self._surfaces:
+                if len(surface) <= 2 and not word_start:
+                    continue
+                if lowered.startswith(surface, pos):
+                    found.extend(term for term in terms if term not in found)
+                    pos += len(surface)
+                    break
+            else:
+                pos += 1
+        return found
+
+    def resolve(self, question: str, companies: Iterable[str] = ()) -> List[Dict]:
+        """질문의 재무용어를 업종 그룹별 항목코드/항목명으로 해석합니다.
+
+        Args:
+            question: 사용자 질문
+            companies: 질문에 언급된 회사명 (없으면 데이터가 있는 모든 업종 그룹)
+
+        Returns:
+            [{"term", "table", "groups": {그룹: {"codes", "names", "note", "companies"}}}] 리스트
+        """
+        companies = list(companies)
+        company_groups: Dict[str, List[str]] = {}
+        for company in companies:
+            company_groups.setdefault(self.group_of(company), []).append(company)
+
+        resolved = []
+        for term in self.extract_terms(question, companies):
+            entry = self.entries[term]
+            groups = {}
+            for group, info in entry["groups"].items():
+                if company_groups and group not in company_groups:
+                    continue
+                groups[group] = dict(info, companies=company_groups.get(group, []))
+            if groups:
+                resolved.append({"term": term, "table": entry["table"], "groups": groups})
+        return resolved
+
+    @staticmethod
+    def describe(resolved: List[Dict]) -> str:
+        """해석 결과를 Text2SQL 프롬프트용 텍스트로 만듭니다 (항목코드가 같은 그룹은 한 줄로 합침)."""
+        lines = []
+        for item in resolved:
+            lines.append(f"- {item['term']} [{item['table']}]")
+            merged: Dict[Tuple[str, ...], List[str]] = {}
+            for group, info in item["groups"].items():
+                merged.setdefault(tuple(info["codes"]), []).append(group)
+            for codes, groups in merged.items():
+                infos = [item["groups"][group] for group in groups]
+                labels = []
+                for group, info in zip(groups, infos):
+                    labels.append(f"{group}({', '.join(info['companies'])})" if info["companies"] else group)
+                names = list(dict.fromkeys(name for info in infos for name in info["names"]))
+                code_list = ", ".join(f"'{code}'" for code in codes)
+                line = f"  - {', '.join(labels)}: 항목코드 IN ({code_list}) — 항목명 예: {', '.join(names)}"
+                notes = [info["note"] for info in infos if info["note"]]
+                if notes:
+                    line += f" — {'; '.join(dict.fromkeys(notes))}"
+                lines.append(line)
+        return "\n".join(lines)
+
+
+def load_financial_terms(database, path: str = None) -> FinancialTermDictionary:
+    """재무용어 정의 파일과 DB의 항목 사용 현황으로 FinancialTermDictionary를 만듭니다.
+
+    FINANCIAL_TERMS_PATH: 재무용어 정의 파일 (기본값: 이 모듈 옆의 financial_terms.json)
+    """
+    path = path or os.getenv("FINANCIAL_TERMS_PATH") or DEFAULT_TERMS_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            definition = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"재무용어 사전을 읽지 못했습니다 ({path}): {e}")
+        return FinancialTermDictionary([])
+
+    return FinancialTermDictionary(
+        definition.get("terms", []),
+        item_usage=database.get_item_usage(),
+        company_groups=database.get_company_groups(),
+    )
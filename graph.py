@@ -1,26 +1,58 @@
 
 
 import os
-from typing import TypedDict, List
+from typing import TypedDict, List, Annotated
 from dotenv import load_dotenv
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, RemoveMessage
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.message import add_messages
 from tools import get_tools_instance
+from database import detect_basis
+from checkpointer import create_checkpointer
+from result_store import result_store
+from conversation_memory import create_conversation_memory
+from ratios import ratio_engine, METRIC_ALIASES, RATIO_DEFINITIONS
+from rerank import create_passage_reranker
+from tracing import tracer, traced
+from metrics import metrics_callback, registry, ACTIVE_SESSIONS, CHECKPOINT_BYTES, RESULT_STORE_BYTES
 
 # 환경 변수 로드
 load_dotenv()
 
 
+def merge_result_refs(left: List[str], right: List[str]) -> List[str]:
+    """intermediate_results 리듀서: 새 참조를 이어 붙이고, None이 들어오면 초기화합니다."""
+    if right is None:
+        return []
+    return (left or []) + list(right)
+
+
+def merge_covered_companies(left: List[str], right: List[str]) -> List[str]:
+    """covered_companies 리듀서: 중복 없이 합치고, None이 들어오면 초기화합니다."""
+    if right is None:
+        return []
+    merged = list(left or [])
+    merged.extend(c for c in right if c not in merged)
+    return merged
+
+
 class FinancialAnalysisState(TypedDict):
-    """재무제표 분석 시스템의 상태를 정의합니다."""
-    messages: List[BaseMessage]
+    """재무제표 분석 시스템의 상태를 정의합니다.
+    
+    노드는 변경된 필드만 반환하고, messages와 intermediate_results는 리듀서로 누적됩니다.
+    intermediate_results에는 도구 결과 원문 대신 ResultStore 참조 ID가 저장됩니다.
+    """
+    messages: Annotated[List[BaseMessage], add_messages]
     route_decision: str
     current_query: str
-    intermediate_results: List[str]
+    intermediate_results: Annotated[List[str], merge_result_refs]
     final_answer: str
     iteration_count: int
+    conversation_summary: str
+    conversation_context: str
+    mentioned_companies: List[str]
+    covered_companies: Annotated[List[str], merge_covered_companies]
 
 
 class FinancialAnalysisGraph:
@@ -34,17 +66,41 @@ class FinancialAnalysisGraph:
         self.llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
-            api_key=self.openai_api_key
+            api_key=self.openai_api_key,
+            callbacks=[metrics_callback]
         )
         
-        # 도구 인스턴스
-        self.tools_instance = get_tools_instance()
+        # 도구 인스턴스 (생성 시 미리 로드, 이후 tools_instance 속성으로 최신 인스턴스 참조)
+        get_tools_instance()
+        
+        # 도구 결과 사이드 저장소 (상태에는 참조 ID만 저장)
+        self.result_store = result_store
+        
+        # 대화 메모리 (누적 요약 + 최근 N턴, 토큰 예산 관리)
+        self.conversation_memory = create_conversation_memory(self.llm)
         
-        # 메모리 설정
-        self.memory = MemorySaver()
+        # 웹 검색 결과 문장 재순위화 (BM25, 토큰 예산)
+        self.reranker = create_passage_reranker()
+        
+        # 메모리 설정 (세션 수/유휴 시간/크기 상한이 있는 체크포인터)
+        self.memory = create_checkpointer()
         
         # 그래프 빌드
         self.graph = self._build_graph()
+        
+        # /metrics 조회 시 세션 수와 메모리 사용량 게이지 갱신
+        registry.register_collector(self._collect_metrics)
+    
+    @property
+    def tools_instance(self):
+        """현재 도구 인스턴스를 반환합니다 (데이터 재적재로 교체될 수 있음)."""
+        return get_tools_instance()
+    
+    def _collect_metrics(self):
+        """체크포인터와 결과 저장소의 현재 크기를 메트릭 게이지에 반영합니다."""
+        ACTIVE_SESSIONS.set(getattr(self.memory, "active_threads", 0))
+        CHECKPOINT_BYTES.set(getattr(self.memory, "total_bytes", 0))
+        RESULT_STORE_BYTES.set(self.result_store.total_bytes)
     
     def _build_graph(self) -> StateGraph:
         """Adaptive RAG 워크플로우를 구성합니다."""
@@ -93,17 +149,17 @@ class FinancialAnalysisGraph:
         # 메모리와 함께 컴파일
         return workflow.compile(checkpointer=self.memory)
     
+    @traced("node.analyze_query")
     def analyze_query_node(self, state: FinancialAnalysisState) -> FinancialAnalysisState:
         """사용자 질문을 분석하여 라우팅 결정을 내립니다."""
         
         user_message = state["messages"][-1].content
         
-        # 대화 컨텍스트 구성 (최근 3개 메시지)
-        recent_messages = state["messages"][-3:] if len(state["messages"]) > 1 else state["messages"]
-        conversation_context = "\n".join([
-            f"{'User' if isinstance(msg, HumanMessage) else 'Bot'}: {msg.content[:100]}..."
-            for msg in recent_messages[:-1]  # 마지막 메시지 제외
-        ]) if len(recent_messages) > 1 else ""
+        # 대화 컨텍스트 구성 (누적 요약 + 최근 턴, 이번 턴의 모든 노드가 재사용)
+        summary, recent_messages, folded_messages = self.conversation_memory.compact(
+            state["messages"][:-1], state.get("conversation_summary", "")
+        )
+        conversation_context = self.conversation_memory.build_context(summary, recent_messages)
         
         # 대화 기록 포맷팅 (f-string 밖에서 처리)
         context_section = f"최근 대화 기록:\n{conversation_context}\n\n" if conversation_context else ""
@@ -154,27 +210,27 @@ class FinancialAnalysisGraph:
 """
         
         response = self.llm.invoke(analysis_prompt)
+        tracer.record_llm_usage(response)
         route_decision = response.content.strip().lower()
         
-        print(f"\n[DEBUG] analyze_query_node:")
-        print(f"  - 질문: {user_message[:50]}...")
-        print(f"  - 원본 LLM 응답: {response.content.strip()}")
-        print(f"  - 추출된 route_decision: {route_decision}")
-        
         # 유효하지 않은 결정이면 기본값으로 single_shot_rag 사용
         if route_decision not in ["no_retrieval", "single_shot_rag", "iterative_rag"]:
-            print(f"  - 유효하지 않은 결정, single_shot_rag로 기본 설정")
+            tracer.event("route.invalid", level="WARNING", raw_decision=response.content.strip()[:100])
             route_decision = "single_shot_rag"
         
-        print(f"  → 최종 라우팅: {route_decision}")
+        tracer.annotate(route=route_decision, folded_messages=len(folded_messages))
         
         return {
-            **state,
             "route_decision": route_decision,
             "current_query": user_message,
-            "iteration_count": 0
+            "iteration_count": 0,
+            "conversation_summary": summary,
+            "conversation_context": conversation_context,
+            # 요약에 합쳐진 오래된 메시지는 상태에서 제거
+            "messages": [RemoveMessage(id=msg.id) for msg in folded_messages]
         }
     
+    @traced("node.no_retrieval")
     def no_retrieval_node(self, state: FinancialAnalysisState) -> FinancialAnalysisState:
         """LLM의 자체 지식으로 직접 답변합니다."""
         
@@ -193,28 +249,21 @@ class FinancialAnalysisGraph:
 """
         
         response = self.llm.invoke(prompt)
+        tracer.record_llm_usage(response)
         
         return {
-            **state,
             "final_answer": response.content,
-            "intermediate_results": [response.content]
+            "intermediate_results": [self.result_store.put(response.content)]
         }
     
+    @traced("node.single_shot_rag")
     def single_shot_rag_node(self, state: FinancialAnalysisState) -> FinancialAnalysisState:
         """한 번의 도구 호출로 답변을 생성합니다."""
         
         user_message = state["current_query"]
         
         # 대화 컨텍스트 구성
-        if len(state["messages"]) > 1:
-            recent_messages = state["messages"][-3:]
-            conversation_context = "\n".join([
-                f"{'User' if isinstance(msg, HumanMessage) else 'Bot'}: {msg.content[:150]}"
-                for msg in recent_messages[:-1]
-            ])
-            full_query = f"대화 기록:\n{conversation_context}\n\n현재 질문: {user_message}"
-        else:
-            full_query = user_message
+        full_query = self._with_conversation_context(state, user_message)
         
         # 재무 질문인지 판단 (full_query 사용)
         is_financial = self._is_financial_query(full_query)
@@ -227,85 +276,62 @@ class FinancialAnalysisGraph:
             tool_result = self.tools_instance.search_web(full_query)
         
         return {
-            **state,
             "final_answer": tool_result,
-            "intermediate_results": [tool_result]
+            "intermediate_results": [self.result_store.put(tool_result)]
         }
     
+    @traced("node.iterative_rag")
     def iterative_rag_node(self, state: FinancialAnalysisState) -> FinancialAnalysisState:
         """여러 도구를 반복적으로 사용하여 복잡한 질문에 답변합니다."""
         
         user_message = state["current_query"]
         
         # 대화 컨텍스트 구성 (짧은 질문 보완용)
-        if len(state["messages"]) > 1:
-            recent_messages = state["messages"][-3:]
-            conversation_context = "\n".join([
-                f"{'User' if isinstance(msg, HumanMessage) else 'Bot'}: {msg.content[:150]}"
-                for msg in recent_messages[:-1]
-            ])
-            full_context = f"대화 기록:\n{conversation_context}\n\n현재 질문: {user_message}"
-        else:
-            full_context = user_message
+        full_context = self._with_conversation_context(state, user_message)
         
         max_iterations = 5  # 3→5로 증가 (더 많은 회사 비교 가능)
         current_iteration = state.get("iteration_count", 0)
         
-        intermediate_results = state.get("intermediate_results", [])
+        result_refs = state.get("intermediate_results") or []
+        intermediate_results = self.result_store.resolve(result_refs)
         
-        print(f"\n[DEBUG] iterative_rag_node 실행:")
-        print(f"  - current_iteration: {current_iteration}/{max_iterations}")
-        print(f"  - intermediate_results 개수: {len(intermediate_results)}")
+        tracer.annotate(iteration=current_iteration + 1, results=len(intermediate_results))
         
         if current_iteration >= max_iterations:
             # 최대 반복 횟수에 도달하면 최종 답변 생성 (final_answer 설정)
-            print(f"  → 최대 반복 횟수 도달, 최종 답변 생성")
-            final_state = self._generate_final_answer_from_results(state)
-            return final_state
+            tracer.annotate(action="final_answer", reason="max_iterations")
+            return self._generate_final_answer_from_results(state)
         
-        # 질문에서 회사명 추출 (LLM 기반으로 자동 추출)
-        # 하드코딩 로직 제거 - LLM이 질문에서 자동으로 회사명을 파악하도록 함
-        company_extraction_prompt = f"""
-다음 질문에서 언급된 모든 회사명을 추출해주세요:
-
-질문: {full_context}
-
-**Instructions:**
-1. 질문에 명시적으로 언급된 모든 회사명을 추출하세요
-2. 회사명만 추출하고, 다른 설명은 추가하지 마세요
-3. 각 회사명을 쉼표로 구분하여 나열하세요
-4. 회사명이 없으면 "없음"이라고 답하세요
-
-**Examples:**
-- "삼성전자와 SK하이닉스의 매출액" → "삼성전자, SK하이닉스"
-- "HD한국조선해양, 삼성중공업, 한화오션의 재무 실적" → "HD한국조선해양, 삼성중공업, 한화오션"
-- "매출액이 1조 이상인 기업" → "없음"
-
-답변 (회사명만):
-"""
+        # 질문에서 회사명 추출 (DB 회사명 사전 기반, 턴마다 한 번만 수행)
+        company_vocabulary = self.tools_instance.company_vocabulary
+        company_update = {}
+        mentioned_companies = state.get("mentioned_companies") or []
+        if current_iteration == 0 and not mentioned_companies:
+            mentioned_companies = company_vocabulary.extract(full_context)
+            company_update["mentioned_companies"] = mentioned_companies
         
-        company_response = self.llm.invoke(company_extraction_prompt).content.strip()
-        
-        if company_response == "없음" or not company_response:
-            mentioned_companies = []
-        else:
-            mentioned_companies = [c.strip() for c in company_response.split(",")]
-        
-        # 이미 조회한 회사 추출 (텍스트 매칭)
-        queried_companies = []
-        for company in mentioned_companies:
-            for result in intermediate_results:
-                if company in result:
-                    queried_companies.append(company)
-                    break
-        queried_companies = list(set(queried_companies))  # 중복 제거
+        # 이미 조회한 회사 (도구 호출이 끝날 때마다 갱신되는 커버리지 집합)
+        covered = set(state.get("covered_companies") or [])
+        queried_companies = [c for c in mentioned_companies if c in covered]
         
         # 아직 조회하지 않은 회사
-        remaining_companies = [c for c in mentioned_companies if c not in queried_companies]
-        
-        print(f"  - 질문에서 언급된 회사: {mentioned_companies}")
-        print(f"  - 이미 조회한 회사: {queried_companies}")
-        print(f"  - 아직 조회하지 않은 회사: {remaining_companies}")
+        remaining_companies = [c for c in mentioned_companies if c not in covered]
+        
+        tracer.event("iteration.coverage", mentioned=mentioned_companies,
+                     queried=queried_companies, remaining=remaining_companies)
+        
+        # 여러 회사 비교: 남은 회사를 한 번의 SQL로 일괄 조회 (LLM 판단 생략)
+        if len(mentioned_companies) >= 2 and remaining_companies:
+            metrics = ratio_engine.extract_metrics(user_message)
+            tracer.annotate(action="compare_companies", companies=len(remaining_companies))
+            tool_result = self.tools_instance.compare_companies(
+                remaining_companies, metrics, basis=detect_basis(user_message)
+            )
+            update = self._record_iteration_result(state, tool_result, max_iterations)
+            # 실패해도 시도한 회사로 표시하여 같은 일괄 조회를 반복하지 않고
+            # 다음 반복에서 LLM이 회사별 financial_query 등으로 이어가도록 함
+            update["covered_companies"] = remaining_companies
+            return {**company_update, **update}
         
         # 현재 상황 분석 및 다음 도구 선택
         analysis_prompt = f"""
@@ -325,18 +351,21 @@ class FinancialAnalysisGraph:
 **CRITICAL RULES:**
 1. **"아직 조회하지 않은 회사"가 있으면 반드시 그 회사를 먼저 조회하세요!**
    - 위에 🔴로 표시된 회사가 있으면 **반드시 그 회사를 조회**해야 합니다
-   - 이미 조회한 회사를 다시 조회하면 안 됩니다!
+   - 이미 조회한 회사를 다시 조회하면 안 됩니다! (비교표에서 데이터를 찾지 못했거나 조회 오류가 난 회사만 예외)
    - **중요: 위에 표시된 회사명을 정확히 그대로 사용하세요!**
      (시스템이 질문에서 자동으로 추출한 정확한 회사명입니다)
    - 예: 아직 조회하지 않은 회사: HD한국조선해양
      → 반드시: "선택: financial_query | 쿼리: HD한국조선해양 매출액, 영업이익, 순이익"
    
 2. 재무 데이터(매출액, 영업이익, 순이익, 자산 등) 관련 질문은 **반드시 먼저 financial_query로 DB 조회**
+   - 쿼리에는 사용자 용어(매출액, 순이익 등)를 그대로 쓰세요. 업종·보고서별 실제 항목은 재무용어 사전이 찾아 줍니다
 
 3. **"비교 분석" 질문의 경우 - 매우 중요!:**
-   - 질문에 언급된 **모든 회사**의 데이터를 조회해야 함
-   - **아직 조회하지 않은 회사를 우선 조회할 것!**
-   - 모든 회사 데이터가 수집되면 final_answer
+   - 2개 이상 회사가 언급되면 시스템이 compare_companies로 **모든 회사를 SQL 한 번에 일괄 조회**해
+     "[회사별 비교표]"(회사 × 지표, 비율 자동 계산)를 현재까지의 결과에 이미 넣어 둠
+   - 비교표를 다시 조회하지 말고, "DB에서 데이터를 찾을 수 없는 회사"나 조회 오류가 난 회사만
+     financial_query로 한 회사씩 보완 조회
+   - 비교표에 없는 지표가 필요할 때만 추가 조회하고, 데이터가 모이면 final_answer
 
 4. **"원인", "이유", "배경" 질문의 경우:**
    - 먼저 관련 재무 데이터 조회 (financial_query)
@@ -358,26 +387,15 @@ class FinancialAnalysisGraph:
    - "삼성전자 최근 뉴스 찾아줘"
      → Step 1: "선택: web_search | 쿼리: 삼성전자 최근 뉴스" ✅
 
-6. **산업별 항목명 차이 - 매우 중요!:**
-   - **제조업 (삼성전자, SK하이닉스 등)**: "매출액" 사용
-   - **금융/통신업 (SK텔레콤, 케이티, LG유플러스 등)**: "영업수익" 사용 (매출액 대신!)
-   - **순이익 - 회사별로 다름! CRITICAL!**:
-     - **케이티, LG유플러스, 삼성전자, SK하이닉스**: "반기순이익"
-     - **SK텔레콤**: "당기순이익" (반기순이익 없음!)
-   - **쿼리 작성 시 반드시 모든 패턴 포함 (필수!):**
-     - 매출: "매출액, 영업수익" (둘 다 포함)
-     - 순이익: "반기순이익, 당기순이익, 순이익" (모두 포함 - SK텔레콤 때문!)
+6. **재무 비율(영업이익률, 순이익률, ROE, ROA, 부채비율 등) 질문:**
+   - 시스템이 조회 결과에 '영업이익률(%)', 'ROE(%)' 등 비율 컬럼을 자동으로 계산해 붙임 - 직접 계산하지 마세요!
+   - 쿼리에는 비율과 함께 분자/분모 지표가 조회되도록 작성 (예: 영업이익률 → 영업이익, 매출액)
+   - **쿼리 예: "삼성전자 영업이익률, 순이익률" 또는 "삼성전자 매출액, 영업이익, 순이익"**
+   - **final_answer에서는 결과에 붙은 비율 컬럼 값을 그대로 사용!**
 
-7. **재무 비율(영업이익률, 순이익률 등) 질문:**
-   - 비율 컬럼은 DB에 없음! 직접 계산해야 함
-   - 영업이익률 = 영업이익 / 매출액 (or 영업수익)
-   - 순이익률 = 순이익 / 매출액 (or 영업수익)
-   - **쿼리 예: "삼성전자 매출액, 영업이익, 순이익" (비율은 빼고!)**
-   - **중요: 비율 컬럼을 직접 조회하지 말고, 기본 데이터만 조회!**
+7. **절대로 LLM의 자체 지식으로 재무 데이터를 추정하지 마세요!**
 
-8. **절대로 LLM의 자체 지식으로 재무 데이터를 추정하지 마세요!**
-
-9. intermediate_results가 비어있으면 final_answer 선택 금지!
+8. intermediate_results가 비어있으면 final_answer 선택 금지!
 
 다음 중 하나를 선택해주세요:
 1. "financial_query": 재무 데이터베이스에서 추가 정보 조회 (재무 데이터 필수!)
@@ -386,28 +404,28 @@ class FinancialAnalysisGraph:
 
 **CRITICAL: One Step at a Time (한 번에 하나씩!)**
 - **반드시 한 번에 하나의 선택만 하세요!**
-- **여러 회사를 비교할 때도 한 번에 한 회사씩 조회하세요!**
 - **절대로 한 번에 여러 "선택:"을 작성하지 마세요!**
+- 여러 회사 비교는 시스템이 비교표로 일괄 조회하므로 회사별로 나눠 다시 조회하지 마세요
 
 **비교 분석 질문 예시:**
-- "삼성전자와 SK하이닉스 매출액, 영업이익, 순이익 비교" 
-  → Step 1: "선택: financial_query | 쿼리: 삼성전자 매출액, 영업이익, 반기순이익"
-  → Step 2: "선택: financial_query | 쿼리: SK하이닉스 매출액, 영업이익, 반기순이익"
-  → Step 3: "선택: final_answer" (비율은 답변 생성 시 계산)
-
-- "SK텔레콤, 케이티, LG유플러스 매출액, 영업이익, 순이익 비교" (통신사 - 주의!)
-  → Step 1: "선택: financial_query | 쿼리: SK텔레콤 영업수익, 영업이익, 순이익"
-     (순이익 검색 시 당기순이익도 포함되도록 '순이익'으로 쿼리)
-  → Step 2: "선택: financial_query | 쿼리: 케이티 영업수익, 영업이익, 순이익"
-  → Step 3: "선택: financial_query | 쿼리: LG유플러스 영업수익, 영업이익, 순이익"
-  → Step 4: "선택: final_answer" (비율 계산)
+- "삼성전자와 SK하이닉스 매출액, 영업이익, 순이익 비교"
+  → (시스템) compare_companies로 두 회사를 한 번에 조회 → 현재까지의 결과에 [회사별 비교표]
+  → Step 1: "선택: final_answer" (비율은 비교표에 자동 계산되어 포함됨)
+
+- "SK텔레콤, 케이티, LG유플러스 매출액, 영업이익, 순이익 비교"
+  → (시스템) 세 회사를 한 번에 조회 (통신사의 영업수익도 매출액으로 인식)
+  → 비교표에 "DB에서 데이터를 찾을 수 없는 회사: 케이티"가 있으면
+     Step 1: "선택: financial_query | 쿼리: 케이티 매출액, 영업이익, 순이익"
+  → Step 2: "선택: final_answer"
+
+- "삼성전자와 SK하이닉스 실적 비교하고 차이의 원인을 찾아줘"
+  → (시스템) 두 회사를 한 번에 조회
+  → Step 1: "선택: web_search | 쿼리: 삼성전자 SK하이닉스 실적 차이 원인 2025"
+  → Step 2: "선택: final_answer"
 
 **잘못된 예시 (하지 마세요!):**
 ❌ "선택: financial_query | 쿼리: 삼성전자... \n선택: financial_query | 쿼리: SK하이닉스..."
    (한 번에 두 개 선택 - 금지!)
-❌ "쿼리: 케이티 매출액" → 케이티는 통신사이므로 "영업수익" 사용!
-❌ "쿼리: SK텔레콤 반기순이익" → SK텔레콤은 "당기순이익"만 있음! "순이익"으로 검색해야 함!
-❌ "쿼리: 삼성전자 당기순이익만" → "반기순이익, 당기순이익, 순이익" 모두 포함해야 함!
 
 **올바른 예시:**
 ✅ "선택: financial_query | 쿼리: 삼성전자 매출액, 영업이익, 순이익"
@@ -437,104 +455,94 @@ class FinancialAnalysisGraph:
   → Step 1: "선택: web_search | 쿼리: 카카오 주요 사업 분야" ✅
   → Step 2: "선택: final_answer"
 
-**중요: 영업이익률, 순이익률 등 비율은 DB에 없으므로 쿼리에서 제외하고, 매출액과 영업이익(또는 순이익)만 조회하세요!**
+**중요: 영업이익률, 순이익률 등 비율은 조회 결과에 자동으로 계산되어 붙으므로 직접 계산하지 말고 그 컬럼 값을 사용하세요!**
 
 선택과 함께 구체적인 쿼리도 함께 제시해주세요.
 형식: "선택: [선택값] | 쿼리: [구체적인 쿼리]"
 """
         
         response = self.llm.invoke(analysis_prompt)
+        tracer.record_llm_usage(response)
         decision_text_full = response.content.strip()
         
-        print(f"  - LLM 결정 (전체): {decision_text_full}")
-        
         # 첫 번째 줄만 처리 (여러 줄이 있을 경우 대비)
         decision_text = decision_text_full.split("\n")[0].strip()
-        if decision_text != decision_text_full:
-            print(f"  - 여러 줄 감지, 첫 번째 줄만 사용: {decision_text}")
+        tracer.event("iteration.decision", decision=decision_text[:200],
+                     multiline=decision_text != decision_text_full)
         
         # 결정 파싱
         if "선택: financial_query" in decision_text:
             query_part = decision_text.split("쿼리: ")[-1] if "쿼리: " in decision_text else full_context
-            print(f"  → financial_query 실행: {query_part[:50]}...")
+            tracer.annotate(action="financial_query")
             tool_result = self.tools_instance.query_financial_data(query_part)
-            intermediate_results.append(f"반복 {current_iteration + 1}: {tool_result}")
-            
-            # 다음 반복이 최대 횟수에 도달하면 바로 final_answer 생성
-            if current_iteration + 1 >= max_iterations:
-                print(f"  → 다음 반복이 최대 횟수 도달 예정, 최종 답변 생성")
-                updated_state = {
-                    **state,
-                    "iteration_count": current_iteration + 1,
-                    "intermediate_results": intermediate_results
-                }
-                final_state = self._generate_final_answer_from_results(updated_state)
-                print(f"  → final_answer 생성 완료: {len(final_state.get('final_answer', ''))} 글자")
-                return final_state
-            
-            return {
-                **state,
-                "iteration_count": current_iteration + 1,
-                "intermediate_results": intermediate_results
-            }
+            update = self._record_iteration_result(state, tool_result, max_iterations)
+            update["covered_companies"] = self._covered_by(query_part, tool_result)
+            return {**company_update, **update}
         elif "선택: web_search" in decision_text:
             query_part = decision_text.split("쿼리: ")[-1] if "쿼리: " in decision_text else full_context
-            print(f"  → web_search 실행: {query_part[:50]}...")
+            tracer.annotate(action="web_search")
             tool_result = self.tools_instance.search_web(query_part)
-            intermediate_results.append(f"반복 {current_iteration + 1}: {tool_result}")
-            
-            # 다음 반복이 최대 횟수에 도달하면 바로 final_answer 생성
-            if current_iteration + 1 >= max_iterations:
-                print(f"  → 다음 반복이 최대 횟수 도달 예정, 최종 답변 생성")
-                updated_state = {
-                    **state,
-                    "iteration_count": current_iteration + 1,
-                    "intermediate_results": intermediate_results
-                }
-                final_state = self._generate_final_answer_from_results(updated_state)
-                print(f"  → final_answer 생성 완료: {len(final_state.get('final_answer', ''))} 글자")
-                return final_state
-            
-            return {
-                **state,
-                "iteration_count": current_iteration + 1,
-                "intermediate_results": intermediate_results
-            }
+            # 질문과 관련된 문장만 토큰 예산 안에서 남김 (회사명/항목명 가산점)
+            tool_result = self.reranker.compress_web_result(
+                tool_result,
+                f"{user_message} {query_part}",
+                mentioned_companies + self._item_terms(f"{user_message} {query_part}")
+            )
+            return {**company_update, **self._record_iteration_result(state, tool_result, max_iterations)}
         else:
             # 최종 답변 생성으로 진행 (final_answer 설정)
-            print(f"  → final_answer 선택, 최종 답변 생성")
-            final_state = self._generate_final_answer_from_results(state)
-            print(f"  → final_answer 생성 완료: {len(final_state.get('final_answer', ''))} 글자")
-            return final_state
+            tracer.annotate(action="final_answer")
+            final_update = self._generate_final_answer_from_results(state)
+            return {**company_update, **final_update}
+    
+    def _item_terms(self, text: str) -> List[str]:
+        """텍스트에 언급된 재무 항목명/비율명을 반환합니다."""
+        return [term for term in list(METRIC_ALIASES) + list(RATIO_DEFINITIONS) if term in text]
     
-    def _generate_final_answer_from_results(self, state: FinancialAnalysisState) -> FinancialAnalysisState:
-        """수집된 결과들을 바탕으로 최종 답변을 생성합니다."""
+    def _covered_by(self, query: str, tool_result: str) -> List[str]:
+        """재무 조회가 성공했을 때 이번 호출로 조회된 회사 목록을 반환합니다."""
+        if tool_result.startswith("재무 데이터 조회 중 오류"):
+            return []
+        return self.tools_instance.company_vocabulary.extract(query)
+    
+    def _record_iteration_result(self, state: FinancialAnalysisState, tool_result: str, max_iterations: int) -> dict:
+        """도구 결과를 사이드 저장소에 넣고, 상태에는 참조 ID와 반복 횟수만 반영합니다."""
+        current_iteration = state.get("iteration_count", 0)
+        result_ref = self.result_store.put(f"반복 {current_iteration + 1}: {tool_result}")
+        update = {
+            "iteration_count": current_iteration + 1,
+            "intermediate_results": [result_ref]
+        }
+        
+        # 다음 반복이 최대 횟수에 도달하면 바로 final_answer 생성
+        if current_iteration + 1 >= max_iterations:
+            updated_state = {
+                **state,
+                "intermediate_results": (state.get("intermediate_results") or []) + [result_ref]
+            }
+            final_update = self._generate_final_answer_from_results(updated_state)
+            update.update(final_update)
+        
+        return update
+    
+    @traced("answer.final_generation")
+    def _generate_final_answer_from_results(self, state: FinancialAnalysisState) -> dict:
+        """수집된 결과들을 바탕으로 최종 답변을 생성합니다 (final_answer 갱신분만 반환)."""
         
         user_message = state["current_query"]
         
         # 대화 컨텍스트 구성 (원래 질문의 의도 파악용)
-        if len(state["messages"]) > 1:
-            recent_messages = state["messages"][-3:]
-            conversation_context = "\n".join([
-                f"{'User' if isinstance(msg, HumanMessage) else 'Bot'}: {msg.content[:150]}"
-                for msg in recent_messages[:-1]
-            ])
-            full_question = f"대화 기록:\n{conversation_context}\n\n현재 질문: {user_message}"
-        else:
-            full_question = user_message
+        full_question = self._with_conversation_context(state, user_message)
         
-        intermediate_results = state.get("intermediate_results", [])
+        intermediate_results = self.result_store.resolve(state.get("intermediate_results") or [])
         
-        print(f"\n[DEBUG] _generate_final_answer_from_results:")
-        print(f"  - intermediate_results 개수: {len(intermediate_results)}")
-        for i, result in enumerate(intermediate_results):
-            print(f"  - 결과 {i+1}: {result[:200]}...")
+        tracer.event("final_answer.inputs", results=len(intermediate_results),
+                     result_chars=sum(len(result) for result in intermediate_results))
         
         # 재무 데이터 관련 질문인데 결과가 없으면 경고
         if not intermediate_results:
             return {
-                **state,
-                "response": "죄송합니다. 재무 데이터를 조회하지 못했습니다. 다시 질문해주시면 데이터베이스에서 정확한 정보를 조회하여 답변드리겠습니다.",
+                "final_answer": "죄송합니다. 재무 데이터를 조회하지 못했습니다. 다시 질문해주시면 데이터베이스에서 정확한 정보를 조회하여 답변드리겠습니다.",
                 "route_decision": "error_no_data"
             }
         
@@ -561,7 +569,8 @@ class FinancialAnalysisGraph:
 - 결론과 인사이트 포함
 - 이해하기 쉽게 구조화된 답변
 - 모든 숫자는 조회된 정확한 값만 사용 (추정 금지!)
-- **비율 계산 시 일반 텍스트로 작성** (예: "순이익률 = (13,339,313,000,000 / 153,706,820,000,000) × 100 = 8.68%")
+- **수집된 정보에 '영업이익률(%)', 'ROE(%)' 등 계산된 비율이 있으면 그 값을 그대로 사용 (재계산 금지!)**
+- **비율을 설명할 때는 일반 텍스트로 작성** (예: "순이익률 = (13,339,313,000,000 / 153,706,820,000,000) × 100 = 8.68%")
 - **절대로 LaTeX 수식 형식 사용하지 말 것!**
 
 **잘못된 예시 (하지 마세요!):**
@@ -573,26 +582,22 @@ class FinancialAnalysisGraph:
 """
         
         response = self.llm.invoke(final_prompt)
+        tracer.record_llm_usage(response)
         
         return {
-            **state,
             "final_answer": response.content
         }
     
+    @traced("node.generate_response")
     def generate_response_node(self, state: FinancialAnalysisState) -> FinancialAnalysisState:
         """최종 응답을 생성하고 대화 기록에 추가합니다."""
         
         final_answer = state["final_answer"]
         
-        print(f"\n[DEBUG] generate_response_node:")
-        print(f"  - final_answer 길이: {len(final_answer)} 글자")
-        print(f"  - final_answer 내용 (처음 100자): {final_answer[:100] if final_answer else '(비어있음)'}...")
-        
-        # AI 메시지 추가
-        ai_message = AIMessage(content=final_answer)
-        state["messages"].append(ai_message)
+        tracer.annotate(answer_chars=len(final_answer))
         
-        return state
+        # AI 메시지 추가 (add_messages 리듀서가 기존 기록 뒤에 붙임)
+        return {"messages": [AIMessage(content=final_answer)]}
     
     def route_decision_function(self, state: FinancialAnalysisState) -> str:
         """라우팅 결정 함수"""
@@ -604,26 +609,25 @@ class FinancialAnalysisGraph:
         current_iteration = state.get("iteration_count", 0)
         final_answer = state.get("final_answer", "")
         
-        print(f"\n[DEBUG] should_continue_iteration 체크:")
-        print(f"  - iteration_count: {current_iteration}")
-        print(f"  - final_answer 존재: {bool(final_answer)}")
-        print(f"  - intermediate_results 개수: {len(state.get('intermediate_results', []))}")
-        
         # final_answer가 이미 설정되었으면 완료
         if final_answer and final_answer != "":
-            print(f"  → 결정: finish (final_answer 설정됨)")
             return "finish"
         
         # 최대 반복 횟수에 도달했으면 완료
         max_iterations = 5  # 3→5로 증가 (더 많은 회사 비교 가능)
         if current_iteration >= max_iterations:
-            print(f"  → 결정: finish (최대 반복 횟수 도달)")
             return "finish"
         
         # 계속 반복
-        print(f"  → 결정: continue")
         return "continue"
     
+    def _with_conversation_context(self, state: FinancialAnalysisState, user_message: str) -> str:
+        """analyze_query_node에서 만든 대화 컨텍스트를 현재 질문 앞에 붙입니다."""
+        conversation_context = state.get("conversation_context", "")
+        if not conversation_context:
+            return user_message
+        return f"대화 기록:\n{conversation_context}\n\n현재 질문: {user_message}"
+    
     def _is_financial_query(self, query: str) -> bool:
         """질문이 재무 관련인지 판단합니다."""
         financial_keywords = [
@@ -642,48 +646,24 @@ class FinancialAnalysisGraph:
         if config is None:
             config = {"configurable": {"thread_id": "default"}}
         
-        # 기존 상태 가져오기 (있으면)
-        try:
-            existing_state = self.graph.get_state(config)
-            
-            if existing_state and existing_state.values and "messages" in existing_state.values:
-                # 기존 대화에 새 메시지 추가
-                updated_state = existing_state.values.copy()
-                updated_state["messages"].append(HumanMessage(content=message))
-                updated_state["current_query"] = message
-                updated_state["route_decision"] = ""
-                updated_state["iteration_count"] = 0
-                updated_state["intermediate_results"] = []  # 🔥 초기화 필수!
-                updated_state["final_answer"] = ""  # 🔥 초기화 필수!
-            else:
-                # 새로운 대화 시작
-                updated_state = {
-                    "messages": [HumanMessage(content=message)],
-                    "route_decision": "",
-                    "current_query": message,
-                    "intermediate_results": [],
-                    "final_answer": "",
-                    "iteration_count": 0
-                }
-        except Exception as e:
-            print(f"상태 조회 실패, 새로운 대화 시작: {e}")
-            # 새로운 대화 시작
-            updated_state = {
-                "messages": [HumanMessage(content=message)],
-                "route_decision": "",
-                "current_query": message,
-                "intermediate_results": [],
-                "final_answer": "",
-                "iteration_count": 0
-            }
-        
-        # 그래프 실행
-        print(f"\n[DEBUG] 그래프 실행 시작")
-        result = self.graph.invoke(updated_state, config)
+        # 이번 턴의 입력만 전달 (messages는 리듀서가 기존 대화 뒤에 추가)
+        turn_input = {
+            "messages": [HumanMessage(content=message)],
+            "route_decision": "",
+            "current_query": message,
+            "intermediate_results": None,  # 🔥 이전 턴 결과 참조 초기화
+            "final_answer": "",  # 🔥 초기화 필수!
+            "iteration_count": 0,
+            "mentioned_companies": [],
+            "covered_companies": None  # 회사별 조회 커버리지 초기화
+        }
         
-        print(f"\n[DEBUG] 그래프 실행 완료")
-        print(f"  - final_answer 존재: {bool(result.get('final_answer'))}")
-        print(f"  - final_answer 길이: {len(result.get('final_answer', ''))} 글자")
+        # 그래프 실행 (요청 단위 추적: 노드/도구별 소요 시간과 토큰 수)
+        with tracer.request(thread_id=config["configurable"].get("thread_id")) as span:
+            result = self.graph.invoke(turn_input, config)
+            span.set(route=result.get("route_decision", ""),
+                     iterations=result.get("iteration_count", 0),
+                     answer_chars=len(result.get("final_answer", "")))
         
         return result["final_answer"]
 
@@ -1,12 +1,19 @@
-import gradio as gr
 import os
+import threading
 from dotenv import load_dotenv
-from parser import FinancialDataParser
-from graph import get_graph_instance
+
+# gradio, langchain, langgraph 등 무거운 모듈은 필요한 시점에 import하여
+# 프로세스 시작 직후 바로 포트를 열 수 있도록 합니다.
 
 # 환경 변수 로드
 load_dotenv()
 
+# 준비 상태
+STATUS_STARTING = "starting"
+STATUS_WARMING_UP = "warming_up"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
 
 class FinancialAnalysisApp:
     def __init__(self):
@@ -19,52 +26,146 @@ class FinancialAnalysisApp:
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         
-        if not self.tavily_api_key:
+        # 로컬 검색 백엔드(WEB_SEARCH_BACKEND=local)를 쓰면 Tavily 키가 필요 없음
+        if not self.tavily_api_key and os.getenv("WEB_SEARCH_BACKEND", "tavily").lower() != "local":
             raise ValueError("TAVILY_API_KEY가 .env 파일에 설정되지 않았습니다.")
         
-        # 데이터 파서 초기화
-        self.parser = FinancialDataParser()
-        
-        # 그래프는 나중에 초기화 (데이터 로드 후)
+        # 그래프는 나중에 초기화 (백그라운드 워밍업에서 데이터 로드 후)
         self.graph = None
         
+        # 준비 상태 (워밍업 스레드가 갱신, 요청 처리 스레드가 참조)
+        self.status = STATUS_STARTING
+        self.status_detail = ""
+        self.data_version = ""
+        self.data_watcher = None
+        self.ready_event = threading.Event()
+        
+        # 워밍업이 끝나지 않았을 때 요청이 기다리는 최대 시간(초)
+        self.warmup_wait_seconds = float(os.getenv("WARMUP_WAIT_SECONDS", "5"))
+        
         print("재무제표 분석 시스템이 초기화되었습니다.")
     
     def initialize_data(self):
         """데이터베이스를 초기화하고 재무제표 데이터를 파싱합니다."""
         try:
-            print("데이터베이스 초기화 중...")
-            self.parser.parse_all_financial_statements()
-            print("데이터 초기화가 완료되었습니다.")
+            from database import db
+            if db.read_only:
+                # build_db.py로 만든 아티팩트는 이미 적재되어 있으므로 파싱을 생략
+                self.data_version = db.load_manifest().get("data_version", "")
+                print(f"읽기 전용 데이터베이스를 사용합니다: {db.db_path} (데이터 버전: {self.data_version or '알 수 없음'})")
+            else:
+                print("데이터베이스 초기화 중...")
+                self.status_detail = "재무제표 데이터 적재 중"
+                from parser import FinancialDataParser
+                FinancialDataParser().parse_all_financial_statements()
+                if os.getenv("SQL_BACKEND", "sqlite").lower() == "duckdb":
+                    # 방금 다시 적재한 DB로 DuckDB 파일도 빌드 (읽기 전용 모드는 build_db.py 산출물을 그대로 사용)
+                    from build_db import build_duckdb
+                    build_duckdb(db.db_path)
+                print("데이터 초기화가 완료되었습니다.")
             
             # 데이터 로드 후 그래프 초기화 (벡터스토어 빌드)
             print("\n그래프 및 벡터스토어 초기화 중...")
+            self.status_detail = "그래프 및 벡터스토어 초기화 중"
             # force_reload=True로 tools 인스턴스를 새로 생성하여 벡터스토어 재빌드
             from tools import get_tools_instance
+            from graph import get_graph_instance
             get_tools_instance(force_reload=True)
             self.graph = get_graph_instance()
             print("그래프 초기화가 완료되었습니다.")
             
+            # 스크리닝 API용 지표 컬럼 배열 적재
+            from screener import get_screener
+            get_screener(force_reload=True)
+            
             return True
         except Exception as e:
             print(f"데이터 초기화 중 오류 발생: {e}")
+            self.status_detail = str(e)
             return False
     
-    def chat_with_system(self, message: str, history: list) -> tuple:
-        """시스템과 대화하는 함수"""
+    def warm_up(self):
+        """데이터 적재와 인덱스 구축을 수행하고 준비 상태를 갱신합니다 (백그라운드 스레드에서 실행)."""
+        self.status = STATUS_WARMING_UP
+        if self.initialize_data():
+            self.status = STATUS_READY
+            self.status_detail = ""
+            # 새 재무제표 파일을 재시작 없이 반영 (DATA_WATCH_ENABLED=true일 때만)
+            from data_watcher import create_data_watcher
+            self.data_watcher = create_data_watcher()
+            if self.data_watcher is not None:
+                self.data_watcher.start()
+        else:
+            self.status = STATUS_FAILED
+            print("경고: 데이터 초기화에 실패했습니다.")
+        self.ready_event.set()
+    
+    def start_warm_up(self) -> threading.Thread:
+        """워밍업을 백그라운드 스레드로 시작합니다."""
+        thread = threading.Thread(target=self.warm_up, name="warm_up", daemon=True)
+        thread.start()
+        return thread
+    
+    def health(self) -> dict:
+        """준비 상태를 반환합니다 (/health 엔드포인트용)."""
+        return {
+            "status": self.status,
+            "ready": self.status == STATUS_READY,
+            "detail": self.status_detail,
+            "data_version": self.data_watcher.data_version if self.data_watcher else self.data_version,
+        }
+    
+    def screen(self, request: dict) -> tuple:
+        """자연어 없이 지표 조건으로 회사를 검색합니다 (/screen 엔드포인트용, LLM 호출 없음).
+        
+        Args:
+            request: {"filters", "sort", "limit", "basis", "period", "columns"} 딕셔너리
+        
+        Returns:
+            (응답 딕셔너리, HTTP 상태 코드) 튜플
+        """
+        if self.status != STATUS_READY:
+            return {"error": "시스템을 준비하는 중입니다.", "status": self.status}, 503
+        
+        from screener import DEFAULT_LIMIT, get_screener
+        try:
+            result = get_screener().screen(
+                request.get("filters", []),
+                sort=request.get("sort"),
+                limit=request.get("limit", DEFAULT_LIMIT),
+                basis=request.get("basis", "연결"),
+                period=request.get("period"),
+                columns=request.get("columns", []),
+            )
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}, 400
+        return result, 200
+    
+    def chat_with_system(self, message: str, history: list, session_id: str = None) -> tuple:
+        """시스템과 대화하는 함수
+        
+        Args:
+            session_id: 대화 기록을 분리할 세션 ID (Gradio 세션 해시)
+        """
         
         if not message.strip():
             return history, ""
         
-        # 그래프가 초기화되지 않았으면 오류 메시지 반환
+        # 워밍업 중이면 잠시 기다린 뒤, 그래도 준비되지 않았으면 바로 안내 메시지 반환
+        if self.graph is None:
+            self.ready_event.wait(self.warmup_wait_seconds)
         if self.graph is None:
-            error_message = "시스템이 아직 초기화되지 않았습니다. 잠시 후 다시 시도해주세요."
+            if self.status == STATUS_FAILED:
+                error_message = f"시스템 초기화에 실패했습니다: {self.status_detail}"
+            else:
+                detail = f" ({self.status_detail})" if self.status_detail else ""
+                error_message = f"⏳ 시스템을 준비하는 중입니다{detail}. 잠시 후 다시 시도해주세요."
             history.append([message, error_message])
             return history, ""
         
         try:
-            # 대화 히스토리를 유지하기 위해 동일한 thread_id 사용
-            config = {"configurable": {"thread_id": "user_session"}}
+            # 세션마다 별도의 thread_id를 사용하여 대화 기록을 분리
+            config = {"configurable": {"thread_id": session_id or "user_session"}}
             
             # LangGraph를 통해 응답 생성
             response = self.graph.invoke(message, config)
@@ -81,6 +182,7 @@ class FinancialAnalysisApp:
     
     def create_interface(self):
         """Gradio 인터페이스를 생성합니다."""
+        import gradio as gr
         
         # CSS 스타일링 - 더 넓고 모던한 디자인
         css = """
@@ -258,8 +360,9 @@ class FinancialAnalysisApp:
                 example_btn5 = gr.Button("💰 반도체 업체 ROE", size="sm", scale=1)
             
             # 이벤트 핸들러 설정
-            def submit_message(message, history):
-                return self.chat_with_system(message, history)
+            def submit_message(message, history, request: gr.Request):
+                session_id = request.session_hash if request else None
+                return self.chat_with_system(message, history, session_id)
             
             # 전송 버튼 클릭 이벤트
             send_btn.click(
@@ -340,24 +443,49 @@ class FinancialAnalysisApp:
         
         return interface
     
+    def create_api(self):
+        """/health, /metrics, /screen 엔드포인트를 가진 FastAPI 앱을 생성합니다."""
+        from fastapi import Body, FastAPI, Response
+        from fastapi.responses import JSONResponse
+        from metrics import registry
+        
+        app = FastAPI()
+        
+        @app.get("/health")
+        def health():
+            state = self.health()
+            return JSONResponse(state, status_code=200 if state["ready"] else 503)
+        
+        @app.get("/metrics")
+        def metrics():
+            return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+        
+        @app.post("/screen")
+        def screen(request: dict = Body(default={})):
+            result, status_code = self.screen(request)
+            return JSONResponse(result, status_code=status_code)
+        
+        return app
+    
     def run(self):
         """애플리케이션을 실행합니다."""
         
-        # 데이터 초기화
-        print("데이터를 초기화하는 중...")
-        if not self.initialize_data():
-            print("경고: 데이터 초기화에 실패했습니다. 빈 데이터베이스로 시작합니다.")
+        import gradio as gr
+        import uvicorn
         
-        # Gradio 인터페이스 생성 및 실행
+        # Gradio 인터페이스 생성
         interface = self.create_interface()
         
-        print("Gradio 서버를 시작합니다...")
-        interface.launch(
-            server_name="0.0.0.0",
-            server_port=7860,
-            share=False,
-            debug=True
-        )
+        # API 엔드포인트 앱의 루트에 Gradio UI를 마운트
+        app = gr.mount_gradio_app(self.create_api(), interface, path="/")
+        
+        # 데이터 적재와 벡터스토어 구축은 백그라운드에서 진행 (포트는 바로 열림)
+        print("백그라운드에서 데이터를 초기화합니다...")
+        self.start_warm_up()
+        
+        port = int(os.getenv("SERVER_PORT", "7860"))
+        print(f"서버를 시작합니다... (UI: http://0.0.0.0:{port}, 상태: /health, 메트릭: /metrics, 스크리닝: /screen)")
+        uvicorn.run(app, host="0.0.0.0", port=port)
 
 
 def main():
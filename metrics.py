@@ -0,0 +1,255 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tracing import tracer
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Tuple = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """HELP/TYPE 줄 아래에 들어갈 샘플 줄을 반환합니다."""
+
+
+class Counter(_Metric):
+    """단조 증가하는 카운터입니다."""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """현재 값을 나타내는 게이지입니다."""
+
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램입니다 (단위: 초)."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # 라벨 → (버킷별 개수, 합계, 전체 개수)
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """프로세스 내 메트릭 저장소입니다. render()로 Prometheus 텍스트 형식을 만듭니다."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_class(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], None]):
+        """render() 직전에 호출되어 게이지 값을 갱신하는 함수를 등록합니다."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"메트릭 수집 중 오류: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 전역 메트릭 저장소
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter("financial_requests_total", "처리한 요청 수", ["route", "status"])
+REQUEST_LATENCY = registry.histogram("financial_request_latency_seconds", "요청 처리 시간", ["route"])
+NODE_LATENCY = registry.histogram("financial_graph_node_latency_seconds", "그래프 노드 실행 시간", ["node"])
+LLM_CALLS = registry.counter("financial_llm_calls_total", "LLM 호출 수", ["status"])
+LLM_LATENCY = registry.histogram("financial_llm_latency_seconds", "LLM 호출 시간")
+LLM_TOKENS = registry.counter("financial_llm_tokens_total", "LLM 토큰 사용량", ["type"])
+EMBEDDING_CALLS = registry.counter("financial_embedding_calls_total", "임베딩 호출 수", ["operation"])
+EMBEDDING_LATENCY = registry.histogram("financial_embedding_latency_seconds", "임베딩 호출 시간", ["operation"])
+WEB_CALLS = registry.counter("financial_web_calls_total", "웹 검색/페이지 수집 호출 수", ["operation", "status"])
+WEB_LATENCY = registry.histogram("financial_web_latency_seconds", "웹 검색/페이지 수집 시간", ["operation"])
+SQL_LATENCY = registry.histogram("financial_sql_latency_seconds", "SQL 실행 시간", ["operation"])
+CACHE_REQUESTS = registry.counter("financial_cache_requests_total", "캐시 조회 수", ["cache", "result"])
+ACTIVE_SESSIONS = registry.gauge("financial_active_sessions", "체크포인터에 보관 중인 세션 수")
+CHECKPOINT_BYTES = registry.gauge("financial_checkpoint_bytes", "체크포인트 추정 메모리 크기")
+RESULT_STORE_BYTES = registry.gauge("financial_result_store_bytes", "도구 결과 사이드 저장소 크기")
+DATA_RELOADS = registry.counter("financial_data_reloads_total", "재무제표 데이터 무중단 재적재 횟수", ["status"])
+DATA_RELOAD_LATENCY = registry.histogram("financial_data_reload_seconds", "데이터 재적재(섀도 DB 빌드 + 인스턴스 교체) 시간")
+
+
+def observe_span(span):
+    """추적 span을 메트릭으로 변환합니다 (tracer 리스너)."""
+    seconds = span.duration_ms / 1000
+    name = span.name
+    attributes = span.attributes
+
+    if name == "request":
+        route = attributes.get("route") or "unknown"
+        REQUESTS.inc(route=route, status=span.status)
+        REQUEST_LATENCY.observe(seconds, route=route)
+    elif name.startswith("node."):
+        NODE_LATENCY.observe(seconds, node=name[len("node."):])
+    elif name.startswith("embedding."):
+        operation = name[len("embedding."):]
+        EMBEDDING_CALLS.inc(operation=operation)
+        EMBEDDING_LATENCY.observe(seconds, operation=operation)
+    elif name == "db.query":
+        SQL_LATENCY.observe(seconds, operation=attributes.get("operation", "query"))
+    elif name == "tool.web_search":
+        WEB_CALLS.inc(operation="search", status=span.status)
+        WEB_LATENCY.observe(seconds, operation="search")
+        if "cache_hit" in attributes:
+            CACHE_REQUESTS.inc(cache="web_search", result="hit" if attributes["cache_hit"] else "miss")
+    elif name == "data.reload":
+        DATA_RELOADS.inc(status=span.status)
+        DATA_RELOAD_LATENCY.observe(seconds)
+    elif name == "tool.web_fetch":
+        WEB_CALLS.inc(operation="fetch", status=span.status)
+        WEB_LATENCY.observe(seconds, operation="fetch")
+        hits = attributes.get("page_cache_hits", 0)
+        CACHE_REQUESTS.inc(hits, cache="web_page", result="hit")
+        CACHE_REQUESTS.inc(max(attributes.get("urls", 0) - hits, 0), cache="web_page", result="miss")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain 콜백으로 LLM 호출 수, 지연 시간, 토큰 사용량을 기록합니다."""
+
+    def __init__(self):
+        self._started: Dict = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_LATENCY.observe(time.perf_counter() - started)
+        LLM_CALLS.inc(status="ok")
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        LLM_TOKENS.inc(usage.get("prompt_tokens", 0), type="prompt")
+        LLM_TOKENS.inc(usage.get("completion_tokens", 0), type="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+        LLM_CALLS.inc(status="error")
+
+
+# ChatOpenAI(callbacks=[...])에 넘길 공용 콜백
+metrics_callback = MetricsCallbackHandler()
+
+tracer.add_listener(observe_span)
@@ -1,11 +1,21 @@
 import os
 import glob
-from typing import List, Tuple
-from database import db
+from typing import List, Optional, Tuple
+from database import (db, FinancialDatabase, DEFAULT_INDUSTRY_GROUP, REPORT_TYPES, detect_industry_group,
+                      detect_report_period, parse_statement_type)
+from ratios import METRIC_SOURCES, RATIO_DEFINITIONS
 
 class FinancialDataParser:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", database: FinancialDatabase = None):
         self.data_dir = data_dir
+        # 적재 대상 데이터베이스 (기본값: 전역 인스턴스, build_db.py는 별도 파일을 넘김)
+        self.db = database or db
+        # (종목코드, 회사명) → 업종 그룹 (금융업 파일에 나온 회사만, 나머지는 '일반')
+        self.company_groups = {}
+        # 적재할 보고 기간 (사업연도, 보고서종류) 집합 (None이면 파일이 있는 모든 기간)
+        self.periods = None
+        # 이번 적재에서 교체한 보고 기간 (파생 테이블 갱신 범위)
+        self.loaded_periods = set()
     
     def parse_tsv_file(self, file_path: str) -> List[Tuple]:
         """TSV 파일을 파싱하여 데이터 튜플 리스트를 반환합니다."""
@@ -39,6 +49,10 @@ class FinancialDataParser:
                 # 탭으로 구분된 값들을 분리
                 values = line.split('\t')
                 
+                # 헤더 행은 건너뜀
+                if values[0].strip() == '재무제표종류':
+                    continue
+                
                 # 빈 값들을 None으로 변환
                 processed_values = []
                 for value in values:
@@ -54,6 +68,34 @@ class FinancialDataParser:
             
         return data
     
+    def _with_statement_basis(self, row: list, file_path: str) -> tuple:
+        """재무제표종류 다음에 연결구분, 재무제표구분을 넣은 행을 반환합니다."""
+        basis, kind = parse_statement_type(row[0], file_path)
+        group = detect_industry_group(file_path)
+        if group != DEFAULT_INDUSTRY_GROUP:
+            self.company_groups[(row[1], row[2])] = group
+        row = row[:1] + [basis, kind] + row[1:]
+        # 기본키 컬럼(회사명, 결산기준일, 항목코드, 항목명)은 NULL을 허용하지 않음
+        for index in (4, 9, 12, 13):
+            if row[index] is None:
+                row[index] = ''
+        return tuple(row)
+    
+    def _is_requested(self, period: Optional[tuple]) -> bool:
+        """적재 대상 보고 기간인지 확인합니다 (기간을 아직 모르면 True)."""
+        return period is None or self.periods is None or period in self.periods
+    
+    def _report_period(self, file_path: str, rows: list) -> Optional[tuple]:
+        """파일의 보고 기간을 파일명에서, 없으면 첫 행의 결산기준일·보고서종류에서 구합니다."""
+        period = detect_report_period(file_path)
+        if period is None and rows:
+            settlement_date, report_type = rows[0][9], rows[0][10]
+            if settlement_date[:4].isdigit() and report_type in REPORT_TYPES:
+                period = (int(settlement_date[:4]), report_type)
+        if period is None:
+            print(f"보고 기간을 알 수 없어 건너뜁니다: {os.path.basename(file_path)}")
+        return period
+    
     def parse_balance_sheets(self):
         """재무상태표 디렉토리의 모든 파일을 파싱하여 데이터베이스에 저장합니다."""
         balance_sheets_dir = os.path.join(self.data_dir, "balance_sheets")
@@ -62,16 +104,17 @@ class FinancialDataParser:
             print(f"재무상태표 디렉토리가 존재하지 않습니다: {balance_sheets_dir}")
             return
         
-        db.clear_table("balance_sheet")
-        
         txt_files = glob.glob(os.path.join(balance_sheets_dir, "*.txt"))
         
         if not txt_files:
             print("재무상태표 파일이 없습니다.")
             return
         
-        all_data = []
+        # 보고 기간별로 모아서 그 기간의 데이터만 교체 (다른 기간의 이력은 유지)
+        data_by_period = {}
         for file_path in txt_files:
+            if not self._is_requested(detect_report_period(file_path)):
+                continue
             print(f"재무상태표 파일 파싱 중: {os.path.basename(file_path)}")
             data = self.parse_tsv_file(file_path)
             # 컬럼 개수 맞추기 (15개로 고정)
@@ -80,11 +123,15 @@ class FinancialDataParser:
                 row_list = list(row)
                 while len(row_list) < 15:
                     row_list.append(None)
-                normalized_data.append(tuple(row_list[:15]))
-            all_data.extend(normalized_data)
+                normalized_data.append(self._with_statement_basis(row_list[:15], file_path))
+            period = self._report_period(file_path, normalized_data)
+            if period is not None and self._is_requested(period):
+                data_by_period.setdefault(period, []).extend(normalized_data)
         
-        if all_data:
-            db.insert_balance_sheet_data(all_data)
+        for period, period_data in sorted(data_by_period.items()):
+            self.db.clear_table("balance_sheet", period)
+            self.loaded_periods.add(period)
+            self.db.insert_balance_sheet_data(period_data, period)
     
     def parse_income_statements(self):
         """손익계산서 디렉토리의 모든 파일을 파싱하여 데이터베이스에 저장합니다."""
@@ -94,16 +141,17 @@ class FinancialDataParser:
             print(f"손익계산서 디렉토리가 존재하지 않습니다: {income_statements_dir}")
             return
         
-        db.clear_table("income_statement")
-        
         txt_files = glob.glob(os.path.join(income_statements_dir, "*.txt"))
         
         if not txt_files:
             print("손익계산서 파일이 없습니다.")
             return
         
-        all_data = []
+        # 보고 기간별로 모아서 그 기간의 데이터만 교체 (다른 기간의 이력은 유지)
+        data_by_period = {}
         for file_path in txt_files:
+            if not self._is_requested(detect_report_period(file_path)):
+                continue
             print(f"손익계산서 파일 파싱 중: {os.path.basename(file_path)}")
             data = self.parse_tsv_file(file_path)
             # 컬럼 개수 맞추기 (18개로 고정)
@@ -112,11 +160,15 @@ class FinancialDataParser:
                 row_list = list(row)
                 while len(row_list) < 18:
                     row_list.append(None)
-                normalized_data.append(tuple(row_list[:18]))
-            all_data.extend(normalized_data)
+                normalized_data.append(self._with_statement_basis(row_list[:18], file_path))
+            period = self._report_period(file_path, normalized_data)
+            if period is not None and self._is_requested(period):
+                data_by_period.setdefault(period, []).extend(normalized_data)
         
-        if all_data:
-            db.insert_income_statement_data(all_data)
+        for period, period_data in sorted(data_by_period.items()):
+            self.db.clear_table("income_statement", period)
+            self.loaded_periods.add(period)
+            self.db.insert_income_statement_data(period_data, period)
     
     def parse_cash_flow_statements(self):
         """현금흐름표 디렉토리의 모든 파일을 파싱하여 데이터베이스에 저장합니다."""
@@ -126,16 +178,17 @@ class FinancialDataParser:
             print(f"현금흐름표 디렉토리가 존재하지 않습니다: {cash_flow_dir}")
             return
         
-        db.clear_table("cash_flow_statement")
-        
         txt_files = glob.glob(os.path.join(cash_flow_dir, "*.txt"))
         
         if not txt_files:
             print("현금흐름표 파일이 없습니다.")
             return
         
-        all_data = []
+        # 보고 기간별로 모아서 그 기간의 데이터만 교체 (다른 기간의 이력은 유지)
+        data_by_period = {}
         for file_path in txt_files:
+            if not self._is_requested(detect_report_period(file_path)):
+                continue
             print(f"현금흐름표 파일 파싱 중: {os.path.basename(file_path)}")
             data = self.parse_tsv_file(file_path)
             # 컬럼 개수 맞추기 (16개로 고정)
@@ -144,11 +197,15 @@ class FinancialDataParser:
                 row_list = list(row)
                 while len(row_list) < 16:
                     row_list.append(None)
-                normalized_data.append(tuple(row_list[:16]))
-            all_data.extend(normalized_data)
+                normalized_data.append(self._with_statement_basis(row_list[:16], file_path))
+            period = self._report_period(file_path, normalized_data)
+            if period is not None and self._is_requested(period):
+                data_by_period.setdefault(period, []).extend(normalized_data)
         
-        if all_data:
-            db.insert_cash_flow_data(all_data)
+        for period, period_data in sorted(data_by_period.items()):
+            self.db.clear_table("cash_flow_statement", period)
+            self.loaded_periods.add(period)
+            self.db.insert_cash_flow_data(period_data, period)
     
     def parse_equity_statements(self):
         """자본변동표 디렉토리의 모든 파일을 파싱하여 데이터베이스에 저장합니다."""
@@ -158,16 +215,17 @@ class FinancialDataParser:
             print(f"자본변동표 디렉토리가 존재하지 않습니다: {equity_dir}")
             return
         
-        db.clear_table("statement_of_changes_in_equity")
-        
         txt_files = glob.glob(os.path.join(equity_dir, "*.txt"))
         
         if not txt_files:
             print("자본변동표 파일이 없습니다.")
             return
         
-        all_data = []
+        # 보고 기간별로 모아서 그 기간의 데이터만 교체 (다른 기간의 이력은 유지)
+        data_by_period = {}
         for file_path in txt_files:
+            if not self._is_requested(detect_report_period(file_path)):
+                continue
             print(f"자본변동표 파일 파싱 중: {os.path.basename(file_path)}")
             data = self.parse_tsv_file(file_path)
             # 컬럼 개수 맞추기 (15개로 고정)
@@ -176,15 +234,26 @@ class FinancialDataParser:
                 row_list = list(row)
                 while len(row_list) < 15:
                     row_list.append(None)
-                normalized_data.append(tuple(row_list[:15]))
-            all_data.extend(normalized_data)
+                normalized_data.append(self._with_statement_basis(row_list[:15], file_path))
+            period = self._report_period(file_path, normalized_data)
+            if period is not None and self._is_requested(period):
+                data_by_period.setdefault(period, []).extend(normalized_data)
         
-        if all_data:
-            db.insert_equity_data(all_data)
+        for period, period_data in sorted(data_by_period.items()):
+            self.db.clear_table("statement_of_changes_in_equity", period)
+            self.loaded_periods.add(period)
+            self.db.insert_equity_data(period_data, period)
     
-    def parse_all_financial_statements(self):
-        """모든 재무제표를 파싱하여 데이터베이스에 저장합니다."""
+    def parse_all_financial_statements(self, periods: list = None):
+        """모든 재무제표를 파싱하여 데이터베이스에 저장합니다.
+        
+        Args:
+            periods: 적재할 보고 기간 (사업연도, 보고서종류) 리스트 (없으면 파일이 있는 모든 기간)
+                     파일이 있는 기간의 데이터만 교체하고, 나머지 기간의 이력은 그대로 둡니다.
+        """
         print("=== 재무제표 데이터 파싱 시작 ===")
+        self.periods = {tuple(period) for period in periods} if periods else None
+        self.loaded_periods = set()
         
         self.parse_balance_sheets()
         self.parse_income_statements()
@@ -192,6 +261,21 @@ class FinancialDataParser:
         # 자본변동표는 복잡한 구조로 인해 선택적으로 파싱
         # self.parse_equity_statements()
         
+        # 파일명의 업종 그룹(은행/증권/보험/금융기타)을 회사 차원에 기록
+        if self.company_groups:
+            self.db.update_industry_groups(self.company_groups)
+        
+        # 교체한 보고 기간이 가리키는 기간말만 파생 테이블(시계열·성장률·업종 집계·순위)을 다시 계산
+        if self.loaded_periods:
+            period_ends = self.db.get_period_ends(sorted(self.loaded_periods))
+            self.db.build_timeseries(METRIC_SOURCES, period_ends)
+            self.db.build_sector_cube(METRIC_SOURCES, RATIO_DEFINITIONS, period_ends)
+            self.db.build_metric_ranks(period_ends)
+        
+        # 적재가 끝난 뒤 인덱스와 통계를 갖춤 (시작 시 파싱한 DB도 빌드 아티팩트와 같은 실행 계획을 사용)
+        self.db.create_indexes()
+        self.db.analyze()
+        
         print("=== 재무제표 데이터 파싱 완료 ===")
 
 def main():
@@ -0,0 +1,324 @@
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 컬럼 별칭/항목명 → 표준 지표명
+METRIC_ALIASES = {
+    "매출액": "매출액",
+    "매출": "매출액",
+    "영업수익": "매출액",
+    "영업이익": "영업이익",
+    "순이익": "순이익",
+    "당기순이익": "순이익",
+    "반기순이익": "순이익",
+    "분기순이익": "순이익",
+    "자산총계": "자산총계",
+    "자산": "자산총계",
+    "부채총계": "부채총계",
+    "부채": "부채총계",
+    "자본총계": "자본총계",
+    "자본": "자본총계",
+    "유동자산": "유동자산",
+    "유동부채": "유동부채",
+    "이자비용": "이자비용",
+    "영업활동현금흐름": "영업활동현금흐름",
+    "영업활동순현금흐름": "영업활동현금흐름",
+    "영업활동으로인한현금흐름": "영업활동현금흐름",
+    "영업활동으로인한순현금흐름": "영업활동현금흐름",
+}
+
+# 비율명 → (분자 지표, 분모 지표, 배수, 단위)
+RATIO_DEFINITIONS = {
+    "영업이익률": ("영업이익", "매출액", 100, "%"),
+    "순이익률": ("순이익", "매출액", 100, "%"),
+    "ROE": ("순이익", "자본총계", 100, "%"),
+    "ROA": ("순이익", "자산총계", 100, "%"),
+    "부채비율": ("부채총계", "자본총계", 100, "%"),
+    "유동비율": ("유동자산", "유동부채", 100, "%"),
+    "이자보상배율": ("영업이익", "이자비용", 1, "배"),
+    "영업현금흐름/순이익": ("영업활동현금흐름", "순이익", 1, "배"),
+}
+
+# 표준 지표 → (테이블, 금액 컬럼, 항목코드 목록, 항목명 목록)
+METRIC_SOURCES = {
+    "매출액": ("income_statement", "당기_반기_누적", ["ifrs-full_Revenue"], ["매출액", "영업수익"]),
+    "영업이익": ("income_statement", "당기_반기_누적",
+             ["dart_OperatingIncomeLoss", "ifrs-full_ProfitLossFromOperatingActivities"],
+             ["영업이익", "영업이익(손실)"]),
+    "순이익": ("income_statement", "당기_반기_누적", ["ifrs-full_ProfitLoss"],
+            ["당기순이익", "반기순이익", "분기순이익", "당기순이익(손실)", "반기순이익(손실)", "분기순이익(손실)"]),
+    "이자비용": ("income_statement", "당기_반기_누적",
+             ["ifrs-full_InterestExpense", "dart_InterestExpenseFinanceExpense"], ["이자비용"]),
+    "자산총계": ("balance_sheet", "당기_반기말", ["ifrs-full_Assets"], ["자산총계"]),
+    "부채총계": ("balance_sheet", "당기_반기말", ["ifrs-full_Liabilities"], ["부채총계"]),
+    "자본총계": ("balance_sheet", "당기_반기말", ["ifrs-full_Equity"], ["자본총계"]),
+    "유동자산": ("balance_sheet", "당기_반기말", ["ifrs-full_CurrentAssets"], ["유동자산"]),
+    "유동부채": ("balance_sheet", "당기_반기말", ["ifrs-full_CurrentLiabilities"], ["유동부채"]),
+    "영업활동현금흐름": ("cash_flow_statement", "당기_반기말",
+                 ["ifrs-full_CashFlowsFromUsedInOperatingActivities"],
+                 ["영업활동현금흐름", "영업활동순현금흐름", "영업활동으로 인한 현금흐름"]),
+}
+
+# 비교 질문에서 지표가 명시되지 않았을 때 조회할 기본 지표
+DEFAULT_COMPARISON_METRICS = ["매출액", "영업이익", "순이익", "자산총계", "부채총계", "자본총계"]
+
+# 롱 포맷 결과에서 금액 컬럼으로 우선 사용할 컬럼
+VALUE_COLUMN_PRIORITY = ["당기_반기_누적", "당기_반기말", "당기", "당기_반기_3개월"]
+
+# 금액이 아닌 식별용 컬럼
+KEY_COLUMNS = {"회사명", "종목코드", "항목명", "항목코드", "결산기준일", "결산월", "재무제표종류",
+               "시장구분", "업종", "업종명", "보고서종류", "통화", "연결구분", "재무제표구분"}
+
+_TWO_PLACES = Decimal("0.01")
+
+
+def _normalize_label(label: str) -> str:
+    """컬럼명/항목명에서 공백, 로마숫자 접두어, '(손실)' 등을 제거합니다."""
+    label = re.sub(r"^[\s\dⅠ-ⅫIVX]+\.\s*", "", str(label))
+    label = re.sub(r"\((손실|이익|손익)\)", "", label)
+    return re.sub(r"\s+", "", label)
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    """'1,234,000' 같은 금액 표현을 Decimal로 변환합니다 (변환 불가 시 None)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        # 부동소수점 오차를 피하기 위해 문자열을 거쳐 변환
+        return Decimal(repr(value))
+    text = str(value).strip().replace(",", "")
+    if not text or text == "-":
+        return None
+    # 회계 표기 (1,000) → -1000
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+class FinancialRatioEngine:
+    """SQL 결과 행에 재무비율을 정확한 Decimal 연산으로 계산해 붙입니다."""
+
+    def metric_for(self, label: str) -> Optional[str]:
+        """컬럼명 또는 항목명에 해당하는 표준 지표명을 반환합니다."""
+        if label is None:
+            return None
+        return METRIC_ALIASES.get(_normalize_label(label))
+
+    def compute_ratios(self, values: Dict[str, Optional[Decimal]]) -> Dict[str, Optional[Decimal]]:
+        """표준 지표 값으로 계산 가능한 모든 비율을 계산합니다."""
+        ratios = {}
+        for name, (numerator, denominator, multiplier, _unit) in RATIO_DEFINITIONS.items():
+            num = values.get(numerator)
+            den = values.get(denominator)
+            if num is None or den is None:
+                continue
+            if den == 0:
+                ratios[name] = None
+                continue
+            ratios[name] = (num * multiplier / den).quantize(_TWO_PLACES, rounding=ROUND_HALF_UP)
+        return ratios
+
+    def extract_metrics(self, text: str) -> List[str]:
+        """질문에 언급된 지표/비율명을 찾아 조회가 필요한 표준 지표 목록을 반환합니다.
+
+        비율이 언급되면 분자/분모 지표를 포함하며, 아무것도 없으면 기본 지표를 반환합니다.
+        """
+        normalized = _normalize_label(text or "")
+        metrics = []
+        for name, (numerator, denominator, _multiplier, _unit) in RATIO_DEFINITIONS.items():
+            if _normalize_label(name).lower() in normalized.lower():
+                metrics.extend([numerator, denominator])
+        # 긴 별칭부터 확인하여 '영업이익률'이 '영업이익'으로 중복 인식되지 않도록 처리
+        remaining = normalized
+        for name in sorted(RATIO_DEFINITIONS, key=len, reverse=True):
+            remaining = remaining.replace(_normalize_label(name), " ")
+        for alias in sorted(METRIC_ALIASES, key=len, reverse=True):
+            if alias in remaining:
+                metrics.append(METRIC_ALIASES[alias])
+                remaining = remaining.replace(alias, " ")
+        metrics = [m for m in dict.fromkeys(metrics) if m in METRIC_SOURCES]
+        return metrics or list(DEFAULT_COMPARISON_METRICS)
+
+    def pivot_metric_rows(self, companies: Sequence[str], metrics: Sequence[str],
+                          rows: Sequence[Sequence]) -> Tuple[List[str], List[tuple]]:
+        """(회사명, 연결구분, 항목코드, 항목명, 금액) 행을 회사 × 지표 표로 정렬하고 비율을 붙입니다.
+
+        항목코드와 항목명이 모두 맞는 행을 우선 사용하고, 조회되지 않은 값은 None으로 둡니다.
+        연결/별도 수치가 섞이지 않도록 회사마다 지표가 가장 많이 조회된 기준 하나만 사용합니다
+        (같으면 연결 우선).
+        """
+        # (회사, 기준, 지표) → (우선순위, 값); 우선순위가 낮을수록 우선
+        best: Dict[Tuple[str, str, str], Tuple[int, Decimal]] = {}
+        for company, basis, item_code, item_name, amount in rows:
+            value = to_decimal(amount)
+            if value is None:
+                continue
+            for metric in metrics:
+                _table, _column, codes, names = METRIC_SOURCES[metric]
+                code_match = item_code in codes
+                name_match = item_name in names
+                if not (code_match or name_match):
+                    continue
+                priority = 0 if code_match and name_match else (1 if code_match else 2)
+                key = (company, basis, metric)
+                if key not in best or priority < best[key][0]:
+                    best[key] = (priority, value)
+
+        found: Dict[Tuple[str, str], int] = {}
+        for company, basis, _metric in best:
+            found[(company, basis)] = found.get((company, basis), 0) + 1
+
+        ratio_names = self._applicable_ratios(metrics, [])
+        columns = ["회사명", "연결구분"] + list(metrics) + [self.ratio_column(name) for name in ratio_names]
+        table = []
+        for company in companies:
+            bases = [basis for (name, basis) in found if name == company]
+            basis = max(bases, key=lambda b: (found[(company, b)], b == "연결")) if bases else None
+            values = {
+                metric: best[(company, basis, metric)][1]
+                for metric in metrics if (company, basis, metric) in best
+            }
+            ratios = self.compute_ratios(values)
+            table.append(
+                (company, basis)
+                + tuple(values.get(metric) for metric in metrics)
+                + tuple(ratios.get(name) for name in ratio_names)
+            )
+        return columns, table
+
+    def ratio_column(self, name: str) -> str:
+        """단위를 포함한 비율 컬럼명을 반환합니다 (예: '영업이익률(%)')."""
+        return f"{name}({RATIO_DEFINITIONS[name][3]})"
+
+    def _applicable_ratios(self, metrics: Sequence[str], existing: Sequence[str]) -> List[str]:
+        """주어진 지표로 계산 가능하고 결과에 아직 없는 비율 목록을 반환합니다."""
+        existing_labels = {_normalize_label(c) for c in existing}
+        names = []
+        for name, (numerator, denominator, _multiplier, _unit) in RATIO_DEFINITIONS.items():
+            if numerator not in metrics or denominator not in metrics:
+                continue
+            if _normalize_label(name) in existing_labels:
+                continue
+            names.append(name)
+        return names
+
+    def attach_ratios(self, columns: Sequence[str], rows: Sequence[Sequence]) -> Tuple[List[str], List[tuple]]:
+        """와이드 포맷 결과(지표별 컬럼)에 비율 컬럼을 추가합니다.
+
+        계산 가능한 비율이 없으면 입력을 그대로 반환합니다.
+        """
+        metric_index = {}
+        for idx, column in enumerate(columns):
+            metric = self.metric_for(column)
+            if metric and metric not in metric_index:
+                metric_index[metric] = idx
+
+        ratio_names = self._applicable_ratios(list(metric_index), columns)
+        if not ratio_names:
+            return list(columns), [tuple(row) for row in rows]
+
+        new_columns = list(columns) + [self.ratio_column(name) for name in ratio_names]
+        new_rows = []
+        for row in rows:
+            values = {metric: to_decimal(row[idx]) for metric, idx in metric_index.items()}
+            ratios = self.compute_ratios(values)
+            new_rows.append(tuple(row) + tuple(ratios.get(name) for name in ratio_names))
+        return new_columns, new_rows
+
+    def build_ratio_table(self, columns: Sequence[str], rows: Sequence[Sequence]) -> Tuple[List[str], List[tuple]]:
+        """롱 포맷 결과(회사명, 항목명, 금액)를 회사별로 피벗하여 지표와 비율 표를 만듭니다.
+
+        결과에 연결구분 컬럼이 있으면 (회사명, 연결구분)마다 따로 피벗하여 연결/별도 수치가 섞이지 않게 합니다.
+        계산 가능한 비율이 없으면 빈 표를 반환합니다.
+        """
+        if "항목명" not in columns:
+            return [], []
+        item_idx = list(columns).index("항목명")
+        key_columns = [column for column in ("회사명", "연결구분") if column in columns]
+        key_indexes = [list(columns).index(column) for column in key_columns]
+        value_idx = self._find_value_column(columns, rows)
+        if value_idx is None:
+            return [], []
+
+        per_key: Dict[tuple, Dict[str, Decimal]] = {}
+        for row in rows:
+            metric = self.metric_for(row[item_idx])
+            value = to_decimal(row[value_idx])
+            if metric is None or value is None:
+                continue
+            key = tuple(row[idx] for idx in key_indexes)
+            # 같은 지표가 여러 행이면 먼저 나온 값을 사용
+            per_key.setdefault(key, {}).setdefault(metric, value)
+
+        found_metrics = [m for m in dict.fromkeys(METRIC_ALIASES.values())
+                         if any(m in values for values in per_key.values())]
+        ratio_names = self._applicable_ratios(found_metrics, [])
+        if not ratio_names:
+            return [], []
+
+        table_columns = (key_columns or ["회사명"]) + found_metrics + [self.ratio_column(name) for name in ratio_names]
+        table_rows = []
+        for key, values in per_key.items():
+            ratios = self.compute_ratios(values)
+            table_rows.append(
+                (key or ("",))
+                + tuple(values.get(metric) for metric in found_metrics)
+                + tuple(ratios.get(name) for name in ratio_names)
+            )
+        return table_columns, table_rows
+
+    def _find_value_column(self, columns: Sequence[str], rows: Sequence[Sequence]) -> Optional[int]:
+        """롱 포맷 결과에서 금액 컬럼의 위치를 찾습니다."""
+        for preferred in VALUE_COLUMN_PRIORITY:
+            if preferred in columns:
+                return list(columns).index(preferred)
+        for idx, column in enumerate(columns):
+            if column in KEY_COLUMNS:
+                continue
+            if any(to_decimal(row[idx]) is not None for row in rows):
+                return idx
+        return None
+
+    def format_table(self, columns: Sequence[str], rows: Sequence[Sequence]) -> str:
+        """결과 표를 LLM 프롬프트용 텍스트로 변환합니다 (금액은 천 단위 쉼표)."""
+        lines = [" | ".join(str(c) for c in columns)]
+        for row in rows:
+            lines.append(" | ".join(self._format_value(value) for value in row))
+        return "\n".join(lines)
+
+    def _format_value(self, value) -> str:
+        """값 하나를 문자열로 변환합니다."""
+        if value is None:
+            return "-"
+        if isinstance(value, Decimal):
+            if value == value.to_integral_value() and value.as_tuple().exponent >= 0:
+                return f"{int(value):,}"
+            return f"{value:,}"
+        if isinstance(value, int) and not isinstance(value, bool):
+            return f"{value:,}"
+        return str(value)
+
+    def enrich_result(self, columns: Sequence[str], rows: Sequence[Sequence]) -> str:
+        """SQL 결과에 재무비율을 붙여 프롬프트용 텍스트로 반환합니다."""
+        if not rows:
+            return "조회 결과가 없습니다."
+
+        columns, rows = self.attach_ratios(columns, rows)
+        text = self.format_table(columns, rows)
+
+        ratio_columns, ratio_rows = self.build_ratio_table(columns, rows)
+        if ratio_rows:
+            text += "\n\n[재무비율 (자동 계산)]\n" + self.format_table(ratio_columns, ratio_rows)
+        return text
+
+
+# 전역 비율 엔진 인스턴스
+ratio_engine = FinancialRatioEngine()
@@ -0,0 +1,134 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+from conversation_memory import count_tokens
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+|\n+")
+_TOKEN = re.compile(r"[0-9A-Za-z]+|[가-힣]+")
+
+
+def split_sentences(text: str, min_length: int = 10) -> List[str]:
+    """텍스트를 문장 단위로 나눕니다 (min_length 글자 미만 조각은 제외)."""
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text or "")]
+    return [s for s in sentences if len(s) >= min_length]
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰을 만듭니다.
+
+    한글은 조사가 붙어도 매칭되도록 음절 2-gram으로, 영문/숫자는 소문자 단어로 나눕니다.
+    """
+    tokens = []
+    for word in _TOKEN.findall((text or "").lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class PassageReranker:
+    """웹 검색 결과를 문장 단위로 BM25 점수화하여 토큰 예산 안의 상위 문장만 남깁니다.
+
+    질문에서 확인된 회사명/재무 항목명이 포함된 문장은 가산점을 받습니다.
+    LLM이나 임베딩 호출 없이 프로세스 안에서 계산합니다.
+    """
+
+    def __init__(self, token_budget: int = 600, k1: float = 1.5, b: float = 0.75, boost: float = 1.5):
+        self.token_budget = token_budget
+        self.k1 = k1
+        self.b = b
+        self.boost = boost
+
+    def rank(self, passages: Sequence[str], query: str, boost_terms: Sequence[str] = ()) -> List[Tuple[float, int]]:
+        """(점수, 문장 인덱스)를 점수 내림차순으로 반환합니다."""
+        if not passages:
+            return []
+        docs = [tokenize(p) for p in passages]
+        avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+        doc_freq = Counter(token for d in docs for token in set(d))
+        query_tokens = set(tokenize(query))
+        terms = [t.lower() for t in boost_terms if t]
+
+        scored = []
+        for index, (passage, doc) in enumerate(zip(passages, docs)):
+            tf = Counter(doc)
+            score = 0.0
+            for token in query_tokens:
+                if token not in tf:
+                    continue
+                idf = math.log(1 + (len(docs) - doc_freq[token] + 0.5) / (doc_freq[token] + 0.5))
+                norm = tf[token] + self.k1 * (1 - self.b + self.b * len(doc) / avg_len)
+                score += idf * tf[token] * (self.k1 + 1) / norm
+            lowered = passage.lower()
+            score += self.boost * sum(1 for term in terms if term in lowered)
+            scored.append((score, index))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored
+
+    def select(self, passages: Sequence[str], query: str, boost_terms: Sequence[str] = (),
+               token_budget: int = None) -> List[int]:
+        """예산 안에 들어가는 상위 문장의 인덱스를 원래 순서대로 반환합니다."""
+        budget = self.token_budget if token_budget is None else token_budget
+        selected = []
+        used = 0
+        for score, index in self.rank(passages, query, boost_terms):
+            if score <= 0:
+                break
+            tokens = count_tokens(passages[index])
+            if used + tokens > budget:
+                continue
+            selected.append(index)
+            used += tokens
+        return sorted(selected)
+
+    def compress_web_result(self, web_result: str, query: str, boost_terms: Sequence[str] = ()) -> str:
+        """search_web 형식("제목/내용/출처" 블록)의 결과에서 관련 문장만 남깁니다.
+
+        선택된 문장이 하나도 없는 블록은 제외하고, 전체가 예산 이내이면 그대로 반환합니다.
+        """
+        if count_tokens(web_result) <= self.token_budget:
+            return web_result
+
+        blocks = self._parse_blocks(web_result)
+        if not blocks:
+            return web_result
+
+        passages, owners = [], []
+        for block_index, block in enumerate(blocks):
+            for sentence in split_sentences(block["content"]):
+                passages.append(sentence)
+                owners.append(block_index)
+
+        selected = self.select(passages, query, boost_terms)
+        if not selected:
+            return web_result
+
+        kept = {}
+        for index in selected:
+            kept.setdefault(owners[index], []).append(passages[index])
+
+        formatted = []
+        for block_index, block in enumerate(blocks):
+            if block_index in kept:
+                content = " ".join(kept[block_index])
+                formatted.append(f"제목: {block['title']}\n내용: {content}\n출처: {block['url']}\n")
+        return "\n".join(formatted)
+
+    def _parse_blocks(self, web_result: str) -> List[dict]:
+        """"제목: / 내용: / 출처:" 형식의 텍스트를 블록 목록으로 변환합니다."""
+        blocks = []
+        pattern = re.compile(r"제목: (.*?)\n내용: (.*?)\n출처: (.*?)\n", re.S)
+        for title, content, url in pattern.findall(web_result):
+            blocks.append({"title": title, "content": content, "url": url})
+        return blocks
+
+
+def create_passage_reranker() -> PassageReranker:
+    """환경 변수 설정으로 PassageReranker를 생성합니다."""
+    return PassageReranker(token_budget=int(os.getenv("RERANK_TOKEN_BUDGET", "600")))
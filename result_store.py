@@ -0,0 +1,72 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+
+class ResultStore:
+    """도구 실행 결과(text2sql 답변, 웹 검색 결과 등)를 한 번만 저장하는 사이드 저장소입니다.
+
+    그래프 상태와 체크포인트에는 결과 전문 대신 참조 ID만 남기고,
+    프롬프트를 만들 때 resolve()로 원문을 꺼내 씁니다.
+    동일한 내용은 같은 ID를 가지므로 중복 저장되지 않습니다.
+    """
+
+    MISSING_TEXT = "(만료된 결과입니다)"
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # ref -> text (LRU 순서)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        """결과를 저장하고 참조 ID를 반환합니다."""
+        ref = "res_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            if ref in self._entries:
+                self._entries.move_to_end(ref)
+                return ref
+            self._entries[ref] = text
+            self._bytes += len(text.encode("utf-8"))
+            self._evict()
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """참조 ID에 해당하는 결과를 반환합니다 (없으면 None)."""
+        with self._lock:
+            text = self._entries.get(ref)
+            if text is not None:
+                self._entries.move_to_end(ref)
+            return text
+
+    def resolve(self, refs: Iterable[str]) -> List[str]:
+        """참조 ID 목록을 결과 텍스트 목록으로 변환합니다."""
+        texts = []
+        for ref in refs or []:
+            text = self.get(ref)
+            texts.append(text if text is not None else self.MISSING_TEXT)
+        return texts
+
+    @property
+    def total_bytes(self) -> int:
+        """저장된 결과의 전체 크기(bytes)를 반환합니다."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self):
+        """항목 수나 크기 상한을 넘으면 가장 오래 사용되지 않은 결과부터 삭제합니다."""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _ref, text = self._entries.popitem(last=False)
+            self._bytes -= len(text.encode("utf-8"))
+
+
+# 전역 결과 저장소 인스턴스
+result_store = ResultStore(
+    max_entries=int(os.getenv("RESULT_STORE_MAX_ENTRIES", "5000")),
+    max_bytes=int(os.getenv("RESULT_STORE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
@@ -0,0 +1,218 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from database import FinancialDatabase, db as financial_db
+from tracing import tracer
+
+
+# 지표 외에 조건으로 쓸 수 있는 회사 차원 컬럼 (정수 코드 배열로 보관)
+CATEGORY_COLUMNS = ("시장구분", "업종명", "업종구분")
+
+# 결과 행에 항상 포함하는 회사 정보
+COMPANY_COLUMNS = ("회사명", "종목코드") + CATEGORY_COLUMNS
+
+NUMERIC_OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "=": np.equal,
+    "!=": np.not_equal,
+}
+
+DEFAULT_LIMIT = 50
+
+
+def _parse_filter(condition) -> Tuple[str, str, object]:
+    """(지표, 연산자, 값) 튜플 또는 {"metric", "op", "value"} 딕셔너리를 튜플로 바꿉니다."""
+    if isinstance(condition, dict):
+        return condition.get("metric"), condition.get("op", "=="), condition.get("value")
+    if isinstance(condition, (list, tuple)) and len(condition) == 3:
+        return tuple(condition)
+    raise ValueError(f"조건 형식이 올바르지 않습니다: {condition!r} ((지표, 연산자, 값) 형식)")
+
+
+def _parse_sort(sort: Optional[str]) -> Tuple[Optional[str], bool]:
+    """'-ROE'(내림차순) / 'ROE'(오름차순)를 (지표, 내림차순 여부)로 바꿉니다."""
+    if not sort:
+        return None, False
+    if sort.startswith("-"):
+        return sort[1:], True
+    return sort.lstrip("+"), False
+
+
+class MetricScreener:
+    """metric_facts의 회사별 지표를 NumPy 컬럼 배열로 올려 두고 조건 검색을 수행합니다.
+
+    (기간말, 연결구분)마다 지표 × 회사 행렬(값이 없으면 NaN)을 한 번 적재하고, 여러 조건을
+    불리언 마스크의 AND로 계산합니다. LLM이나 SQL을 거치지 않으므로 전 종목 다중 조건 검색이
+    마이크로초 단위로 끝납니다. 데이터 버전이 바뀌면 새 인스턴스로 교체합니다 (swap_screener).
+
+    ROE·ROA 등 손익 기반 비율은 기간말까지의 누적 손익으로 계산한 기간 비율이며 연환산하지 않습니다
+    (반기 기준이면 6개월 수익률).
+    """
+
+    def __init__(self, database: FinancialDatabase = None):
+        self.database = database or financial_db
+        self.data_version = self.database.load_manifest().get("data_version", "")
+        self.load()
+
+    def load(self):
+        """회사 차원과 지표 값을 컬럼 배열로 적재합니다."""
+        with tracer.span("screener.load", data_version=self.data_version) as span:
+            companies, values = self.database.get_screening_data()
+
+            index = {row[0]: position for position, row in enumerate(companies)}
+            self.company_columns: Dict[str, np.ndarray] = {
+                column: np.array([row[offset] for row in companies], dtype=object)
+                for offset, column in enumerate(COMPANY_COLUMNS, start=1)
+            }
+            # 범주형 조건은 정수 코드 비교로 처리
+            self.category_codes: Dict[str, Dict[str, int]] = {}
+            self.category_arrays: Dict[str, np.ndarray] = {}
+            for column in CATEGORY_COLUMNS:
+                labels = self.company_columns[column]
+                codes = {label: code for code, label in enumerate(sorted({v for v in labels if v is not None}))}
+                self.category_codes[column] = codes
+                self.category_arrays[column] = np.array([codes.get(v, -1) for v in labels], dtype=np.int32)
+
+            self.metrics: List[str] = sorted({row[0] for row in values})
+            metric_index = {metric: position for position, metric in enumerate(self.metrics)}
+            self.panels: Dict[Tuple[str, str], np.ndarray] = {}
+            for metric, period_end, basis, company_id, value in values:
+                panel = self.panels.get((period_end, basis))
+                if panel is None:
+                    panel = np.full((len(self.metrics), len(companies)), np.nan)
+                    self.panels[(period_end, basis)] = panel
+                panel[metric_index[metric], index[company_id]] = value
+            self.metric_index = metric_index
+            self.period_ends = sorted({period_end for period_end, _ in self.panels})
+            span.set(companies=len(companies), metrics=len(self.metrics), panels=len(self.panels))
+
+        print(f"스크리닝 데이터를 적재했습니다: 회사 {len(companies)}개, 지표 {len(self.metrics)}개, "
+              f"기간 {len(self.period_ends)}개")
+
+    def _mask(self, panel: np.ndarray, metric: str, op: str, value) -> np.ndarray:
+        """조건 하나의 불리언 마스크를 계산합니다 (값이 없는 회사는 제외)."""
+        if metric in self.category_arrays:
+            codes = self.category_codes[metric]
+            array = self.category_arrays[metric]
+            if op == "in":
+                return np.isin(array, [codes.get(v, -2) for v in value])
+            if op in ("==", "="):
+                return array == codes.get(value, -2)
+            if op == "!=":
+                return (array != codes.get(value, -2)) & (array >= 0)
+            raise ValueError(f"{metric} 조건에는 ==, !=, in 연산자만 사용할 수 있습니다: {op}")
+
+        if metric not in self.metric_index:
+            raise ValueError(f"알 수 없는 지표입니다: {metric} (사용 가능: {', '.join(self.metrics + list(CATEGORY_COLUMNS))})")
+        column = panel[self.metric_index[metric]]
+        if op == "between":
+            low, high = value
+            return (column >= low) & (column <= high)
+        if op == "in":
+            return np.isin(column, list(value))
+        if op not in NUMERIC_OPERATORS:
+            raise ValueError(f"지원하지 않는 연산자입니다: {op} (사용 가능: {', '.join(NUMERIC_OPERATORS)}, between, in)")
+        mask = NUMERIC_OPERATORS[op](column, float(value))
+        # NaN != 값은 참이므로 값이 없는 회사를 따로 제외
+        return mask & ~np.isnan(column) if op == "!=" else mask
+
+    def screen(self, filters: Iterable = (), sort: str = None, limit: int = DEFAULT_LIMIT,
+               basis: str = "연결", period: str = None, columns: Iterable[str] = ()) -> Dict:
+        """조건에 맞는 회사를 찾습니다.
+
+        Args:
+            filters: (지표, 연산자, 값) 또는 {"metric", "op", "value"} 리스트, 모두 만족하는 회사만 반환
+                     (연산자: >, >=, <, <=, ==, !=, between, in / 시장구분·업종명·업종구분은 ==, !=, in)
+            sort: 정렬 지표 ('-ROE'는 내림차순, 'ROE'는 오름차순, 값이 없는 회사는 뒤로)
+            limit: 최대 반환 행 수
+            basis: '연결' 또는 '별도'
+            period: 기간말 (YYYY-MM-DD, 없으면 최신)
+            columns: 결과에 더 포함할 지표 (조건·정렬 지표는 항상 포함)
+
+        Returns:
+            {"data_version", "period", "basis", "count"(조건을 만족한 전체 회사 수), "rows"} 딕셔너리
+        """
+        period = period or (self.period_ends[-1] if self.period_ends else None)
+        panel = self.panels.get((period, basis))
+        if panel is None:
+            raise ValueError(f"{period} {basis} 기준 지표 데이터가 없습니다 (기간말: {', '.join(self.period_ends)})")
+
+        conditions = [_parse_filter(condition) for condition in filters]
+        mask = np.ones(panel.shape[1], dtype=bool)
+        for metric, op, value in conditions:
+            mask &= self._mask(panel, metric, op, value)
+        positions = np.flatnonzero(mask)
+
+        sort_metric, descending = _parse_sort(sort)
+        if sort_metric:
+            if sort_metric not in self.metric_index:
+                raise ValueError(f"알 수 없는 정렬 지표입니다: {sort_metric}")
+            keys = panel[self.metric_index[sort_metric], positions]
+            # NaN은 argsort에서 항상 뒤로 가므로 내림차순은 부호를 바꿔 정렬
+            positions = positions[np.argsort(-keys if descending else keys, kind="stable")]
+        selected = positions[:max(int(limit), 0)]
+
+        shown = [m for m, _, _ in conditions if m in self.metric_index]
+        shown = list(dict.fromkeys(shown + ([sort_metric] if sort_metric else []) + list(columns)))
+        unknown = [m for m in shown if m not in self.metric_index]
+        if unknown:
+            raise ValueError(f"알 수 없는 지표입니다: {', '.join(unknown)}")
+
+        # 선택된 행만 컬럼 단위로 꺼내 파이썬 값으로 변환 (NaN → None)
+        values = {column: self.company_columns[column][selected].tolist() for column in COMPANY_COLUMNS}
+        for metric in shown:
+            column = panel[self.metric_index[metric], selected]
+            values[metric] = np.where(np.isnan(column), None, column).tolist()
+        names = list(values)
+        rows = [dict(zip(names, row)) for row in zip(*values.values())]
+
+        return {
+            "data_version": self.data_version,
+            "period": period,
+            "basis": basis,
+            "count": int(len(positions)),
+            "rows": rows,
+        }
+
+
+# 전역 스크리너 인스턴스 (처음 사용할 때 적재)
+_screener_instance = None
+_screener_lock = threading.Lock()
+
+
+def get_screener(force_reload=False) -> MetricScreener:
+    """스크리너 인스턴스를 반환합니다.
+
+    Args:
+        force_reload: True이면 기존 인스턴스를 무시하고 다시 적재
+    """
+    global _screener_instance
+    if _screener_instance is None or force_reload:
+        with _screener_lock:
+            if _screener_instance is None or force_reload:
+                _screener_instance = MetricScreener()
+    return _screener_instance
+
+
+def swap_screener(new_instance: MetricScreener) -> MetricScreener:
+    """전역 스크리너를 새 데이터 버전의 인스턴스로 교체하고 이전 인스턴스를 반환합니다."""
+    global _screener_instance
+    with _screener_lock:
+        previous, _screener_instance = _screener_instance, new_instance
+    return previous
+
+
+def screen(filters: Iterable = (), sort: str = None, limit: int = DEFAULT_LIMIT,
+           basis: str = "연결", period: str = None, columns: Iterable[str] = ()) -> Dict:
+    """전역 스크리너로 조건 검색을 수행합니다 (MetricScreener.screen 참고).
+
+    예: screen([("ROE", ">=", 5), ("시장구분", "==", "유가증권시장상장법인")], sort="-ROE", limit=20)
+        (ROE는 연환산하지 않은 기간 비율이므로 반기 기준 5%는 연 10% 안팎에 해당)
+    """
+    return get_screener().screen(filters, sort=sort, limit=limit, basis=basis, period=period, columns=columns)
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+import pytest
+
+# 모듈 import 시 만들어지는 전역 DB가 작업 디렉토리의 financial_data.db를 건드리지 않도록 임시 경로 사용
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="financial_test_"), "financial_data.db"))
+os.environ.setdefault("TRACE_SINK", "off")
+
+from database import FinancialDatabase  # noqa: E402
+from parser import FinancialDataParser  # noqa: E402
+
+
+# DART 재무제표 TSV의 회사 컬럼 (재무제표종류 다음, 결산기준일 앞)
+COMPANIES = {
+    # 회사명: (종목코드, 시장구분, 업종, 업종명)
+    "가전자": ("[000001]", "유가증권시장상장법인", "264", "전자부품"),
+    "나반도체": ("[000002]", "유가증권시장상장법인", "264", "전자부품"),
+    "다바이오": ("[000003]", "코스닥시장상장법인", "212", "의약품"),
+    "라은행": ("[000004]", "유가증권시장상장법인", "641", "은행"),
+}
+
+
+class DartData:
+    """임시 data/ 디렉토리에 DART 형식의 재무제표 TSV를 쓰고 DB에 적재하는 테스트 도우미입니다."""
+
+    def __init__(self, root):
+        self.root = root
+
+    @staticmethod
+    def row(statement_type: str, company: str, item_code: str, item_name: str, *amounts,
+            settlement_date: str = "2025-06-30", report_type: str = "반기보고서", currency: str = "KRW") -> list:
+        """TSV 한 행을 만듭니다 (금액은 '1,234' 형식, None은 빈 칸)."""
+        code, market, industry, industry_name = COMPANIES[company]
+        return ([statement_type, code, company, market, industry, industry_name, "12",
+                 settlement_date, report_type, currency, item_code, item_name]
+                + ["" if amount is None else f"{amount:,}" for amount in amounts])
+
+    def write(self, statement_dir: str, file_name: str, rows: list):
+        """data/<statement_dir>/<file_name>에 헤더와 행을 씁니다."""
+        directory = self.root / statement_dir
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = ["재무제표종류\t종목코드\t회사명"] + ["\t".join(row) for row in rows]
+        (directory / file_name).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def remove(self, statement_dir: str, file_name: str):
+        (self.root / statement_dir / file_name).unlink()
+
+    def load(self, database: FinancialDatabase, periods: list = None) -> FinancialDataParser:
+        """쓴 파일을 database에 적재합니다 (파생 테이블 포함)."""
+        parser = FinancialDataParser(str(self.root), database)
+        parser.parse_all_financial_statements(periods)
+        return parser
+
+
+@pytest.fixture
+def dart_data(tmp_path):
+    return DartData(tmp_path / "data")
+
+
+@pytest.fixture
+def database(tmp_path):
+    return FinancialDatabase(str(tmp_path / "financial_data.db"))
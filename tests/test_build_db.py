@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import build_db
+from build_db import build_database, collect_source_files, compute_data_version, write_manifest
+from database import FinancialDatabase, manifest_path
+
+
+INCOME = ("income_statements", "2025_반기보고서_02_손익계산서_연결_20251001.txt")
+INCOME_TYPE = "손익계산서, 기능별 분류 - 연결"
+
+
+@pytest.fixture
+def source(dart_data):
+    dart_data.write(*INCOME, [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 70, 120, 60, 100, 210, 190),
+        dart_data.row(INCOME_TYPE, "나반도체", "ifrs-full_Revenue", "매출액", 30, 50, 20, 40, 90, 80),
+    ])
+    return dart_data
+
+
+@pytest.fixture
+def build(monkeypatch, source, tmp_path):
+    """build_db.main()을 인자와 함께 실행하는 함수 (DuckDB 파일 생성은 호출만 기록)"""
+    duckdb_builds = []
+    monkeypatch.setattr(build_db, "build_duckdb", duckdb_builds.append)
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", ["build_db.py", "--data-dir", str(source.root),
+                                          "--output-dir", str(tmp_path / "dist"), *args])
+        build_db.main()
+        return duckdb_builds
+
+    return run
+
+
+def test_data_version_follows_file_contents(source):
+    files = collect_source_files(str(source.root))
+    version = compute_data_version(files)
+
+    assert [entry["path"] for entry in files] == [os.path.join(*INCOME)]
+    assert compute_data_version(collect_source_files(str(source.root))) == version
+
+    source.write(*INCOME, [source.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 1, 1, 1, 1, 1, 1)])
+    assert compute_data_version(collect_source_files(str(source.root))) != version
+
+
+def test_manifest_describes_the_built_database(source, tmp_path):
+    files = collect_source_files(str(source.root))
+    output_path = str(tmp_path / "financial_data-test.db")
+
+    manifest = build_database(str(source.root), output_path, "test", files)
+    path = write_manifest(manifest, output_path)
+
+    assert path == manifest_path(output_path)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == manifest
+    assert not os.path.exists(output_path + ".building")
+    assert manifest["data_version"] == "test"
+    assert manifest["database"] == "financial_data-test.db"
+    assert manifest["database_bytes"] == os.path.getsize(output_path)
+    assert manifest["database_sha256"] == build_db._sha256_file(output_path)
+    assert manifest["report_periods"] == ["2025_반기보고서"]
+    assert manifest["row_counts"]["income_statement"] == 2
+    assert manifest["row_counts"]["companies"] == 2
+    assert manifest["source_files"] == files
+
+
+def test_existing_data_version_is_not_rebuilt(build, source, tmp_path, monkeypatch):
+    assert len(build()) == 1
+    version = compute_data_version(collect_source_files(str(source.root)))
+    assert sorted(os.listdir(tmp_path / "dist")) == [f"financial_data-{version}.db",
+                                                     f"financial_data-{version}.manifest.json"]
+
+    rebuilds = []
+    original = build_db.build_database
+    monkeypatch.setattr(build_db, "build_database", lambda *args: rebuilds.append(args) or original(*args))
+
+    # 같은 버전이면 데이터베이스는 그대로 두고, 없는 DuckDB 파일만 다시 만듦
+    assert len(build()) == 2
+    assert rebuilds == []
+
+    build("--force")
+    assert len(rebuilds) == 1
+
+
+def test_read_only_open_does_not_write(source, tmp_path):
+    output_path = str(tmp_path / "financial_data.db")
+    write_manifest(build_database(str(source.root), output_path, "test", collect_source_files(str(source.root))),
+                   output_path)
+    before = os.path.getmtime(output_path)
+
+    database = FinancialDatabase(output_path, read_only=True)
+
+    assert database.load_manifest()["data_version"] == "test"
+    assert database.get_report_periods() == [(2025, "반기보고서")]
+    conn = database.get_connection()
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        conn.execute("DELETE FROM companies")
+    conn.close()
+    assert os.path.getmtime(output_path) == before
+    assert sorted(os.listdir(tmp_path)) == ["data", "financial_data.db", "financial_data.manifest.json"]
+
+
+def test_read_only_open_does_not_create_missing_file(tmp_path):
+    database = FinancialDatabase(str(tmp_path / "missing.db"), read_only=True)
+
+    with pytest.raises(sqlite3.OperationalError):
+        database.get_connection()
+    assert not os.path.exists(tmp_path / "missing.db")
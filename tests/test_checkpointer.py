@@ -0,0 +1,86 @@
+import operator
+import time
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from checkpointer import BoundedMemorySaver
+
+
+class _State(TypedDict):
+    messages: Annotated[List[str], operator.add]
+
+
+def _graph(saver):
+    builder = StateGraph(_State)
+    builder.add_node("echo", lambda state: {"messages": [f"응답 {len(state['messages'])}"]})
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=saver)
+
+
+def _ask(graph, thread_id, text="질문"):
+    config = {"configurable": {"thread_id": thread_id}}
+    return graph.invoke({"messages": [text]}, config)
+
+
+def test_keeps_latest_checkpoints_per_thread():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=3)
+    graph = _graph(saver)
+    for _ in range(5):
+        result = _ask(graph, "t1")
+
+    assert len(saver.storage["t1"][""]) == 3
+    # 오래된 체크포인트를 지워도 최신 상태는 그대로 이어짐
+    assert len(result["messages"]) == 10
+    # 남은 체크포인트가 참조하지 않는 blob은 남지 않음
+    referenced = set()
+    for saved_checkpoint, _metadata, _parent_id in saver.storage["t1"][""].values():
+        versions = saver.serde.loads_typed(saved_checkpoint)["channel_versions"]
+        referenced.update(("t1", "", channel, version) for channel, version in versions.items())
+    assert set(saver.blobs) <= referenced
+
+
+def test_evicts_least_recently_used_thread():
+    saver = BoundedMemorySaver(max_threads=2)
+    graph = _graph(saver)
+    _ask(graph, "a")
+    _ask(graph, "b")
+    _ask(graph, "a")
+    _ask(graph, "c")
+
+    assert saver.active_threads == 2
+    assert "b" not in saver.storage
+    assert set(saver.storage) == {"a", "c"}
+
+
+def test_expires_idle_threads():
+    saver = BoundedMemorySaver(ttl_seconds=0.05)
+    graph = _graph(saver)
+    _ask(graph, "old")
+    time.sleep(0.1)
+    _ask(graph, "new")
+
+    assert "old" not in saver.storage
+    assert saver.active_threads == 1
+
+
+def test_byte_limit_keeps_current_thread():
+    saver = BoundedMemorySaver(max_bytes=1)
+    graph = _graph(saver)
+    _ask(graph, "a")
+    _ask(graph, "b")
+
+    assert set(saver.storage) == {"b"}
+    assert saver.total_bytes > 0
+
+
+def test_delete_thread_drops_everything():
+    saver = BoundedMemorySaver()
+    graph = _graph(saver)
+    _ask(graph, "a")
+    saver.delete_thread("a")
+
+    assert saver.active_threads == 0
+    assert saver.total_bytes == 0
+    assert not saver.blobs and not saver.writes
@@ -0,0 +1,129 @@
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph.message import add_messages
+
+from conversation_memory import ConversationMemory, count_tokens, truncate_to_tokens
+from graph import FinancialAnalysisGraph
+
+
+class _StubSummarizer:
+    """받은 프롬프트를 기록하고 고정된 요약을 돌려주는 LLM 대역"""
+
+    def __init__(self, summary="요약: 가전자 매출액 조회", error=None):
+        self.summary = summary
+        self.error = error
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return AIMessage(content=self.summary)
+
+
+def _turn(index, words=1):
+    return [HumanMessage(f"질문{index} " + "매출액 " * words, id=f"human-{index}"),
+            AIMessage(f"답변{index} " + "영업이익 " * words, id=f"ai-{index}")]
+
+
+def _tokens(messages):
+    return sum(count_tokens(message.content) for message in messages)
+
+
+def _ids(messages):
+    return [message.id for message in messages]
+
+
+def test_history_within_budget_is_kept_without_summarizing():
+    llm = _StubSummarizer()
+    history = _turn(1) + _turn(2)
+
+    summary, kept, folded = ConversationMemory(llm, max_recent_turns=3).compact(history, "")
+
+    assert (summary, kept, folded) == ("", history, [])
+    assert llm.prompts == []
+
+
+def test_turns_beyond_recent_limit_are_folded_into_summary():
+    llm = _StubSummarizer()
+    history = _turn(1) + _turn(2) + _turn(3)
+
+    summary, kept, folded = ConversationMemory(llm, max_recent_turns=2).compact(history, "기존 요약")
+
+    assert summary == "요약: 가전자 매출액 조회"
+    assert _ids(kept) == ["human-2", "ai-2", "human-3", "ai-3"]
+    assert _ids(folded) == ["human-1", "ai-1"]
+    # 기존 요약과 제거되는 턴만 요약 프롬프트에 들어감
+    assert len(llm.prompts) == 1
+    assert "기존 요약" in llm.prompts[0] and "User: 질문1" in llm.prompts[0] and "Bot: 답변1" in llm.prompts[0]
+    assert "질문2" not in llm.prompts[0]
+
+
+def test_token_budget_folds_older_turns_first():
+    history = _turn(1, words=40) + _turn(2, words=40) + _turn(3, words=40)
+    budget = _tokens(_turn(3, words=40)) + _tokens(_turn(2, words=40)) - 1
+
+    _summary, kept, folded = ConversationMemory(_StubSummarizer(), token_budget=budget).compact(history, "")
+
+    assert _ids(kept) == ["human-3", "ai-3"]
+    assert _ids(folded) == ["human-1", "ai-1", "human-2", "ai-2"]
+
+
+def test_summary_counts_against_the_budget():
+    history = _turn(1, words=10) + _turn(2, words=10)
+    summary = "이전 요약 " * 20
+    budget = _tokens(history)
+
+    assert ConversationMemory(_StubSummarizer(), token_budget=budget).compact(history, "")[2] == []
+    assert _ids(ConversationMemory(_StubSummarizer(), token_budget=budget).compact(history, summary)[2]) == [
+        "human-1", "ai-1"]
+
+
+def test_latest_turn_is_kept_even_over_budget():
+    history = _turn(1, words=200)
+
+    _summary, kept, folded = ConversationMemory(_StubSummarizer(), token_budget=10).compact(history, "")
+
+    assert (_ids(kept), folded) == (["human-1", "ai-1"], [])
+
+
+def test_summarizer_failure_keeps_transcript_within_summary_budget():
+    llm = _StubSummarizer(error=RuntimeError("rate limited"))
+    history = _turn(1, words=100) + _turn(2)
+
+    summary, _kept, folded = ConversationMemory(llm, max_recent_turns=1, summary_token_budget=20).compact(history, "")
+
+    assert _ids(folded) == ["human-1", "ai-1"]
+    old_turn = _turn(1, words=100)
+    transcript = f"User: {old_turn[0].content}\nBot: {old_turn[1].content}"
+    assert summary == truncate_to_tokens(transcript, 20)
+
+
+def test_build_context_truncates_each_message_to_its_share():
+    memory = ConversationMemory(_StubSummarizer(), token_budget=40)
+    context = memory.build_context("가전자 매출 조회", _turn(1, words=100))
+
+    lines = context.split("\n")
+    assert lines[0] == "이전 대화 요약: 가전자 매출 조회"
+    assert lines[1].startswith("User: 질문1") and lines[1].endswith("...")
+    assert lines[2].startswith("Bot: 답변1") and lines[2].endswith("...")
+
+
+class _StubRouter(_StubSummarizer):
+    def invoke(self, prompt):
+        if "갱신된 요약:" in prompt:
+            return super().invoke(prompt)
+        return AIMessage(content="single_shot_rag")
+
+
+def test_folded_messages_are_removed_from_graph_state():
+    graph = FinancialAnalysisGraph.__new__(FinancialAnalysisGraph)
+    graph.llm = _StubRouter()
+    graph.conversation_memory = ConversationMemory(graph.llm, max_recent_turns=1)
+    messages = _turn(1) + _turn(2) + [HumanMessage("가전자 영업이익은?", id="human-3")]
+
+    update = graph.analyze_query_node({"messages": messages, "conversation_summary": ""})
+
+    assert all(isinstance(message, RemoveMessage) for message in update["messages"])
+    assert _ids(update["messages"]) == ["human-1", "ai-1"]
+    assert update["conversation_summary"] == "요약: 가전자 매출액 조회"
+    assert _ids(add_messages(messages, update["messages"])) == ["human-2", "ai-2", "human-3"]
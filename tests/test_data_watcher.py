@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from build_db import SOURCE_DIRS
+from data_watcher import DataDirectoryWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    for sub_dir in SOURCE_DIRS:
+        (tmp_path / sub_dir).mkdir()
+    watcher = DataDirectoryWatcher(data_dir=str(tmp_path), output_dir=str(tmp_path / "dist"))
+    watcher.reloads = 0
+
+    def fake_reload():
+        watcher.reloads += 1
+        return True
+
+    monkeypatch.setattr(watcher, "reload", fake_reload)
+    return watcher
+
+
+def _write(watcher, name, text):
+    path = os.path.join(watcher.data_dir, SOURCE_DIRS[0], name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_unchanged_directory_never_reloads(watcher):
+    assert watcher.check() is False
+    assert watcher.check() is False
+    assert watcher.reloads == 0
+
+
+def test_reloads_only_after_change_is_stable_for_one_interval(watcher):
+    _write(watcher, "a.txt", "첫 줄")
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert watcher.reloads == 1
+    # 반영된 상태는 다시 적재하지 않음
+    assert watcher.check() is False
+    assert watcher.reloads == 1
+
+
+def test_file_still_being_copied_postpones_reload(watcher):
+    _write(watcher, "a.txt", "첫 줄")
+    assert watcher.check() is False
+    _write(watcher, "a.txt", "첫 줄\n둘째 줄")
+    assert watcher.check() is False
+    assert watcher.reloads == 0
+    assert watcher.check() is True
+    assert watcher.reloads == 1
+
+
+def test_ignores_files_outside_source_dirs(watcher):
+    with open(os.path.join(watcher.data_dir, "notes.txt"), "w", encoding="utf-8") as f:
+        f.write("메모")
+    assert watcher.check() is False
+    assert watcher.check() is False
+    assert watcher.reloads == 0
+
+
+def test_reload_skips_same_data_version(tmp_path):
+    for sub_dir in SOURCE_DIRS:
+        (tmp_path / sub_dir).mkdir()
+    watcher = DataDirectoryWatcher(data_dir=str(tmp_path), output_dir=str(tmp_path / "dist"))
+
+    # 파일 내용이 같으면 (시각만 바뀌어도) 데이터 버전이 같아 재적재하지 않음
+    assert watcher.reload() is False
+    assert not os.path.exists(tmp_path / "dist")
@@ -0,0 +1,378 @@
+import sqlite3
+
+import pytest
+
+from database import (CURRENT_PERIOD_SQL, FinancialDatabase, normalize_stock_code, parse_amount,
+                      parse_statement_type, period_end, summarize_values)
+
+
+INCOME = ("income_statements", "2025_반기보고서_02_손익계산서_연결_20251001.txt")
+BALANCE = ("balance_sheets", "2025_반기보고서_01_재무상태표_연결_20251001.txt")
+INCOME_TYPE = "손익계산서, 기능별 분류 - 연결"
+BALANCE_TYPE = "재무상태표, 유동/비유동법 - 연결"
+
+
+def _query(database, sql, params=()):
+    conn = database.get_connection()
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def ranked(dart_data, database):
+    """매출액이 같은 두 회사, 부채비율이 서로 다른 세 회사와 지표 값이 없는 은행을 적재한 DB"""
+    dart_data.write(*INCOME, [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 50, 100, 40, 80, 160, 150),
+        dart_data.row(INCOME_TYPE, "나반도체", "ifrs-full_Revenue", "매출액", 50, 100, 40, 80, 160, 150),
+        dart_data.row(INCOME_TYPE, "다바이오", "ifrs-full_Revenue", "매출액", 20, 50, 20, 40, 90, 80),
+        # 지표에 쓰이지 않는 항목만 있는 회사 (은행 업종은 지표 값이 없음)
+        dart_data.row(INCOME_TYPE, "라은행", "dart_OtherGains", "기타이익", 1, 2, 1, 2, 3, 3),
+    ])
+    dart_data.write(*BALANCE, [
+        dart_data.row(BALANCE_TYPE, "가전자", "ifrs-full_Liabilities", "부채총계", 40, 40, 40),
+        dart_data.row(BALANCE_TYPE, "가전자", "ifrs-full_Equity", "자본총계", 100, 100, 100),
+        dart_data.row(BALANCE_TYPE, "나반도체", "ifrs-full_Liabilities", "부채총계", 300, 300, 300),
+        dart_data.row(BALANCE_TYPE, "나반도체", "ifrs-full_Equity", "자본총계", 100, 100, 100),
+        dart_data.row(BALANCE_TYPE, "다바이오", "ifrs-full_Liabilities", "부채총계", 60, 60, 60),
+        dart_data.row(BALANCE_TYPE, "다바이오", "ifrs-full_Equity", "자본총계", 100, 100, 100),
+    ])
+    dart_data.load(database)
+    return database
+
+
+def _ranks(database, metric, dimension="전체", member="전체"):
+    return _query(database, """
+        SELECT 회사명, 순위, 회사수, 값 FROM metric_rankings
+        WHERE 지표 = ? AND 분류 = ? AND 분류값 = ? AND 기간말 = '2025-06-30' AND 연결구분 = '연결'
+        ORDER BY 순위, 회사명
+    """, (metric, dimension, member))
+
+
+# --- 지표 순위 (build_metric_ranks) ---
+
+def test_ranks_share_position_on_ties(ranked):
+    assert _ranks(ranked, "매출액") == [
+        ("가전자", 1, 3, 100.0), ("나반도체", 1, 3, 100.0), ("다바이오", 3, 3, 50.0),
+    ]
+
+
+def test_ranks_are_partitioned_per_sector(ranked):
+    assert _ranks(ranked, "매출액", "업종명", "전자부품") == [("가전자", 1, 2, 100.0), ("나반도체", 1, 2, 100.0)]
+    assert _ranks(ranked, "매출액", "업종명", "의약품") == [("다바이오", 1, 1, 50.0)]
+    assert _ranks(ranked, "매출액", "시장구분", "코스닥시장상장법인") == [("다바이오", 1, 1, 50.0)]
+
+
+def test_lower_is_better_metrics_rank_largest_first(ranked):
+    # 순위는 지표와 관계없이 값이 큰 순서이므로 부채비율이 가장 낮은 회사는 순위 = 회사수
+    assert _ranks(ranked, "부채비율") == [("나반도체", 1, 3, 300.0), ("다바이오", 2, 3, 60.0), ("가전자", 3, 3, 40.0)]
+    lowest = _query(ranked, """
+        SELECT 회사명 FROM metric_rankings
+        WHERE 지표 = '부채비율' AND 분류 = '전체' AND 분류값 = '전체' AND 연결구분 = '연결'
+          AND 기간말 = (SELECT MAX(기간말) FROM metric_rankings WHERE 지표 = '부채비율' AND 분류 = '전체' AND 분류값 = '전체')
+        ORDER BY 순위 DESC LIMIT 1
+    """)
+    assert lowest == [("가전자",)]
+
+
+def test_ranks_rebuild_only_refreshed_period_ends(ranked):
+    before = _query(ranked, "SELECT COUNT(*) FROM metric_ranks WHERE 기간말 = '2024-12-31'")
+    ranked.build_metric_ranks(["2025-06-30"])
+
+    assert _query(ranked, "SELECT COUNT(*) FROM metric_ranks WHERE 기간말 = '2024-12-31'") == before
+    assert len(_ranks(ranked, "매출액")) == 3
+
+
+# --- 시계열과 성장률 (build_timeseries) ---
+
+@pytest.mark.parametrize("settlement_date, month, period, expected", [
+    ("2025-06-30", "12", "당기", "2025-06-30"),
+    ("2025-06-30", "12", "전년동기", "2024-06-30"),
+    ("2025-06-30", "12", "전기말", "2024-12-31"),
+    ("2025-06-30", "12", "전전기말", "2023-12-31"),
+    ("2024-12-31", "12", "전기말", "2023-12-31"),
+    ("2025-06-30", "3", "전기말", "2025-03-31"),
+    ("2025-06-30", None, "전기말", "2024-12-31"),
+    ("2024-02-29", "12", "전년동기", "2023-02-28"),
+])
+def test_period_end(settlement_date, month, period, expected):
+    assert period_end(settlement_date, month, period) == expected
+
+
+@pytest.fixture
+def growth(dart_data, database):
+    dart_data.write(*INCOME, [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 70, 120, 60, 100, 210, 190),
+        # 전년동기 금액이 0이면 성장률을 계산하지 않음
+        dart_data.row(INCOME_TYPE, "나반도체", "ifrs-full_Revenue", "매출액", 30, 50, 0, 0, 40, 30),
+        # 음수 기준값은 절댓값으로 나눔 (적자 → 흑자 전환이 양의 성장률)
+        dart_data.row(INCOME_TYPE, "다바이오", "dart_OperatingIncomeLoss", "영업이익", 20, 50, -40, -100, -150, 10),
+    ])
+    dart_data.write(*BALANCE, [
+        dart_data.row(BALANCE_TYPE, "가전자", "ifrs-full_Assets", "자산총계", 110, 100, 80),
+    ])
+    dart_data.load(database)
+    return database
+
+
+def _growth(database, company, metric, comparison="전년동기대비", kind="누적"):
+    return _query(database, """
+        SELECT 기간말, 금액, 비교금액, 성장률 FROM fact_growth
+        WHERE 회사명 = ? AND 지표 = ? AND 비교구분 = ? AND 기간구분 = ?
+        ORDER BY 기간말
+    """, (company, metric, comparison, kind))
+
+
+def test_timeseries_maps_columns_to_period_ends(growth):
+    rows = _query(growth, """
+        SELECT 기간말, 기간구분, 금액 FROM fact_timeseries
+        WHERE 회사명 = '가전자' AND 항목코드 = 'ifrs-full_Revenue' ORDER BY 기간말, 기간구분
+    """)
+
+    assert rows == [
+        ("2023-12-31", "누적", 190),
+        ("2024-06-30", "3개월", 60),
+        ("2024-06-30", "누적", 100),
+        ("2024-12-31", "누적", 210),
+        ("2025-06-30", "3개월", 70),
+        ("2025-06-30", "누적", 120),
+    ]
+
+
+def test_year_over_year_growth(growth):
+    # 반기 누적은 전년 반기, 연간(전기말) 금액은 전전기말 연간 금액과 비교
+    assert _growth(growth, "가전자", "매출액") == [("2024-12-31", 210, 190, 10.53), ("2025-06-30", 120, 100, 20.0)]
+    assert _growth(growth, "가전자", "매출액", kind="3개월") == [("2025-06-30", 70, 60, 16.67)]
+
+
+def test_zero_base_has_no_growth_row(growth):
+    assert _growth(growth, "나반도체", "매출액") == [("2024-12-31", 40, 30, 33.33)]
+
+
+def test_negative_base_divides_by_absolute_value(growth):
+    assert _growth(growth, "다바이오", "영업이익") == [
+        ("2024-12-31", -150, 10, -1600.0),
+        ("2025-06-30", 50, -100, 150.0),
+    ]
+    assert _growth(growth, "다바이오", "영업이익", kind="3개월") == [("2025-06-30", 20, -40, 150.0)]
+
+
+def test_balance_sheet_growth_against_previous_year_end(growth):
+    assert _growth(growth, "가전자", "자산총계", "전기말대비", "시점") == [
+        ("2024-12-31", 100, 80, 25.0),
+        ("2025-06-30", 110, 100, 10.0),
+    ]
+
+
+# --- 업종 집계 (summarize_values, build_sector_cube) ---
+
+def test_summarize_values_quartiles_and_mean():
+    summary = summarize_values([(10, "가"), (40, "라"), (20, "나"), (30, "다")])
+
+    assert summary == (4, 25.0, 25.0, 17.5, 32.5, 10, 40, "라(40), 다(30), 나(20), 가(10)", "가(10), 나(20), 다(30), 라(40)")
+
+
+def test_summarize_values_single_company():
+    assert summarize_values([(5.5, "가")]) == (1, 5.5, 5.5, 5.5, 5.5, 5.5, 5.5, "가(5.50)", "가(5.50)")
+
+
+def test_summarize_values_empty_sector():
+    assert summarize_values([]) == (0, None, None, None, None, None, None, "", "")
+
+
+def test_summarize_values_keeps_top_k_companies():
+    members = [(value, f"회사{value}") for value in range(1, 8)]
+    _count, mean, *_stats, top, bottom = summarize_values(members)
+
+    assert mean == 4.0
+    assert top == "회사7(7), 회사6(6), 회사5(5), 회사4(4), 회사3(3)"
+    assert bottom == "회사1(1), 회사2(2), 회사3(3), 회사4(4), 회사5(5)"
+
+
+def _sector(database, metric, dimension, member):
+    return _query(database, """
+        SELECT 회사수, 평균, 중앙값, 최소, 최대 FROM sector_metrics
+        WHERE 지표 = ? AND 분류 = ? AND 분류값 = ? AND 기간말 = '2025-06-30' AND 연결구분 = '연결'
+    """, (metric, dimension, member))
+
+
+def test_sector_cube_groups_companies_by_dimension(ranked):
+    assert _sector(ranked, "매출액", "전체", "전체") == [(3, 83.33, 100.0, 50.0, 100.0)]
+    assert _sector(ranked, "부채비율", "업종명", "전자부품") == [(2, 170.0, 170.0, 40.0, 300.0)]
+    # 회사가 하나뿐인 업종도 집계 행이 있음
+    assert _sector(ranked, "매출액", "업종명", "의약품") == [(1, 50.0, 50.0, 50.0, 50.0)]
+    # 지표 값이 있는 회사가 없는 업종은 행이 없음
+    assert _sector(ranked, "매출액", "업종명", "은행") == []
+
+
+def test_company_metrics_joins_own_sector(ranked):
+    assert _query(ranked, """
+        SELECT 회사명, 값, 업종회사수, 업종평균 FROM company_metrics
+        WHERE 지표 = '부채비율' AND 기간말 = '2025-06-30' ORDER BY 회사명
+    """) == [("가전자", 40.0, 2, 170.0), ("나반도체", 300.0, 2, 170.0), ("다바이오", 60.0, 1, 60.0)]
+
+
+# --- 재무제표 기준 (parse_statement_type, 연결/별도 공존) ---
+
+@pytest.mark.parametrize("statement_type, file_name, expected", [
+    ("손익계산서, 기능별 분류 - 연결", "", ("연결", "손익계산서")),
+    (" 포괄손익계산서, 은행 - 별도", "2025_반기보고서_03_포괄손익계산서_은행_연결_20251001.txt", ("별도", "포괄손익계산서")),
+    ("재무상태표, 유동/비유동법", "2025_반기보고서_01_재무상태표_연결_20251001.txt", ("연결", "재무상태표")),
+    ("재무상태표, 유동/비유동법", "2025_반기보고서_01_재무상태표_20251001.txt", ("별도", "재무상태표")),
+    ("현금흐름표, 직접법 - 기타", "/data/2025_반기보고서_04_현금흐름표_연결_20251001.txt", ("연결", "현금흐름표")),
+    (None, "", ("별도", "")),
+])
+def test_parse_statement_type(statement_type, file_name, expected):
+    assert parse_statement_type(statement_type, file_name) == expected
+
+
+def test_bases_and_statement_kinds_coexist(dart_data, database):
+    dart_data.write(*INCOME, [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 70, 120, 60, 100, 210, 190),
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_ProfitLoss", "반기순이익", 7, 12, 6, 10, 21, 19),
+        dart_data.row("포괄손익계산서, 단일 포괄손익계산서 - 연결", "가전자", "ifrs-full_ProfitLoss", "반기순이익",
+                      7, 12, 6, 10, 21, 19),
+    ])
+    dart_data.write("income_statements", "2025_반기보고서_02_손익계산서_20251001.txt", [
+        dart_data.row("손익계산서, 기능별 분류 - 별도", "가전자", "ifrs-full_Revenue", "매출액", 40, 80, 30, 60, 150, 140),
+    ])
+    dart_data.load(database)
+
+    assert _query(database, """
+        SELECT 연결구분, 재무제표구분, 항목명, 당기_반기_누적 FROM income_statement
+        WHERE 회사명 = '가전자' ORDER BY 연결구분, 재무제표구분, 항목명
+    """) == [
+        ("별도", "손익계산서", "매출액", 80),
+        ("연결", "손익계산서", "매출액", 120),
+        ("연결", "손익계산서", "반기순이익", 12),
+        ("연결", "포괄손익계산서", "반기순이익", 12),
+    ]
+    assert _query(database, """
+        SELECT 연결구분, 값 FROM metric_facts WHERE 지표 = '매출액' AND 기간말 = '2025-06-30' ORDER BY 연결구분
+    """) == [("별도", 80.0), ("연결", 120.0)]
+    assert _query(database, """
+        SELECT 연결구분, 성장률 FROM fact_growth
+        WHERE 지표 = '매출액' AND 기간말 = '2025-06-30' AND 기간구분 = '누적' ORDER BY 연결구분
+    """) == [("별도", 33.33), ("연결", 20.0)]
+
+
+# --- 차원/팩트 스키마와 호환 뷰 ---
+
+# 차원/팩트 스키마 도입 전 재무제표별 단일 테이블의 컬럼
+OLD_COLUMNS = ["재무제표종류", "연결구분", "재무제표구분", "종목코드", "회사명", "시장구분", "업종", "업종명", "결산월",
+               "결산기준일", "보고서종류", "통화", "항목코드", "항목명"]
+OLD_AMOUNT_COLUMNS = {
+    "balance_sheet": ["당기_반기말", "전기말", "전전기말"],
+    "income_statement": ["당기_반기_3개월", "당기_반기_누적", "전기_반기_3개월", "전기_반기_누적", "전기", "전전기"],
+    "cash_flow_statement": ["당기_반기말", "전기_반기말", "전기", "전전기"],
+    "statement_of_changes_in_equity": ["당기", "전기", "전전기"],
+}
+
+
+@pytest.mark.parametrize("view", list(OLD_AMOUNT_COLUMNS))
+def test_views_keep_old_table_columns(database, view):
+    assert [column[1] for column in database.get_table_info(view)] == OLD_COLUMNS + OLD_AMOUNT_COLUMNS[view]
+
+
+def test_views_return_old_table_rows(dart_data, database):
+    rows = [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 70, 120, 60, 100, 210, 190),
+        dart_data.row(INCOME_TYPE, "다바이오", "dart_OperatingIncomeLoss", "영업이익", None, -5, 3, 4, 10, None),
+    ]
+    dart_data.write(*INCOME, rows)
+    parser = dart_data.load(database)
+
+    # 파서가 예전 단일 테이블에 넣던 행 (종목코드 괄호 제거, 금액은 정수)
+    file_path = str(dart_data.root / INCOME[0] / INCOME[1])
+    expected = []
+    for row in parser.parse_tsv_file(file_path):
+        row = list(parser._with_statement_basis(list(row), file_path))
+        row[3] = normalize_stock_code(row[3])
+        amounts = [parse_amount(value) for value in row[14:]]
+        # 끝의 빈 금액 칸은 TSV에서 잘려 나가므로 컬럼 수만큼 None으로 채움
+        expected.append(tuple(row[:14]) + tuple(amounts + [None] * (6 - len(amounts))))
+
+    assert sorted(_query(database, "SELECT * FROM income_statement")) == sorted(expected)
+
+
+def test_old_flat_table_is_replaced_by_view(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE balance_sheet (회사명 TEXT, 당기_반기말 REAL)")
+    conn.execute("INSERT INTO balance_sheet VALUES ('가전자', 1)")
+    conn.commit()
+    conn.close()
+
+    database = FinancialDatabase(path)
+
+    assert _query(database, "SELECT type FROM sqlite_master WHERE name = 'balance_sheet'") == [("view",)]
+    assert _query(database, "SELECT COUNT(*) FROM balance_sheet") == [(0,)]
+
+
+def test_views_read_the_latest_report_period(dart_data, database):
+    dart_data.write(*INCOME, [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 70, 120, 60, 100, 210, 190),
+    ])
+    dart_data.load(database)
+    # 나중에 적재했어도 더 오래된 보고 기간은 호환 뷰에 나오지 않음
+    dart_data.remove(*INCOME)
+    dart_data.write("income_statements", "2025_1분기보고서_02_손익계산서_연결_20250515.txt", [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 50, 50, 40, 40, 210, 190,
+                      settlement_date="2025-03-31", report_type="1분기보고서"),
+    ])
+    dart_data.load(database)
+
+    assert database.get_report_periods() == [(2025, "1분기보고서"), (2025, "반기보고서")]
+    assert _query(database, "SELECT 보고서종류, 당기_반기_누적 FROM income_statement") == [("반기보고서", 120)]
+    assert _query(database, f"""
+        SELECT r.보고서종류 FROM income_statement_facts f JOIN report_periods r ON r.period_id = f.period_id
+        WHERE f.period_id = {CURRENT_PERIOD_SQL}
+    """) == [("반기보고서",)]
+    assert len(_query(database, "SELECT * FROM income_statement_history")) == 2
+
+
+# --- 이름 검색 (FTS5 trigram) ---
+
+@pytest.fixture
+def names(dart_data, database):
+    dart_data.write(*INCOME, [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 1, 1, 1, 1, 1, 1),
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_CostOfSales", "매출원가", 1, 1, 1, 1, 1, 1),
+        dart_data.row(INCOME_TYPE, "가전자", "dart_OperatingIncomeLoss", "영업이익", 1, 1, 1, 1, 1, 1),
+        dart_data.row(INCOME_TYPE, "가전자", "dart_NonOperatingIncome", "영업외수익", 1, 1, 1, 1, 1, 1),
+        dart_data.row(INCOME_TYPE, "나반도체", "ifrs-full_RetainedEarnings", "이익잉여금", 1, 1, 1, 1, 1, 1),
+        dart_data.row(INCOME_TYPE, "나반도체", "ifrs-full_Assets", "자 산 총 계", 1, 1, 1, 1, 1, 1),
+    ])
+    dart_data.load(database)
+    return database
+
+
+def test_search_names_matches_substrings_of_three_or_more_characters(names):
+    assert names.search_names("영업이익") == [("item", "영업이익")]
+    assert names.search_names("업이익") == [("item", "영업이익")]
+    assert names.search_names("반도체") == [("company", "나반도체")]
+
+
+def test_search_names_short_terms_fall_back_to_scanning(names):
+    # 3글자 미만은 trigram을 만들 수 없어 trigram LIKE가 빈 결과를 내므로 전체를 훑어 찾음
+    assert names.search_names("매출") == [("item", "매출액"), ("item", "매출원가")]
+    assert names.search_names("수") == [("item", "영업외수익")]
+    assert names.search_names("전자") == [("company", "가전자")]
+
+
+def test_search_names_prefers_prefix_then_shorter_names(names):
+    assert names.search_names("이익") == [("item", "이익잉여금"), ("item", "영업이익")]
+
+
+def test_search_names_filters_kind_and_limits(names):
+    assert names.search_names("가전", kind="item") == []
+    assert names.search_names("가전", kind="company") == [("company", "가전자")]
+    assert names.search_names("매출", limit=1) == [("item", "매출액")]
+
+
+def test_search_names_ignores_spaces_and_wildcards(names):
+    assert names.search_names("자산 총계") == [("item", "자 산 총 계")]
+    assert names.search_names("매%출_액") == [("item", "매출액")]
+    assert names.search_names("%") == []
+    assert names.search_names("  ") == []
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("duckdb")
+
+from duckdb_backend import DUCKDB_PROMPT_NOTES, DuckDBBackend, _column_type, adapt_sql  # noqa: E402
+
+
+def test_adapt_sql_rewrites_real_casts():
+    sql = "SELECT ROUND(CAST(a.당기_반기_누적 AS REAL) * 100.0 / CAST(b.당기_반기_누적 AS real), 2) FROM t"
+
+    assert adapt_sql(sql) == (
+        "SELECT ROUND(CAST(a.당기_반기_누적 AS DOUBLE) * 100.0 / CAST(b.당기_반기_누적 AS real), 2) FROM t"
+    )
+
+
+def test_adapt_sql_leaves_other_words_alone():
+    sql = "SELECT 회사명 AS REALTY, 금액 FROM t WHERE 금액 > 100"
+
+    assert adapt_sql(sql) == sql
+
+
+def test_adapt_prompt_inserts_notes_before_question():
+    backend = DuckDBBackend.__new__(DuckDBBackend)
+    prompt = backend.adapt_prompt("예시: CAST(x AS REAL)\n\nQuestion: {input}\n")
+
+    assert prompt == "예시: CAST(x AS DOUBLE)\n\n" + DUCKDB_PROMPT_NOTES + "Question: {input}\n"
+
+
+@pytest.mark.parametrize("declared, values, expected", [
+    ("INTEGER", [1, None, 3], "BIGINT"),
+    ("REAL", [1.5, 2], "DOUBLE"),
+    ("TEXT", ["가", 1], "VARCHAR"),
+    ("INTEGER", [None, None], "BIGINT"),
+    ("", [], "VARCHAR"),
+])
+def test_column_type_prefers_values_over_declared_type(declared, values, expected):
+    assert _column_type(declared, values) == expected
+
+
+def test_backend_never_writes_the_duckdb_file(tmp_path):
+    database = type("_Database", (), {"db_path": str(tmp_path / "fin.db")})()
+    (tmp_path / "fin.db").write_bytes(b"")
+
+    with pytest.raises(FileNotFoundError, match="build_db.py"):
+        DuckDBBackend(database)
+    assert not (tmp_path / "fin.duckdb").exists()
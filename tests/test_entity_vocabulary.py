@@ -0,0 +1,51 @@
+from entity_vocabulary import CompanyVocabulary
+
+
+COMPANIES = ["SK", "SK하이닉스", "SK텔레콤", "삼성전자", "삼성전자우", "케이티", "LG", "LG유플러스", "회사명"]
+
+
+def test_prefers_longest_company_name():
+    vocabulary = CompanyVocabulary(COMPANIES)
+
+    assert vocabulary.extract("SK하이닉스와 SK 실적 비교") == ["SK하이닉스", "SK"]
+    assert vocabulary.extract("삼성전자우 배당") == ["삼성전자우"]
+
+
+def test_returns_unique_names_in_order():
+    vocabulary = CompanyVocabulary(COMPANIES)
+
+    assert vocabulary.extract("케이티, 삼성전자, 케이티 다시") == ["케이티", "삼성전자"]
+
+
+def test_resolves_aliases_only_for_known_targets():
+    vocabulary = CompanyVocabulary(COMPANIES)
+
+    assert vocabulary.extract("KT와 skt, 하이닉스") == ["케이티", "SK텔레콤", "SK하이닉스"]
+    # 대상 회사가 DB에 없으면 약칭을 인식하지 않음
+    assert CompanyVocabulary(["삼성전자"]).extract("KT 영업이익") == []
+
+
+def test_ascii_names_respect_word_boundaries():
+    vocabulary = CompanyVocabulary(COMPANIES)
+
+    assert vocabulary.extract("LGES 실적") == []
+    assert vocabulary.extract("ASK 지표") == []
+    assert vocabulary.extract("LG의 매출") == ["LG"]
+
+
+def test_skips_header_values_and_empty_text():
+    vocabulary = CompanyVocabulary(COMPANIES)
+
+    assert "회사명" not in vocabulary
+    assert len(vocabulary) == len(COMPANIES) - 1
+    assert vocabulary.extract("") == []
+
+
+def test_short_hangul_names_need_word_boundaries():
+    vocabulary = CompanyVocabulary(["경방", "남성", "동양", "대교", "기아", "농심", "삼성전자"])
+
+    assert vocabulary.extract("남성복 매출이 늘어난 회사") == []
+    assert vocabulary.extract("동양화 전시와 대교체 공사, 서경방송") == []
+    assert vocabulary.extract("기아의 매출과 농심 영업이익") == ["기아", "농심"]
+    assert vocabulary.extract("대교에서 발표한 실적, 경방은?") == ["대교", "경방"]
+    assert vocabulary.extract("기아·삼성전자 비교") == ["기아", "삼성전자"]
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from financial_terms import FinancialTermDictionary, load_financial_terms
+
+
+TERMS = [
+    {
+        "term": "매출액",
+        "aliases": ["매출", "영업수익"],
+        "table": "income_statement",
+        "codes": {"*": ["ifrs-full_Revenue"], "은행": ["ifrs-full_RevenueFromInterest"]},
+        "notes": {"은행": "이자수익을 조회"},
+    },
+    {
+        "term": "순이익",
+        "aliases": ["당기순이익", "반기순이익", "분기순이익"],
+        "table": "income_statement",
+        "codes": {"*": ["ifrs-full_ProfitLoss"]},
+    },
+    {
+        "term": "자산총계",
+        "aliases": ["자산"],
+        "table": "balance_sheet",
+        "codes": {"*": ["ifrs-full_Assets"]},
+    },
+]
+
+# (테이블, 업종 그룹, 항목코드, 항목명, 회사 수)
+USAGE = [
+    ("income_statement", "일반", "ifrs-full_Revenue", "매출액", 30),
+    ("income_statement", "일반", "ifrs-full_Revenue", "영업수익", 5),
+    ("income_statement", "은행", "ifrs-full_RevenueFromInterest", "이자수익", 8),
+    # 은행 그룹에도 ifrs-full_Revenue가 있지만 업종별 후보가 우선함
+    ("income_statement", "은행", "ifrs-full_Revenue", "수익", 1),
+    ("income_statement", "일반", "ifrs-full_ProfitLoss", "반기순이익", 20),
+    ("income_statement", "일반", "ifrs-full_ProfitLoss", "분기순이익", 10),
+    ("income_statement", "은행", "ifrs-full_ProfitLoss", "당기순이익", 8),
+    ("balance_sheet", "일반", "ifrs-full_Assets", "자산총계", 30),
+]
+
+COMPANY_GROUPS = {"가전": "일반", "나은행": "은행"}
+
+
+@pytest.fixture
+def terms():
+    return FinancialTermDictionary(TERMS, item_usage=USAGE, company_groups=COMPANY_GROUPS)
+
+
+def test_industry_override_replaces_default_codes(terms):
+    resolved = terms.resolve("가전과 나은행 매출 비교", ["가전", "나은행"])
+
+    assert [item["term"] for item in resolved] == ["매출액"]
+    groups = resolved[0]["groups"]
+    assert groups["일반"]["codes"] == ["ifrs-full_Revenue"]
+    assert groups["일반"]["names"] == ["매출액", "영업수익"]
+    assert groups["일반"]["companies"] == ["가전"]
+    assert groups["은행"]["codes"] == ["ifrs-full_RevenueFromInterest"]
+    assert groups["은행"]["note"] == "이자수익을 조회"
+    assert groups["은행"]["companies"] == ["나은행"]
+
+
+def test_report_specific_names_share_one_code(terms):
+    resolved = terms.resolve("가전 분기순이익", ["가전"])
+
+    assert resolved[0]["term"] == "순이익"
+    assert resolved[0]["groups"]["일반"]["codes"] == ["ifrs-full_ProfitLoss"]
+    assert resolved[0]["groups"]["일반"]["names"] == ["반기순이익", "분기순이익"]
+
+
+def test_only_groups_of_mentioned_companies(terms):
+    resolved = terms.resolve("나은행 순이익", ["나은행"])
+
+    assert list(resolved[0]["groups"]) == ["은행"]
+
+
+def test_without_companies_resolves_every_group_with_data(terms):
+    resolved = terms.resolve("순이익 상위 회사")
+
+    assert set(resolved[0]["groups"]) == {"일반", "은행"}
+
+
+def test_unknown_term_is_not_resolved(terms):
+    assert terms.resolve("가전 EBITDA 알려줘", ["가전"]) == []
+    assert terms.extract_terms("배당성향은?") == []
+
+
+def test_term_without_data_in_group_is_dropped(terms):
+    # 은행 그룹에는 자산총계 항목 데이터가 없음
+    assert terms.resolve("나은행 자산", ["나은행"]) == []
+
+
+def test_unknown_company_uses_default_group(terms):
+    assert terms.group_of("없는회사") == "일반"
+
+
+def test_short_alias_only_at_word_start(terms):
+    assert terms.extract_terms("가전 자산") == ["자산총계"]
+    assert terms.extract_terms("금융자산 규모") == []
+
+
+def test_describe_lists_codes_per_group(terms):
+    text = terms.describe(terms.resolve("가전과 나은행 매출", ["가전", "나은행"]))
+
+    assert "- 매출액 [income_statement]" in text
+    assert "일반(가전): 항목코드 IN ('ifrs-full_Revenue')" in text
+    assert "은행(나은행): 항목코드 IN ('ifrs-full_RevenueFromInterest')" in text
+    assert "이자수익을 조회" in text
+
+
+class _FakeDatabase:
+    def get_item_usage(self):
+        return USAGE
+
+    def get_company_groups(self):
+        return COMPANY_GROUPS
+
+
+def test_load_financial_terms_reads_definition_file(tmp_path):
+    path = tmp_path / "terms.json"
+    path.write_text(json.dumps({"terms": TERMS}, ensure_ascii=False), encoding="utf-8")
+
+    assert len(load_financial_terms(_FakeDatabase(), str(path))) == 3
+    assert len(load_financial_terms(_FakeDatabase(), str(tmp_path / "missing.json"))) == 0
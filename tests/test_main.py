@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import FinancialAnalysisApp
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["gradio", "langchain", "langchain_core", "langchain_openai", "langgraph", "fastapi", "uvicorn"]
+
+
+def test_import_does_not_load_heavy_modules():
+    # 이미 무거운 모듈을 올린 테스트 프로세스 대신 새 인터프리터에서 확인
+    code = (
+        "import sys, main\n"
+        "main.FinancialAnalysisApp()\n"
+        f"print(','.join(sorted({{name.split('.')[0] for name in sys.modules}} & set({HEAVY_MODULES!r}))))\n"
+    )
+    env = {**os.environ, "OPENAI_API_KEY": "test", "WEB_SEARCH_BACKEND": "local"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True)
+
+    assert result.stdout.splitlines()[-1] == ""
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("WEB_SEARCH_BACKEND", "local")
+    monkeypatch.setenv("DATA_WATCH_ENABLED", "false")
+    return FinancialAnalysisApp()
+
+
+def _blocked_initialize(app, result: bool):
+    """release가 설정될 때까지 워밍업을 붙잡아 두는 initialize_data 대역"""
+    release = threading.Event()
+
+    def initialize_data():
+        app.status_detail = "재무제표 데이터 적재 중"
+        release.wait(5)
+        return result
+
+    app.initialize_data = initialize_data
+    return release
+
+
+def test_health_reports_warming_up_then_ready(app):
+    client = TestClient(app.create_api())
+    assert client.get("/health").json()["status"] == main.STATUS_STARTING
+
+    release = _blocked_initialize(app, True)
+    thread = app.start_warm_up()
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json() == {"status": main.STATUS_WARMING_UP, "ready": False,
+                               "detail": "재무제표 데이터 적재 중", "data_version": ""}
+
+    release.set()
+    thread.join(5)
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": main.STATUS_READY, "ready": True, "detail": "", "data_version": ""}
+
+
+def test_health_reports_failed_warm_up(app):
+    client = TestClient(app.create_api())
+    _blocked_initialize(app, False).set()
+    app.start_warm_up().join(5)
+
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == main.STATUS_FAILED
+    assert app.ready_event.is_set()
+
+
+def test_screen_waits_for_warm_up(app):
+    response = TestClient(app.create_api()).post("/screen", json={"filters": []})
+
+    assert response.status_code == 503
+    assert response.json()["status"] == main.STATUS_STARTING
@@ -0,0 +1,73 @@
+import pytest
+
+from metrics import Counter, Histogram, MetricsRegistry, _Metric
+
+
+def test_metric_subclass_requires_samples():
+    class _NoSamples(_Metric):
+        type_name = "gauge"
+
+    with pytest.raises(TypeError):
+        _NoSamples("x", "도움말")
+
+
+def test_histogram_buckets_are_cumulative_with_inclusive_bounds():
+    histogram = Histogram("latency_seconds", "지연 시간", buckets=(1, 0.1, 0.5))
+    for value in (0.05, 0.1, 0.3, 0.5, 2):
+        histogram.observe(value)
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="0.5"} 4',
+        'latency_seconds_bucket{le="1"} 4',
+        'latency_seconds_bucket{le="+Inf"} 5',
+        "latency_seconds_sum 2.95",
+        "latency_seconds_count 5",
+    ]
+
+
+def test_histogram_keeps_label_sets_apart():
+    histogram = Histogram("node_seconds", "노드 시간", ["node"], buckets=(1,))
+    histogram.observe(0.5, node="write_query")
+    histogram.observe(3, node="execute_query")
+
+    lines = histogram.render()
+    assert 'node_seconds_bucket{node="write_query",le="1"} 1' in lines
+    assert 'node_seconds_bucket{node="execute_query",le="1"} 0' in lines
+    assert 'node_seconds_bucket{node="execute_query",le="+Inf"} 1' in lines
+    assert 'node_seconds_count{node="execute_query"} 1' in lines
+
+
+def test_counter_labels_are_escaped():
+    counter = Counter("requests_total", "요청 수", ["route"])
+    counter.inc(route='a"b\\c')
+    counter.inc(2, route='a"b\\c')
+
+    assert counter.render()[2:] == ['requests_total{route="a\\"b\\\\c"} 3']
+    assert counter.value(route='a"b\\c') == 3
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "요청 수", ["status"])
+    sessions = registry.gauge("active_sessions", "세션 수")
+    registry.register_collector(lambda: sessions.set(4))
+    requests.inc(status="ok")
+
+    assert registry.counter("requests_total", "다른 설명", ["status"]) is requests
+    assert registry.render() == (
+        "# HELP requests_total 요청 수\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{status="ok"} 1\n'
+        "# HELP active_sessions 세션 수\n"
+        "# TYPE active_sessions gauge\n"
+        "active_sessions 4\n"
+    )
+
+
+def test_failing_collector_does_not_break_render():
+    registry = MetricsRegistry()
+    registry.gauge("active_sessions", "세션 수").set(1)
+    registry.register_collector(lambda: 1 / 0)
+
+    assert registry.render().endswith("active_sessions 1\n")
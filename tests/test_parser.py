@@ -0,0 +1,93 @@
+import pytest
+
+
+HALF_YEAR = ("income_statements", "2025_반기보고서_02_손익계산서_연결_20251001.txt")
+ANNUAL = ("income_statements", "2024_사업보고서_02_손익계산서_연결_20250401.txt")
+INCOME_TYPE = "손익계산서, 기능별 분류 - 연결"
+
+
+def _query(database, sql, params=()):
+    conn = database.get_connection()
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _half_year_rows(dart_data, revenue):
+    return [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 70, revenue, 60, 100, 950, 800),
+        dart_data.row(INCOME_TYPE, "가전자", "dart_OperatingIncomeLoss", "영업이익", 7, 12, 6, 10, 90, 80),
+    ]
+
+
+def _annual_rows(dart_data):
+    # 사업보고서는 '당기, 전기, 전전기' 3개 금액이 앞쪽 컬럼부터 채워짐
+    return [
+        dart_data.row(INCOME_TYPE, "가전자", "ifrs-full_Revenue", "매출액", 1000, 900, 800,
+                      settlement_date="2024-12-31", report_type="사업보고서"),
+    ]
+
+
+@pytest.fixture
+def two_periods(dart_data, database):
+    dart_data.write(*ANNUAL, _annual_rows(dart_data))
+    dart_data.load(database)
+    dart_data.write(*HALF_YEAR, _half_year_rows(dart_data, 120))
+    dart_data.load(database, [(2025, "반기보고서")])
+    return database
+
+
+def test_second_period_keeps_the_first(two_periods):
+    assert two_periods.get_report_periods() == [(2024, "사업보고서"), (2025, "반기보고서")]
+    assert _query(two_periods, """
+        SELECT 사업연도, 보고서종류, 항목명, 당기_반기_3개월, 당기_반기_누적 FROM income_statement_history
+        ORDER BY 사업연도, 항목명
+    """) == [
+        (2024, "사업보고서", "매출액", 1000, 900),
+        (2025, "반기보고서", "매출액", 70, 120),
+        (2025, "반기보고서", "영업이익", 7, 12),
+    ]
+    # 호환 뷰는 가장 최근 보고서만 보여줌
+    assert _query(two_periods, "SELECT DISTINCT 보고서종류 FROM income_statement") == [("반기보고서",)]
+
+
+def test_reloading_a_period_replaces_only_that_period(dart_data, two_periods):
+    dart_data.remove(*ANNUAL)
+    dart_data.write(*HALF_YEAR, _half_year_rows(dart_data, 130)[:1])
+    parser = dart_data.load(two_periods)
+
+    assert parser.loaded_periods == {(2025, "반기보고서")}
+    assert _query(two_periods, """
+        SELECT 사업연도, 항목명, 당기_반기_누적 FROM income_statement_history ORDER BY 사업연도, 항목명
+    """) == [(2024, "매출액", 900), (2025, "매출액", 130)]
+
+
+def test_requested_periods_skip_other_files(dart_data, database):
+    dart_data.write(*ANNUAL, _annual_rows(dart_data))
+    dart_data.write(*HALF_YEAR, _half_year_rows(dart_data, 120))
+    dart_data.load(database, [(2024, "사업보고서")])
+
+    assert database.get_report_periods() == [(2024, "사업보고서")]
+
+
+def test_annual_report_columns_in_time_series(dart_data, database):
+    dart_data.write(*ANNUAL, _annual_rows(dart_data))
+    dart_data.load(database)
+
+    assert _query(database, """
+        SELECT 기간말, 기간구분, 금액 FROM fact_timeseries WHERE 항목코드 = 'ifrs-full_Revenue' ORDER BY 기간말
+    """) == [("2022-12-31", "누적", 800), ("2023-12-31", "누적", 900), ("2024-12-31", "누적", 1000)]
+    assert _query(database, """
+        SELECT 기간말, 성장률 FROM fact_growth WHERE 지표 = '매출액' AND 비교구분 = '전년동기대비' ORDER BY 기간말
+    """) == [("2023-12-31", 12.5), ("2024-12-31", 11.11)]
+
+
+def test_later_report_overrides_annual_amount(two_periods):
+    # 반기보고서의 전기(2024년 연간) 금액이 재작성되었으면 더 늦은 보고서의 금액을 사용
+    assert _query(two_periods, """
+        SELECT 금액 FROM fact_timeseries WHERE 항목코드 = 'ifrs-full_Revenue' AND 기간말 = '2024-12-31'
+    """) == [(950,)]
+    assert _query(two_periods, """
+        SELECT 금액 FROM fact_timeseries WHERE 항목코드 = 'ifrs-full_Revenue' AND 기간말 = '2023-12-31'
+    """) == [(800,)]
@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+import pytest
+
+from ratios import FinancialRatioEngine, to_decimal
+
+
+@pytest.fixture
+def engine():
+    return FinancialRatioEngine()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1,234,000", Decimal("1234000")),
+    ("(1,000)", Decimal("-1000")),
+    (12, Decimal("12")),
+    (0.1, Decimal("0.1")),
+    ("-", None),
+    ("", None),
+    (None, None),
+    (True, None),
+    ("abc", None),
+])
+def test_to_decimal(value, expected):
+    assert to_decimal(value) == expected
+
+
+def test_compute_ratios_rounds_half_up_and_handles_zero(engine):
+    ratios = engine.compute_ratios({
+        "영업이익": Decimal("11361329000000"),
+        "매출액": Decimal("153706820000000"),
+        "부채총계": Decimal("1"),
+        "자본총계": Decimal("0"),
+    })
+
+    assert ratios["영업이익률"] == Decimal("7.39")
+    assert ratios["부채비율"] is None
+    assert "ROE" not in ratios
+
+
+def test_attach_ratios_to_wide_rows(engine):
+    columns, rows = engine.attach_ratios(["회사명", "매출액", "영업이익"], [("가", "1,000", "125"), ("나", 0, 5)])
+
+    assert columns == ["회사명", "매출액", "영업이익", "영업이익률(%)"]
+    assert rows == [("가", "1,000", "125", Decimal("12.50")), ("나", 0, 5, None)]
+
+
+def test_attach_ratios_skips_existing_ratio_columns(engine):
+    columns, _rows = engine.attach_ratios(["매출액", "영업이익", "영업이익률"], [(100, 10, 10.0)])
+
+    assert columns == ["매출액", "영업이익", "영업이익률"]
+
+
+def test_build_ratio_table_keeps_bases_apart(engine):
+    columns = ["회사명", "연결구분", "항목명", "당기_반기_누적"]
+    rows = [
+        ("가", "연결", "매출액", 1000), ("가", "연결", "영업이익", 200),
+        ("가", "별도", "매출액", 500), ("가", "별도", "영업이익", 50),
+    ]
+    table_columns, table_rows = engine.build_ratio_table(columns, rows)
+
+    assert table_columns == ["회사명", "연결구분", "매출액", "영업이익", "영업이익률(%)"]
+    assert table_rows == [
+        ("가", "연결", Decimal(1000), Decimal(200), Decimal("20.00")),
+        ("가", "별도", Decimal(500), Decimal(50), Decimal("10.00")),
+    ]
+
+
+def test_build_ratio_table_without_basis_column(engine):
+    table_columns, table_rows = engine.build_ratio_table(
+        ["회사명", "항목명", "당기_반기_누적"], [("가", "반기순이익", 30), ("가", "자본총계(손실)", 300)]
+    )
+
+    assert table_columns == ["회사명", "순이익", "자본총계", "ROE(%)"]
+    assert table_rows == [("가", Decimal(30), Decimal(300), Decimal("10.00"))]
+
+
+def test_pivot_metric_rows_prefers_one_basis_per_company(engine):
+    rows = [
+        ("가", "연결", "ifrs-full_Revenue", "매출액", 1000),
+        ("가", "연결", "dart_OperatingIncomeLoss", "영업이익", 100),
+        ("가", "별도", "ifrs-full_Revenue", "매출액", 800),
+        ("나", "별도", "ifrs-full_Revenue", "영업수익", 400),
+        ("나", "별도", "ifrs-full_ProfitLossFromOperatingActivities", "영업이익", 40),
+    ]
+    columns, table = engine.pivot_metric_rows(["가", "나", "다"], ["매출액", "영업이익"], rows)
+
+    assert columns == ["회사명", "연결구분", "매출액", "영업이익", "영업이익률(%)"]
+    assert table == [
+        ("가", "연결", Decimal(1000), Decimal(100), Decimal("10.00")),
+        ("나", "별도", Decimal(400), Decimal(40), Decimal("10.00")),
+        ("다", None, None, None, None),
+    ]
+
+
+def test_extract_metrics_expands_ratios(engine):
+    assert engine.extract_metrics("삼성전자 ROE와 매출") == ["순이익", "자본총계", "매출액"]
+    assert engine.extract_metrics("영업이익률 비교") == ["영업이익", "매출액"]
+    assert "매출액" in engine.extract_metrics("비교해줘")
+
+
+def test_enrich_result_reports_empty_result(engine):
+    assert engine.enrich_result(["회사명"], []) == "조회 결과가 없습니다."
@@ -0,0 +1,55 @@
+from rerank import PassageReranker, split_sentences, tokenize
+
+
+def test_tokenize_uses_hangul_bigrams_and_lowercase_words():
+    assert tokenize("영업이익이 HBM") == ["영업", "업이", "이익", "익이", "hbm"]
+    assert tokenize("매출") == ["매출"]
+
+
+def test_split_sentences_drops_short_fragments():
+    assert split_sentences("짧음. 이 문장은 충분히 긴 문장입니다.\n끝") == ["이 문장은 충분히 긴 문장입니다."]
+
+
+def test_rank_orders_by_bm25_score():
+    passages = [
+        "날씨가 맑고 기온이 높았습니다.",
+        "SK하이닉스의 영업이익이 HBM 판매 증가로 크게 늘었습니다.",
+        "영업이익 개선은 메모리 가격 상승 덕분입니다.",
+    ]
+    ranking = PassageReranker().rank(passages, "SK하이닉스 영업이익 증가 원인")
+
+    assert [index for _score, index in ranking][:2] == [1, 2]
+    assert ranking[-1] == (0.0, 0)
+
+
+def test_boost_terms_break_ties():
+    passages = ["영업이익이 늘었습니다 A사.", "영업이익이 늘었습니다 B사."]
+    ranking = PassageReranker().rank(passages, "영업이익", boost_terms=["B사"])
+
+    assert ranking[0][1] == 1
+
+
+def test_select_respects_budget_and_keeps_original_order():
+    passages = ["영업이익 " * 50, "영업이익 증가", "무관한 문장입니다"]
+    selected = PassageReranker().select(passages, "영업이익", token_budget=20)
+
+    assert selected == [1]
+
+
+def test_compress_web_result_keeps_relevant_sentences_per_block():
+    filler = "관련 없는 내용이 길게 이어집니다. " * 40
+    web_result = (
+        f"제목: 뉴스1\n내용: {filler}삼성전자 영업이익이 반도체 회복으로 증가했습니다.\n출처: http://a\n\n"
+        f"제목: 뉴스2\n내용: {filler}\n출처: http://b\n"
+    )
+    compressed = PassageReranker(token_budget=60).compress_web_result(web_result, "삼성전자 영업이익 증가")
+
+    assert "삼성전자 영업이익이 반도체 회복으로 증가했습니다." in compressed
+    assert "출처: http://a" in compressed
+    assert "출처: http://b" not in compressed
+
+
+def test_compress_web_result_returns_small_input_unchanged():
+    web_result = "제목: 짧음\n내용: 영업이익 증가.\n출처: http://a\n"
+
+    assert PassageReranker().compress_web_result(web_result, "영업이익") == web_result
@@ -0,0 +1,42 @@
+from result_store import ResultStore
+
+
+def test_same_text_shares_reference():
+    store = ResultStore()
+    first = store.put("삼성전자 매출액 153조")
+    second = store.put("삼성전자 매출액 153조")
+
+    assert first == second
+    assert len(store) == 1
+    assert store.get(first) == "삼성전자 매출액 153조"
+
+
+def test_evicts_least_recently_used_entry():
+    store = ResultStore(max_entries=2)
+    a = store.put("a 결과")
+    b = store.put("b 결과")
+    store.get(a)
+    c = store.put("c 결과")
+
+    assert store.get(b) is None
+    assert store.get(a) == "a 결과"
+    assert store.get(c) == "c 결과"
+
+
+def test_byte_limit_tracks_utf8_size():
+    store = ResultStore(max_bytes=10)
+    a = store.put("가나다")  # 9 bytes
+    b = store.put("라")      # 3 bytes → 12 bytes, a 삭제
+
+    assert store.get(a) is None
+    assert store.get(b) == "라"
+    assert store.total_bytes == 3
+
+
+def test_resolve_marks_expired_results():
+    store = ResultStore(max_entries=1)
+    a = store.put("a")
+    b = store.put("b")
+
+    assert store.resolve([a, b]) == [ResultStore.MISSING_TEXT, "b"]
+    assert store.resolve(None) == []
@@ -0,0 +1,104 @@
+import pytest
+
+from screener import MetricScreener
+
+
+class _FakeDatabase:
+    """get_screening_data 형식의 고정 데이터를 돌려주는 DB 대역입니다."""
+
+    COMPANIES = [
+        # company_id, 회사명, 종목코드, 시장구분, 업종명, 업종구분
+        (1, "가전", "000001", "유가증권시장상장법인", "전자부품", "일반"),
+        (2, "나은행", "000002", "유가증권시장상장법인", "은행", "은행"),
+        (3, "다바이오", "000003", "코스닥시장상장법인", "의약품", "일반"),
+        (4, "라증권", "000004", "코스닥시장상장법인", "증권", "증권"),
+    ]
+    VALUES = [
+        # 지표, 기간말, 연결구분, company_id, 값
+        ("ROE", "2025-06-30", "연결", 1, 8.0),
+        ("ROE", "2025-06-30", "연결", 2, 5.0),
+        ("ROE", "2025-06-30", "연결", 3, 12.0),
+        ("부채비율", "2025-06-30", "연결", 1, 40.0),
+        ("부채비율", "2025-06-30", "연결", 2, 900.0),
+        ("부채비율", "2025-06-30", "연결", 3, 60.0),
+        ("부채비율", "2025-06-30", "연결", 4, 300.0),
+        ("ROE", "2025-06-30", "별도", 1, 3.0),
+        ("ROE", "2024-12-31", "연결", 1, 15.0),
+    ]
+
+    def load_manifest(self):
+        return {"data_version": "test"}
+
+    def get_screening_data(self):
+        return self.COMPANIES, self.VALUES
+
+
+@pytest.fixture(scope="module")
+def screener():
+    return MetricScreener(_FakeDatabase())
+
+
+def _names(result):
+    return [row["회사명"] for row in result["rows"]]
+
+
+def test_filters_are_combined_with_and(screener):
+    result = screener.screen([("ROE", ">=", 5), ("부채비율", "<", 100)], sort="-ROE")
+
+    assert _names(result) == ["다바이오", "가전"]
+    assert result["count"] == 2
+    assert result["period"] == "2025-06-30"
+
+
+def test_missing_values_never_match(screener):
+    # 라증권은 ROE가 없으므로 어떤 비교에도 포함되지 않음
+    assert "라증권" not in _names(screener.screen([("ROE", "<", 100)]))
+    assert "라증권" not in _names(screener.screen([("ROE", "!=", 1)]))
+
+
+def test_sort_puts_missing_values_last_in_both_directions(screener):
+    assert _names(screener.screen(sort="-ROE")) == ["다바이오", "가전", "나은행", "라증권"]
+    assert _names(screener.screen(sort="ROE")) == ["나은행", "가전", "다바이오", "라증권"]
+
+
+def test_category_filters_use_codes(screener):
+    result = screener.screen([("업종구분", "in", ["은행", "증권"])], sort="부채비율")
+    assert _names(result) == ["라증권", "나은행"]
+    assert _names(screener.screen([("시장구분", "==", "코스닥시장상장법인"), ("ROE", ">", 0)])) == ["다바이오"]
+    assert screener.screen([("업종구분", "==", "없는업종")])["count"] == 0
+
+
+def test_between_and_limit(screener):
+    result = screener.screen([{"metric": "부채비율", "op": "between", "value": [40, 300]}], sort="부채비율", limit=2)
+
+    assert _names(result) == ["가전", "다바이오"]
+    assert result["count"] == 3
+
+
+def test_result_rows_convert_nan_to_none(screener):
+    rows = screener.screen(sort="-ROE", columns=["부채비율"])["rows"]
+
+    assert rows[-1]["회사명"] == "라증권"
+    assert rows[-1]["ROE"] is None
+    assert rows[-1]["부채비율"] == 300.0
+
+
+def test_basis_and_period_select_panels(screener):
+    assert screener.screen([("ROE", ">", 0)], basis="별도")["rows"][0]["ROE"] == 3.0
+    assert screener.screen([("ROE", ">", 0)], period="2024-12-31")["rows"][0]["ROE"] == 15.0
+
+
+@pytest.mark.parametrize("filters, message", [
+    ([("PER", ">", 1)], "알 수 없는 지표"),
+    ([("ROE", "~", 1)], "지원하지 않는 연산자"),
+    ([("업종구분", ">", "은행")], "연산자만 사용"),
+    (["ROE>1"], "조건 형식"),
+])
+def test_invalid_conditions_raise_value_error(screener, filters, message):
+    with pytest.raises(ValueError, match=message):
+        screener.screen(filters)
+
+
+def test_unknown_period_raises_value_error(screener):
+    with pytest.raises(ValueError, match="지표 데이터가 없습니다"):
+        screener.screen(period="2000-12-31")
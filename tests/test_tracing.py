@@ -0,0 +1,155 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+import tracing
+from entity_vocabulary import CompanyVocabulary
+from financial_terms import FinancialTermDictionary
+from tools import FinancialAnalysisTools
+from tracing import RingBufferSink, Tracer, create_tracer
+
+
+@pytest.fixture
+def sink():
+    return RingBufferSink()
+
+
+@pytest.fixture
+def traces(sink):
+    return Tracer([sink], level="DEBUG")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """tracing 모듈의 time.perf_counter()를 손으로 움직이는 시계"""
+    now = [100.0]
+    monkeypatch.setattr(tracing.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def test_spans_nest_under_the_request(traces, sink):
+    with traces.request(request_id="req-1", route="chat") as request:
+        with traces.span("node.route") as node:
+            with traces.span("tool.sql_generation") as tool:
+                pass
+
+    assert tool.parent is node and node.parent is request
+    records = {record["name"]: record for record in sink.recent()}
+    assert records["tool.sql_generation"]["parent_id"] == records["node.route"]["span_id"]
+    assert records["node.route"]["parent_id"] == records["request"]["span_id"]
+    assert records["request"]["parent_id"] is None
+    assert {record["request_id"] for record in sink.recent()} == {"req-1"}
+    assert traces.current_request_id() is None
+
+
+def test_span_records_duration_and_attributes(traces, sink, clock):
+    with traces.request(route="chat"):
+        with traces.span("node.route", level="INFO", kind="router") as span:
+            clock[0] += 0.25
+            span.set(route="financial_query")
+            traces.annotate(folded_messages=2)
+        with traces.span("node.route"):
+            clock[0] += 0.5
+
+    record = sink.recent()[0]
+    assert (record["name"], record["duration_ms"]) == ("node.route", 250.0)
+    assert (record["kind"], record["route"], record["folded_messages"]) == ("router", "financial_query", 2)
+    request = sink.recent()[-1]
+    assert request["duration_ms"] == 750.0
+    assert request["breakdown_ms"] == {"node.route": 750.0}
+
+
+def test_counts_accumulate_up_the_tree(traces):
+    with traces.request() as request:
+        with traces.span("tool.sql_generation") as tool:
+            traces.record_llm_usage(AIMessage(content="", usage_metadata={
+                "input_tokens": 120, "output_tokens": 30, "total_tokens": 150,
+            }))
+        traces.count("llm_calls")
+
+    assert tool.attributes == {"llm_calls": 1, "input_tokens": 120, "output_tokens": 30}
+    assert request.attributes["llm_calls"] == 2
+    assert request.attributes["input_tokens"] == 120
+
+
+def test_failed_span_is_marked_and_reraised(traces, sink):
+    with pytest.raises(ValueError):
+        with traces.span("tool.sql_execution"):
+            raise ValueError("no such table")
+
+    assert sink.recent()[-1]["status"] == "error"
+    assert sink.recent()[-1]["error"] == "ValueError: no such table"
+
+
+def test_info_level_keeps_only_request_lines_and_errors(sink):
+    traces = Tracer([sink], level="INFO")
+    with traces.request():
+        with traces.span("node.route"):
+            traces.event("route.decision")
+
+    assert [record["name"] for record in sink.recent()] == ["request"]
+
+
+def test_trace_sink_off_emits_nothing(monkeypatch):
+    monkeypatch.setenv("TRACE_SINK", "off")
+    traces = create_tracer()
+    seen = []
+    traces.add_listener(seen.append)
+
+    with traces.request() as request:
+        with traces.span("node.route"):
+            traces.event("route.decision")
+
+    assert not traces.enabled
+    assert traces.sinks == []
+    # 메트릭 리스너에는 계속 전달됨
+    assert [span.name for span in seen] == ["node.route", "request"]
+    assert request.attributes["breakdown_ms"].keys() == {"node.route"}
+
+
+def test_annotate_and_count_outside_a_span_are_ignored(traces, sink):
+    traces.annotate(route="x")
+    traces.count("llm_calls")
+
+    assert sink.recent() == []
+
+
+# --- Text2SQL 토큰 사용량 ---
+
+USAGE = {"input_tokens": 500, "output_tokens": 40, "total_tokens": 540}
+
+
+class _FakeLLM:
+    """구조화 출력(include_raw)과 일반 응답에 토큰 사용량을 붙여 주는 LLM 대역"""
+
+    def __init__(self, structured: bool = False):
+        self.structured = structured
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        assert include_raw
+        return _FakeLLM(structured=True)
+
+    def invoke(self, prompt):
+        if self.structured:
+            return {"raw": AIMessage(content="", usage_metadata=USAGE),
+                    "parsed": {"query": "SELECT 1"}, "parsing_error": None}
+        return AIMessage(content="답변", usage_metadata={"input_tokens": 50, "output_tokens": 5, "total_tokens": 55})
+
+
+def test_sql_generation_records_token_usage(database, monkeypatch):
+    tools = FinancialAnalysisTools.__new__(FinancialAnalysisTools)
+    tools.financial_db = tools.sql_backend = database
+    tools.table_info = ""
+    tools.llm = _FakeLLM()
+    tools.entity_retriever = None
+    tools.company_vocabulary = CompanyVocabulary([])
+    tools.term_dictionary = FinancialTermDictionary([])
+    graph = tools._build_text2sql_graph()
+
+    spans = {}
+    monkeypatch.setattr(tracing.tracer, "listeners", [lambda span: spans.setdefault(span.name, span)])
+    with tracing.tracer.request() as request:
+        graph.invoke({"question": "가전자 매출액"})
+
+    assert spans["tool.sql_generation"].attributes == {"llm_calls": 1, "input_tokens": 500, "output_tokens": 40}
+    assert request.attributes["input_tokens"] == 550
+    assert request.attributes["output_tokens"] == 45
@@ -0,0 +1,152 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from web_fetch import PageCache, PageFetcher, dedupe_passages, extract_main_text
+
+
+ARTICLE = "<html><body><nav>메뉴 링크 모음입니다 메뉴 링크 모음입니다</nav><article>" \
+          "<p>삼성전자는 2025년 상반기 반도체 부문 실적이 개선되었다고 밝혔습니다.</p>" \
+          "<p>메모리 가격 상승으로 영업이익이 전년 동기 대비 크게 늘었습니다.</p>" \
+          "</article></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """테스트용 경로별 응답 (/article, /redirect, /slow, /pdf, /missing)."""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == "/article":
+            self._send(200, "text/html; charset=utf-8", ARTICLE.encode("utf-8"))
+        elif self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/article")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path == "/slow":
+            time.sleep(2)
+            self._send(200, "text/html", ARTICLE.encode("utf-8"))
+        elif self.path == "/pdf":
+            self._send(200, "application/pdf", b"%PDF-1.4" + b"\0" * 1024)
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """로컬 http.server 대역을 띄우고 기본 URL을 반환합니다."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = PageFetcher(timeout=0.5, max_bytes=64 * 1024)
+    yield fetcher
+    fetcher.close()
+
+
+def test_fetch_extracts_article_passages(server, fetcher):
+    _httpd, base = server
+    passages = fetcher.fetch(f"{base}/article")
+    assert passages == [
+        "삼성전자는 2025년 상반기 반도체 부문 실적이 개선되었다고 밝혔습니다.",
+        "메모리 가격 상승으로 영업이익이 전년 동기 대비 크게 늘었습니다.",
+    ]
+
+
+def test_fetch_follows_redirect(server, fetcher):
+    httpd, base = server
+    passages = fetcher.fetch(f"{base}/redirect")
+    assert len(passages) == 2
+    assert httpd.requests == ["/redirect", "/article"]
+
+
+def test_fetch_times_out(server, fetcher):
+    _httpd, base = server
+    started = time.monotonic()
+    assert fetcher.fetch(f"{base}/slow") == []
+    assert time.monotonic() - started < 1.5
+
+
+def test_fetch_skips_non_html(server, fetcher):
+    _httpd, base = server
+    assert fetcher.fetch(f"{base}/pdf") == []
+
+
+def test_fetch_returns_empty_on_http_error(server, fetcher):
+    _httpd, base = server
+    assert fetcher.fetch(f"{base}/missing") == []
+
+
+def test_fetch_stops_at_max_bytes(fetcher):
+    paragraph = ("<p>" + "가" * 100 + "</p>").encode("utf-8")
+    served = []
+
+    def body():
+        # 길이를 알리지 않고 30MB를 보내는 본문 (클라이언트가 읽는 만큼만 생성)
+        yield b"<html><body>"
+        for _ in range(100000):
+            served.append(len(paragraph))
+            yield paragraph
+
+    def handler(request):
+        return httpx.Response(200, headers={"Content-Type": "text/html; charset=utf-8"}, content=body())
+
+    fetcher.client.close()
+    fetcher.client = httpx.Client(transport=httpx.MockTransport(handler))
+    passages = fetcher.fetch("http://example.test/large")
+
+    assert passages
+    # 한도까지만 받아 파싱 (잘린 마지막 문단은 짧을 수 있음)
+    assert sum(len(p.encode("utf-8")) for p in passages) <= fetcher.max_bytes
+    # 한도를 넘긴 조각 하나까지만 읽고 나머지 본문은 요청하지 않음
+    assert sum(served) < fetcher.max_bytes + len(paragraph)
+
+
+def test_fetch_many_isolates_failures(server, fetcher):
+    _httpd, base = server
+    pages = fetcher.fetch_many([f"{base}/article", f"{base}/pdf", f"{base}/article"])
+    assert len(pages) == 2
+    assert len(pages[f"{base}/article"]) == 2
+    assert pages[f"{base}/pdf"] == []
+
+
+def test_page_cache_round_trip(server, tmp_path):
+    httpd, base = server
+    fetcher = PageFetcher(timeout=0.5, cache=PageCache(str(tmp_path)))
+    try:
+        first = fetcher.fetch(f"{base}/article")
+        second = fetcher.fetch(f"{base}/article")
+    finally:
+        fetcher.close()
+    assert first == second
+    assert httpd.requests == ["/article"]
+
+
+def test_extract_main_text_drops_noise():
+    assert all("메뉴" not in passage for passage in extract_main_text(ARTICLE))
+
+
+def test_dedupe_passages_removes_near_duplicates():
+    passages = ["삼성전자 상반기 영업이익이 크게 늘었습니다.", "삼성전자 상반기 영업이익이 크게 늘었습니다!", "전혀 다른 문장입니다."]
+    assert dedupe_passages(passages) == [passages[0], passages[2]]
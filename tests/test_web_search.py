@@ -0,0 +1,108 @@
+import pytest
+
+import web_search
+from web_search import SearchBackend, SearchCache, WebSearcher, normalize_query
+
+
+RESULTS = [{"title": "삼성전자 실적", "content": "영업이익 증가", "url": "https://example.com/1"}]
+
+
+class _CountingBackend(SearchBackend):
+    name = "counting"
+
+    def __init__(self, results=RESULTS):
+        self.results = results
+        self.queries = []
+
+    def search(self, query, max_results=5):
+        self.queries.append(query)
+        return self.results[:max_results]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """web_search 모듈의 time.time()을 손으로 움직이는 시계"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(web_search.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return SearchCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_entries=2)
+
+
+def test_search_backend_requires_search():
+    class _NoSearch(SearchBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        _NoSearch()
+
+
+def test_normalize_query_ignores_case_punctuation_and_word_order():
+    assert normalize_query("삼성전자  영업이익?") == normalize_query("영업이익, 삼성전자 삼성전자")
+    assert normalize_query("HBM 수요") == "hbm 수요"
+
+
+def test_cache_key_normalizes_query_but_keeps_backend_and_size():
+    key = SearchCache.make_key("tavily", "삼성전자 영업이익", 5)
+
+    assert key == SearchCache.make_key("tavily", "영업이익 삼성전자!", 5)
+    assert key != SearchCache.make_key("local", "삼성전자 영업이익", 5)
+    assert key != SearchCache.make_key("tavily", "삼성전자 영업이익", 3)
+
+
+def test_repeated_search_hits_cache(cache):
+    backend = _CountingBackend()
+    searcher = WebSearcher(backend, cache)
+
+    assert searcher.search("삼성전자 영업이익") == RESULTS
+    assert searcher.search("영업이익 삼성전자") == RESULTS
+    assert backend.queries == ["삼성전자 영업이익"]
+
+
+def test_expired_entry_is_searched_again(cache, clock):
+    backend = _CountingBackend()
+    searcher = WebSearcher(backend, cache)
+    searcher.search("삼성전자 영업이익")
+
+    clock[0] += 59
+    searcher.search("삼성전자 영업이익")
+    assert len(backend.queries) == 1
+
+    clock[0] += 2
+    searcher.search("삼성전자 영업이익")
+    assert len(backend.queries) == 2
+
+
+def test_expired_entry_is_deleted_on_read(cache, clock):
+    cache.put("key", "질문", RESULTS)
+    clock[0] += 61
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    cache.put("a", "a", RESULTS)
+    clock[0] += 1
+    cache.put("b", "b", RESULTS)
+    clock[0] += 1
+    cache.get("a")
+    clock[0] += 1
+    cache.put("c", "c", RESULTS)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == RESULTS
+
+
+def test_empty_results_are_not_cached(cache):
+    backend = _CountingBackend(results=[])
+    searcher = WebSearcher(backend, cache)
+    searcher.search("없는 회사")
+    searcher.search("없는 회사")
+
+    assert len(backend.queries) == 2
+    assert len(cache) == 0
@@ -1,16 +1,22 @@
 import os
 import ast
 import re
-from typing import TypedDict, Annotated
+import threading
+from typing import Dict, List, TypedDict, Annotated
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.utilities import SQLDatabase
-from langchain_community.tools import QuerySQLDatabaseTool
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.vectorstores import InMemoryVectorStore
 from langgraph.graph import START, StateGraph
-from tavily import TavilyClient
-from database import db as financial_db
+from database import db as financial_db, create_sql_backend, FinancialDatabase, FINANCIAL_TABLES, TIMESERIES_TABLES, SECTOR_TABLES
+from ratios import ratio_engine, METRIC_ALIASES, METRIC_SOURCES, DEFAULT_COMPARISON_METRICS
+from entity_vocabulary import CompanyVocabulary
+from financial_terms import load_financial_terms
+from web_search import create_web_searcher
+from web_fetch import create_page_fetcher, dedupe_passages
+from tracing import tracer, traced
+from metrics import metrics_callback
 
 # 환경 변수 로드
 load_dotenv()
@@ -24,6 +30,29 @@ def query_as_list(db_instance, query):
     return list(set(res))
 
 
+class CachedEmbeddings(Embeddings):
+    """문서 임베딩 결과를 텍스트별로 보관하는 래퍼입니다.
+    
+    데이터 재적재 시 새 도구 인스턴스가 같은 캐시를 넘겨받아,
+    새로 추가된 회사명/항목명만 임베딩 API를 호출합니다.
+    """
+    
+    def __init__(self, embeddings: Embeddings, cache: Dict[str, List[float]] = None):
+        self.embeddings = embeddings
+        self.cache = cache if cache is not None else {}
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        missing = list(dict.fromkeys(t for t in texts if t not in self.cache))
+        if missing:
+            for text, vector in zip(missing, self.embeddings.embed_documents(missing)):
+                self.cache[text] = vector
+        tracer.annotate(embedded=len(missing), reused=len(texts) - len(missing))
+        return [self.cache[t] for t in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
 class State(TypedDict):
     """Text2SQL 상태를 정의합니다."""
     question: str
@@ -38,37 +67,61 @@ class QueryOutput(TypedDict):
 
 
 class FinancialAnalysisTools:
-    def __init__(self):
+    def __init__(self, database: FinancialDatabase = None, previous: "FinancialAnalysisTools" = None):
+        """
+        Args:
+            database: 조회할 데이터베이스 (기본값: 전역 인스턴스)
+            previous: 교체 대상 기존 인스턴스 (임베딩·웹 검색 캐시를 이어받음)
+        """
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
         
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다.")
         
-        if not self.tavily_api_key:
-            raise ValueError("TAVILY_API_KEY가 설정되지 않았습니다.")
-        
         # LLM 초기화
         self.llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
-            api_key=self.openai_api_key
+            api_key=self.openai_api_key,
+            callbacks=[metrics_callback]
         )
         
         # SQL 데이터베이스 연결
-        self.db = SQLDatabase.from_uri("sqlite:///financial_data.db")
+        self.financial_db = database or financial_db
+        # 생성된 SQL을 실행할 백엔드 (SQL_BACKEND=sqlite이면 financial_db 자체, duckdb이면 같은 데이터를 옮긴 DuckDB 파일)
+        self.sql_backend = create_sql_backend(self.financial_db)
+        # Text2SQL 프롬프트용 스키마 (차원/팩트 테이블 대신 기존 컬럼명을 유지하는 호환 뷰와 시계열·성장률·업종 집계만 노출)
+        self.table_info = self.sql_backend.describe_tables(FINANCIAL_TABLES + TIMESERIES_TABLES + SECTOR_TABLES)
         
-        # Tavily 클라이언트 초기화
-        self.tavily_client = TavilyClient(api_key=self.tavily_api_key)
+        if previous is not None:
+            # 데이터와 무관한 웹 검색기/페이지 수집기는 캐시째로 재사용
+            self.web_searcher = previous.web_searcher
+            self.page_fetcher = previous.page_fetcher
+        else:
+            # 웹 검색기 초기화 (Tavily 또는 로컬 백엔드 + 영구 캐시)
+            self.web_searcher = create_web_searcher(self.tavily_api_key)
+            
+            # 검색 결과 페이지 본문 수집기 (WEB_FETCH_ENABLED=true일 때만 사용)
+            self.page_fetcher = create_page_fetcher()
         
-        # 벡터스토어 초기화 (고유명사 처리용)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+        # 벡터스토어 초기화 (고유명사 처리용, 기존 인스턴스의 임베딩 캐시 재사용)
+        self.embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(model="text-embedding-3-large"),
+            cache=previous.embeddings.cache if previous is not None else None,
+        )
         self.vector_store = InMemoryVectorStore(self.embeddings)
         self.entity_retriever = None
         
+        # 회사명 사전 (질문에서 회사명을 LLM 없이 추출)
+        self.company_vocabulary = CompanyVocabulary([])
+        
         # 고유명사 벡터스토어 구축
         self._build_entity_vector_store()
         
+        # 재무용어 사전 (질문의 용어를 업종 그룹별 항목코드로 해석, 시작 시 메모리에 적재)
+        self.term_dictionary = load_financial_terms(self.financial_db)
+        
         # Text2SQL 그래프 초기화
         self.text2sql_graph = self._build_text2sql_graph()
     
@@ -76,15 +129,18 @@ class FinancialAnalysisTools:
         """회사명과 재무항목명을 벡터스토어에 저장합니다."""
         try:
             # DB에서 회사명과 항목명 추출
-            companies = financial_db.get_all_companies()
-            items = financial_db.get_all_items()
+            companies = self.financial_db.get_all_companies()
+            items = self.financial_db.get_all_items()
+            
+            self.company_vocabulary = CompanyVocabulary(companies)
             
             print(f"회사명 {len(companies)}개, 재무항목 {len(items)}개를 벡터스토어에 저장 중...")
             
             # 벡터스토어에 추가
             all_entities = companies + items
             if all_entities:
-                self.vector_store.add_texts(all_entities)
+                with tracer.span("embedding.documents", texts=len(all_entities)):
+                    self.vector_store.add_texts(all_entities)
                 self.entity_retriever = self.vector_store.as_retriever(search_kwargs={"k": 10})
                 print("고유명사 벡터스토어 구축 완료")
             else:
@@ -93,24 +149,44 @@ class FinancialAnalysisTools:
             print(f"벡터스토어 구축 중 오류: {e}")
             self.entity_retriever = None
     
+    @traced("tool.entity_search")
     def search_entities(self, query: str) -> str:
         """질문에서 고유명사를 검색합니다."""
         if not self.entity_retriever:
             return ""
         
         try:
-            docs = self.entity_retriever.invoke(query)
+            with tracer.span("embedding.query"):
+                docs = self.entity_retriever.invoke(query)
             entities = [doc.page_content for doc in docs]
             return "\n".join(entities)
         except Exception as e:
             print(f"고유명사 검색 중 오류: {e}")
             return ""
     
-    def _build_text2sql_graph(self) -> StateGraph:
-        """Text2SQL 그래프를 구축합니다 (고유명사 처리 포함)."""
+    def match_item_names(self, question: str, per_term: int = 15) -> List[str]:
+        """질문의 단어로 이름 인덱스(FTS5 trigram)를 조회해 DB에 있는 실제 항목명을 반환합니다.
         
-        # SQL 쿼리 생성 프롬프트 (고유명사 정보 포함)
-        query_prompt_template = ChatPromptTemplate.from_template("""
+        조사가 붙은 단어('영업이익률은')는 뒤에서부터 줄여가며 가장 긴 일치를 사용합니다.
+        2글자 검색어는 노이즈가 많아 알려진 재무용어('매출', '자산' 등)일 때만 사용합니다.
+        """
+        company_words = {name.lower() for name in self.company_vocabulary.extract(question)}
+        names = []
+        for word in re.findall(r"[0-9A-Za-z가-힣]{2,}", question):
+            if word.lower() in company_words:
+                continue
+            for end in range(len(word), 1, -1):
+                term = word[:end]
+                if end == 2 and term not in METRIC_ALIASES:
+                    break
+                hits = self.financial_db.search_names(term, kind="item", limit=per_term)
+                if hits:
+                    names.extend(name for _kind, name in hits if name not in names)
+                    break
+        return names
+    
+    # SQL 쿼리 생성 프롬프트 (고유명사 정보 포함, 예시 SQL은 SQLite 방언이며 실행 백엔드가 자기 방언으로 변환)
+    QUERY_PROMPT = """
 Given an input question, create a syntactically correct {dialect} query to run to help find the answer. 
 
 **CRITICAL: LIMIT Rules - READ THIS CAREFULLY!**
@@ -137,8 +213,8 @@ Check if the question contains ANY of these keywords:
 When user specifies ranges like "100억 이상 1000억 미만", "X 이상 Y 미만", "X ~ Y":
 - ALWAYS use BOTH lower bound (>=) AND upper bound (<)
 - Example: "매출액 100억 이상 1000억 미만"
-  → `CAST(REPLACE(매출액, ',', '') AS REAL) >= 10000000000`
-  → `AND CAST(REPLACE(매출액, ',', '') AS REAL) < 100000000000`
+  → `매출액 >= 10000000000`
+  → `AND 매출액 < 100000000000`
 - "이상" = >= (inclusive), "미만" = < (exclusive)
 - "초과" = > (exclusive), "이하" = <= (inclusive)
 - NEVER forget the upper bound! This is critical for accurate filtering!
@@ -183,91 +259,47 @@ Entity names and their relationships to consider:
 4. If multiple companies match, prioritize the main/parent company
 
 **Example Queries:**
-- "kt의 영업이익" → WHERE 회사명 = '케이티' AND 항목명 LIKE '%영업이익%'
-- "삼성전자 매출" → WHERE 회사명 = '삼성전자' AND 항목명 LIKE '%매출%'
-- "SK텔레콤 순이익" → WHERE 회사명 = 'SK텔레콤' AND 항목명 LIKE '%순이익%'
-
-## CRITICAL: Financial Term Mapping (재무용어 매핑)
-**When user asks about financial terms, map them to actual column names in the database:**
-
-**Balance Sheet Terms (재무상태표):**
-- "자산" → Look for '자산총계' or '자산 총계'
-  - Example: "삼성전자 자산은?" → WHERE 항목명 LIKE '%자산총계%' OR 항목명 = '자산총계'
-- "부채" → Look for '부채총계' or '부채 총계'
-- "자본" → Look for '자본총계' or '자본 총계'
-- "유동자산" → '유동자산' or starts with '유동자산'
-- "비유동자산" → '비유동자산' or starts with '비유동자산'
-
-**Income Statement Terms (손익계산서):**
-- "매출", "매출액" → **CRITICAL: Industry-specific mapping!**
-  - **General Manufacturing (제조업: 삼성전자, SK하이닉스, etc.)**: Use '매출액'
-    - WHERE 항목명 LIKE '%매출액%' OR 항목명 LIKE 'I. 매출%'
-  - **Finance/Telecom (금융/통신: SK텔레콤, 케이티, LG유플러스, etc.)**: Use '영업수익'
-    - WHERE 항목명 LIKE '%영업수익%' OR 항목명 = '영업수익'
-  - **IMPORTANT**: Try BOTH patterns if company type is unclear:
-    - WHERE (항목명 LIKE '%매출액%' OR 항목명 LIKE '%영업수익%')
-  
-- "영업이익" → Look for '영업이익' (including variations like '영업이익(손실)')
-  - WHERE 항목명 LIKE '%영업이익%'
-
-- "순이익", "당기순이익" → **CRITICAL: Company-specific variations!**
-  - **케이티, LG유플러스**: "반기순이익"
-  - **SK텔레콤**: "당기순이익" (반기순이익 없음!)
-  - **삼성전자, SK하이닉스**: "반기순이익"
-  - **ALWAYS use ALL patterns to catch all companies**:
-    - WHERE (항목명 LIKE '%반기순이익%' OR 항목명 LIKE '%당기순이익%' OR 항목명 = '당기순이익' OR 항목명 LIKE '%순이익%')
-  - **NEVER query just '반기순이익' - SK텔레콤 will fail!**
-  - **NEVER query just '당기순이익' - 케이티/LG유플러스 will fail!**
-
-- "매출총이익" → Look for '매출총이익'
-  - WHERE 항목명 LIKE '%매출총이익%'
-
-**Important Pattern Matching Rules:**
-1. For "총계" items (자산, 부채, 자본), use: `항목명 LIKE '%[term]총계%'`
-2. For income items, some have Roman numerals: `항목명 LIKE 'I. 매출%' OR 항목명 LIKE 'Ⅰ. 매출%' OR 항목명 LIKE '%매출액%'`
-3. Some items have variations (손실): `항목명 LIKE '%영업이익%'` covers both '영업이익' and '영업이익(손실)'
-
-**Complete Examples:**
-```sql
--- "삼성전자 자산은?"
-SELECT 회사명, 항목명, 당기_반기말 
-FROM balance_sheet 
-WHERE 회사명 = '삼성전자' 
-  AND (항목명 LIKE '%자산총계%' OR 항목명 = '자산총계')
-
--- "케이티 부채는?"
-SELECT 회사명, 항목명, 당기_반기말
-FROM balance_sheet
-WHERE 회사명 = '케이티'
-  AND (항목명 LIKE '%부채총계%' OR 항목명 = '부채총계')
+- "kt의 영업이익" → WHERE 회사명 = '케이티' AND 항목코드 IN (...resolved 영업이익 codes...)
+- "삼성전자 매출" → WHERE 회사명 = '삼성전자' AND 항목코드 IN (...resolved 매출액 codes...)
+
+## CRITICAL: Financial Terms (재무용어) — use the resolved 항목코드
+The user's financial terms have already been resolved by a synonym dictionary built from this database.
+The "Resolved financial terms" list in the entity section gives, per term, the table and, per industry group
+(은행/증권/보험/금융기타/일반, with the question's companies in parentheses), the 항목코드 values to use.
+항목명 varies by company ('반기순이익', '당기순이익(손실)', 'Ⅰ.매출액', ...) but 항목코드 does not.
+
+**Rules:**
+1. For every resolved term, filter with `항목코드 IN (...)` using exactly the listed codes, on the listed table
+2. Select 항목명 as well so the answer can show the company's own label
+3. If the entry has a note (e.g. 은행 has no 매출액), follow it and explain it in the answer
+4. If a term is NOT in the resolved list, use the "Matched 항목명 values" list with `항목명 IN ('...', '...')`
+5. Only if neither list has it, fall back to `항목명 LIKE '%...%'`
 
--- "SK텔레콤 매출은?" (통신사 → 영업수익)
-SELECT 회사명, 항목명, 당기_반기_누적
+**Examples:**
+```sql
+-- "삼성전자 매출과 순이익은?" (resolved: 매출액 → 'ifrs-full_Revenue', 순이익 → 'ifrs-full_ProfitLoss')
+SELECT 회사명, 연결구분, 항목명, 당기_반기_누적
 FROM income_statement
-WHERE 회사명 = 'SK텔레콤'
-  AND (항목명 LIKE '%영업수익%' OR 항목명 LIKE '%매출액%')
+WHERE 회사명 = '삼성전자'
+  AND 항목코드 IN ('ifrs-full_Revenue', 'ifrs-full_ProfitLoss')
 
--- "케이티 매출액, 영업이익, 순이익은?" (다중 항목 조회)
-SELECT 회사명, 항목명, 당기_반기_누적
-FROM income_statement
+-- "케이티 자산은?" (resolved: 자산총계 → 'ifrs-full_Assets')
+SELECT 회사명, 연결구분, 항목명, 당기_반기말
+FROM balance_sheet
 WHERE 회사명 = '케이티'
-  AND (항목명 LIKE '%영업수익%' OR 항목명 LIKE '%매출액%' 
-       OR 항목명 LIKE '%영업이익%' 
-       OR 항목명 LIKE '%반기순이익%' OR 항목명 LIKE '%당기순이익%' OR 항목명 LIKE '%순이익%')
-
--- "SK텔레콤 순이익은?" (당기순이익 사용! - 반기순이익 없음)
-SELECT 회사명, 항목명, 당기_반기_누적
-FROM income_statement
-WHERE 회사명 = 'SK텔레콤'
-  AND (항목명 LIKE '%반기순이익%' OR 항목명 LIKE '%당기순이익%' OR 항목명 = '당기순이익' OR 항목명 LIKE '%순이익%')
-
--- "삼성전자 순이익은?" (반기순이익 사용)
-SELECT 회사명, 항목명, 당기_반기_누적
-FROM income_statement
-WHERE 회사명 = '삼성전자'
-  AND (항목명 LIKE '%반기순이익%' OR 항목명 LIKE '%당기순이익%' OR 항목명 LIKE '%순이익%')
+  AND 항목코드 = 'ifrs-full_Assets'
 ```
 
+## CRITICAL: Statement Basis (연결/별도)
+Every table stores consolidated and separate statements side by side, distinguished by 연결구분 ('연결' or '별도').
+재무제표구분 tells 손익계산서 from 포괄손익계산서 in income_statement.
+- If the question says "연결" → add `연결구분 = '연결'`; if it says "별도" or "개별" → add `연결구분 = '별도'`
+- If the question does not say → select 연결구분 as a column so both bases are visible, and prefer '연결' when answering
+- NEVER add up or compare a '연결' figure with a '별도' figure
+- When joining two rows (self-join or income_statement ↔ balance_sheet) ALWAYS match `AND x.연결구분 = y.연결구분`,
+  and filter one basis (`연결구분 = '연결'` unless 별도 is asked); otherwise 연결 and 별도 rows cross-multiply
+- Example: "삼성전자 연결 영업이익" → WHERE 연결구분 = '연결' AND 회사명 = '삼성전자' AND 항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+
 ## 🚨 CRITICAL: Ambiguous Company Name Handling 🚨
 **Problem:** User asks "sk의 매출액" → 25 companies match (SK, SKC, SK텔레콤, SK하이닉스, etc.)
 
@@ -312,17 +344,15 @@ WHERE 회사명 IN ('SK텔레콤', 'SK하이닉스', 'SK이노베이션')
 
 **2. 순이익률 (Net Profit Margin):**
 - Formula: (순이익 / 매출액) × 100
-- **CRITICAL**: For current 반기 data, use '반기순이익' not '당기순이익'
-- **CRITICAL**: For telecom companies, use '영업수익' not '매출액'
-- SQL Approach: Query BOTH 순이익 (반기순이익) and 매출액 (or 영업수익)
+- SQL Approach: Query BOTH 순이익 and 매출액 using their resolved 항목코드
 
 **3. ROE (Return on Equity) / 자기자본이익률:**
-- Formula: (당기순이익 / 자본총계) × 100
-- SQL Approach: Query 당기순이익 from income_statement AND 자본총계 from balance_sheet
+- Formula: (순이익 / 자본총계) × 100
+- SQL Approach: Query 순이익 from income_statement AND 자본총계 from balance_sheet
 
 **4. ROA (Return on Assets) / 총자산이익률:**
-- Formula: (당기순이익 / 자산총계) × 100
-- SQL Approach: Query 당기순이익 from income_statement AND 자산총계 from balance_sheet
+- Formula: (순이익 / 자산총계) × 100
+- SQL Approach: Query 순이익 from income_statement AND 자산총계 from balance_sheet
 
 **5. 부채비율 (Debt Ratio):**
 - Formula: (부채총계 / 자본총계) × 100
@@ -332,116 +362,76 @@ WHERE 회사명 IN ('SK텔레콤', 'SK하이닉스', 'SK이노베이션')
 
 **Option A: Use SQL JOIN and Calculate (RECOMMENDED)**
 ```sql
--- 영업이익률 계산 예시 (제조업 - 삼성전자)
+-- 영업이익률 계산 예시 (삼성전자)
 SELECT 
     i_op.회사명,
     i_op.항목명 as 영업이익_항목,
     i_op.당기_반기_누적 as 영업이익,
     i_rev.항목명 as 매출_항목,
     i_rev.당기_반기_누적 as 매출액,
-    ROUND(CAST(REPLACE(i_op.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL), 2) as 영업이익률
-FROM income_statement i_op
-JOIN income_statement i_rev ON i_op.회사명 = i_rev.회사명 
-    AND i_op.결산기준일 = i_rev.결산기준일
-WHERE i_op.회사명 = '삼성전자'
-  AND i_op.항목명 LIKE '%영업이익%'
-  AND (i_rev.항목명 LIKE '%매출액%' OR i_rev.항목명 LIKE 'I. 매출%')
-LIMIT 1;
-
--- 영업이익률 계산 예시 (통신사 - 케이티) - 영업수익 사용!
-SELECT 
-    i_op.회사명,
-    i_op.항목명 as 영업이익_항목,
-    i_op.당기_반기_누적 as 영업이익,
-    i_rev.항목명 as 매출_항목,
-    i_rev.당기_반기_누적 as 영업수익,
-    ROUND(CAST(REPLACE(i_op.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL), 2) as 영업이익률
+    ROUND(CAST(i_op.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(i_rev.당기_반기_누적 AS REAL), 2) as 영업이익률
 FROM income_statement i_op
 JOIN income_statement i_rev ON i_op.회사명 = i_rev.회사명 
     AND i_op.결산기준일 = i_rev.결산기준일
-WHERE i_op.회사명 = '케이티'
-  AND i_op.항목명 LIKE '%영업이익%'
-  AND (i_rev.항목명 LIKE '%영업수익%' OR i_rev.항목명 LIKE '%매출액%')
+    AND i_op.연결구분 = i_rev.연결구분
+WHERE i_op.연결구분 = '연결'
+  AND i_op.회사명 = '삼성전자'
+  AND i_op.항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+  AND i_rev.항목코드 = 'ifrs-full_Revenue'
 LIMIT 1;
 
--- 순이익률 계산 예시 - 삼성전자 (반기순이익)
+-- 순이익률 계산 예시 (삼성전자)
 SELECT 
     i_net.회사명,
     i_net.항목명 as 순이익_항목,
     i_net.당기_반기_누적 as 순이익,
     i_rev.항목명 as 매출_항목,
     i_rev.당기_반기_누적 as 매출,
-    ROUND(CAST(REPLACE(i_net.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL), 2) as 순이익률
+    ROUND(CAST(i_net.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(i_rev.당기_반기_누적 AS REAL), 2) as 순이익률
 FROM income_statement i_net
 JOIN income_statement i_rev ON i_net.회사명 = i_rev.회사명 
     AND i_net.결산기준일 = i_rev.결산기준일
-WHERE i_net.회사명 = '삼성전자'
-  AND (i_net.항목명 LIKE '%반기순이익%' OR i_net.항목명 LIKE '%당기순이익%' OR i_net.항목명 LIKE '%순이익%')
-  AND (i_rev.항목명 LIKE '%매출액%' OR i_rev.항목명 LIKE '%영업수익%')
-LIMIT 1;
-
--- 순이익률 계산 예시 - SK텔레콤 (당기순이익 + 영업수익)
-SELECT 
-    i_net.회사명,
-    i_net.항목명 as 순이익_항목,
-    i_net.당기_반기_누적 as 순이익,
-    i_rev.항목명 as 매출_항목,
-    i_rev.당기_반기_누적 as 영업수익,
-    ROUND(CAST(REPLACE(i_net.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL), 2) as 순이익률
-FROM income_statement i_net
-JOIN income_statement i_rev ON i_net.회사명 = i_rev.회사명 
-    AND i_net.결산기준일 = i_rev.결산기준일
-WHERE i_net.회사명 = 'SK텔레콤'
-  AND (i_net.항목명 LIKE '%반기순이익%' OR i_net.항목명 LIKE '%당기순이익%' OR i_net.항목명 = '당기순이익')
-  AND (i_rev.항목명 LIKE '%영업수익%' OR i_rev.항목명 LIKE '%매출액%')
+    AND i_net.연결구분 = i_rev.연결구분
+WHERE i_net.연결구분 = '연결'
+  AND i_net.회사명 = '삼성전자'
+  AND i_net.항목코드 = 'ifrs-full_ProfitLoss'
+  AND i_rev.항목코드 = 'ifrs-full_Revenue'
 LIMIT 1;
 ```
 
 **Option B: Query Separately and Calculate in Answer**
 ```sql
--- For manufacturing companies (제조업)
 -- Step 1: Get 영업이익
 SELECT 회사명, 항목명, 당기_반기_누적 as 영업이익
 FROM income_statement
-WHERE 회사명 = '삼성전자' AND 항목명 LIKE '%영업이익%';
+WHERE 회사명 = '삼성전자' AND 항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities');
 
 -- Step 2: Get 매출액  
 SELECT 회사명, 항목명, 당기_반기_누적 as 매출액
 FROM income_statement
-WHERE 회사명 = '삼성전자' AND (항목명 LIKE '%매출액%' OR 항목명 LIKE 'I. 매출%');
+WHERE 회사명 = '삼성전자' AND 항목코드 = 'ifrs-full_Revenue';
 
--- For telecom companies (통신사)
--- Step 1: Get 영업이익
-SELECT 회사명, 항목명, 당기_반기_누적 as 영업이익
-FROM income_statement
-WHERE 회사명 = '케이티' AND 항목명 LIKE '%영업이익%';
-
--- Step 2: Get 영업수익 (매출액 대신)
-SELECT 회사명, 항목명, 당기_반기_누적 as 영업수익
-FROM income_statement
-WHERE 회사명 = '케이티' AND (항목명 LIKE '%영업수익%' OR 항목명 LIKE '%매출액%');
-
--- Step 3: Get 순이익 (반기순이익 or 당기순이익 - 회사마다 다름!)
-SELECT 회사명, 항목명, 당기_반기_누적 as 순이익
-FROM income_statement
-WHERE 회사명 = '케이티' AND (항목명 LIKE '%반기순이익%' OR 항목명 LIKE '%당기순이익%' OR 항목명 LIKE '%순이익%');
-
--- SK텔레콤의 경우 (당기순이익만 있음)
+-- Step 3: Get 순이익 (항목명은 반기순이익/당기순이익 등 회사마다 다르지만 항목코드는 같음)
 SELECT 회사명, 항목명, 당기_반기_누적 as 순이익
 FROM income_statement
-WHERE 회사명 = 'SK텔레콤' AND (항목명 LIKE '%반기순이익%' OR 항목명 LIKE '%당기순이익%' OR 항목명 = '당기순이익');
+WHERE 회사명 = '삼성전자' AND 항목코드 = 'ifrs-full_ProfitLoss';
 
--- Then in the answer generation, calculate: (영업이익 / 영업수익 * 100)
+-- The system then attaches 영업이익률(%) etc. to the result automatically
 ```
 
+**Automatic Ratio Columns (자동 비율 계산):**
+After the query runs, the system computes ratios exactly and attaches them to the result whenever the raw
+values are present. Alias raw value columns with these standard names so they are recognized:
+매출액 (or 영업수익), 영업이익, 순이익, 자산총계, 부채총계, 자본총계, 유동자산, 유동부채, 이자비용, 영업활동현금흐름.
+Long-format results (회사명, 항목명, 당기_반기_누적) are also recognized.
+Computing ratios in SQL is still required when you FILTER or ORDER BY a ratio.
+
 **Important Notes:**
-1. When user asks for "영업이익률", "순이익률", "ROE", "ROA", or "부채비율", you MUST calculate it
+1. When user asks for "영업이익률", "순이익률", "ROE", "ROA", or "부채비율", make sure the raw values are selected
 2. Use SQL JOIN when possible (Option A) for efficiency
-3. If JOIN is complex, query separately and calculate in answer (Option B)
+3. If JOIN is complex, select the raw values in long format (Option B); ratios are attached automatically
 4. Always show both the raw numbers AND the calculated ratio percentage
 5. Format: "영업이익 11조원 / 매출액 50조원 = 영업이익률 22%"
 
@@ -457,10 +447,11 @@ SELECT
     b_equity.당기_반기말 as 자본,
     ROUND(b_debt.당기_반기말 * 100.0 / b_equity.당기_반기말, 2) as 부채비율
 FROM balance_sheet b_debt
-JOIN balance_sheet b_equity ON b_debt.회사명 = b_equity.회사명
-WHERE b_debt.회사명 = '케이티'
-  AND b_debt.항목명 LIKE '%부채총계%'
-  AND b_equity.항목명 LIKE '%자본총계%';
+JOIN balance_sheet b_equity ON b_debt.회사명 = b_equity.회사명 AND b_debt.연결구분 = b_equity.연결구분
+WHERE b_debt.연결구분 = '연결'
+  AND b_debt.회사명 = '케이티'
+  AND b_debt.항목코드 = 'ifrs-full_Liabilities'
+  AND b_equity.항목코드 = 'ifrs-full_Equity';
 ```
 
 ## CRITICAL: Multiple Conditions Across Tables (복합 조건 쿼리)
@@ -480,9 +471,11 @@ FROM income_statement i
 JOIN balance_sheet b 
     ON i.회사명 = b.회사명 
     AND i.결산기준일 = b.결산기준일
-WHERE i.항목명 LIKE '%영업이익%'
+    AND i.연결구분 = b.연결구분
+WHERE i.연결구분 = '연결'
+  AND i.항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
   AND i.당기_반기_누적 > 100000000000  -- 1000억
-  AND b.항목명 LIKE '%자산총계%'
+  AND b.항목코드 = 'ifrs-full_Assets'
   AND b.당기_반기말 > 1000000000000  -- 1조
 ORDER BY i.당기_반기_누적 DESC
 LIMIT 20;
@@ -504,16 +497,20 @@ FROM income_statement i_op
 JOIN income_statement i_rev 
     ON i_op.회사명 = i_rev.회사명 
     AND i_op.결산기준일 = i_rev.결산기준일
+    AND i_op.연결구분 = i_rev.연결구분
 JOIN balance_sheet b_debt 
     ON i_op.회사명 = b_debt.회사명 
     AND i_op.결산기준일 = b_debt.결산기준일
+    AND i_op.연결구분 = b_debt.연결구분
 JOIN balance_sheet b_equity 
     ON i_op.회사명 = b_equity.회사명 
     AND i_op.결산기준일 = b_equity.결산기준일
-WHERE i_op.항목명 LIKE '%영업이익%'
-  AND i_rev.항목명 LIKE '%매출액%'
-  AND b_debt.항목명 = '부채총계'
-  AND b_equity.항목명 = '자본총계'
+    AND i_op.연결구분 = b_equity.연결구분
+WHERE i_op.연결구분 = '연결'
+  AND i_op.항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+  AND i_rev.항목코드 = 'ifrs-full_Revenue'
+  AND b_debt.항목코드 = 'ifrs-full_Liabilities'
+  AND b_equity.항목코드 = 'ifrs-full_Equity'
   AND (i_op.당기_반기_누적 * 100.0 / i_rev.당기_반기_누적) >= 10  -- 영업이익률 10%+
   AND (b_debt.당기_반기말 * 100.0 / b_equity.당기_반기말) < 50   -- 부채비율 50%-
 ORDER BY 영업이익률 DESC
@@ -528,9 +525,11 @@ FROM income_statement i_rev
 JOIN income_statement i_net 
     ON i_rev.회사명 = i_net.회사명 
     AND i_rev.결산기준일 = i_net.결산기준일
-WHERE i_rev.항목명 LIKE '%매출액%'
+    AND i_rev.연결구분 = i_net.연결구분
+WHERE i_rev.연결구분 = '연결'
+  AND i_rev.항목코드 = 'ifrs-full_Revenue'
   AND i_rev.당기_반기_누적 > 10000000000000  -- 10조
-  AND i_net.항목명 = '반기순이익'
+  AND i_net.항목코드 = 'ifrs-full_ProfitLoss'
   AND i_net.당기_반기_누적 > 1000000000000   -- 1조
 ORDER BY i_rev.당기_반기_누적 DESC
 LIMIT 20;
@@ -538,7 +537,7 @@ LIMIT 20;
 
 **Important Notes for Multiple Conditions:**
 1. Always use DISTINCT to avoid duplicate rows
-2. JOIN on both 회사명 AND 결산기준일
+2. JOIN on 회사명, 결산기준일 AND 연결구분, and filter one basis (`연결구분 = '연결'` unless 별도 is asked)
 3. Use meaningful column aliases (as 영업이익, as 자산총계)
 4. Add ORDER BY to show most relevant results first
 5. Use LIMIT to prevent too many results (default 10-20, or 100 if user asks for "모두")
@@ -550,10 +549,7 @@ When filtering by ratio conditions (예: "영업이익률 20% 이상"):
 2. Filter using the SAME calculation: `WHERE (영업이익 * 100.0 / 매출액) >= 20`
 3. The calculated column will show percentage value (예: 14.05 means 14.05%)
 4. Include both raw data AND calculated ratio in SELECT for transparency
-5. **CRITICAL**: Use EXACT item name matching to avoid partial matches!
-   - 매출액: Use `항목명 = '매출액'` NOT `항목명 LIKE '%매출액%'`
-   - 영업수익: Use `항목명 = '영업수익'` NOT `항목명 LIKE '%영업수익%'`
-   - 영업이익: Use `(항목명 = '영업이익' OR 항목명 = '영업이익(손실)')` NOT `항목명 LIKE '%영업이익%'`
+5. **CRITICAL**: Use the resolved 항목코드, NOT `항목명 LIKE '%매출액%'`
    - This prevents matching "건설계약으로 인한 매출액" or "재화의 판매로 인한 매출액"
 
 **Example 1: Filter by Operating Profit Margin (단일 조건)**
@@ -563,17 +559,19 @@ SELECT DISTINCT
     i_op.회사명,
     i_op.당기_반기_누적 as 영업이익,
     i_rev.당기_반기_누적 as 매출액,
-    ROUND(CAST(REPLACE(i_op.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL), 2) as 영업이익률
+    ROUND(CAST(i_op.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(i_rev.당기_반기_누적 AS REAL), 2) as 영업이익률
 FROM income_statement i_op
 JOIN income_statement i_rev 
     ON i_op.회사명 = i_rev.회사명 
     AND i_op.결산기준일 = i_rev.결산기준일
-WHERE (i_op.항목명 = '영업이익' OR i_op.항목명 = '영업이익(손실)')
-  AND (i_rev.항목명 = '매출액' OR i_rev.항목명 = '영업수익')
-  AND CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL) >= 100000000000  -- 1000억 이상
-  AND (CAST(REPLACE(i_op.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-       CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL)) >= 20  -- 영업이익률 20%+
+    AND i_op.연결구분 = i_rev.연결구분
+WHERE i_op.연결구분 = '연결'
+  AND i_op.항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+  AND i_rev.항목코드 = 'ifrs-full_Revenue'
+  AND i_rev.당기_반기_누적 >= 100000000000  -- 1000억 이상
+  AND (CAST(i_op.당기_반기_누적 AS REAL) * 100.0 / 
+       CAST(i_rev.당기_반기_누적 AS REAL)) >= 20  -- 영업이익률 20%+
 ORDER BY 영업이익률 DESC
 LIMIT 100;  -- "모두" 조회이므로 100
 ```
@@ -585,47 +583,36 @@ SELECT DISTINCT
     i_op.회사명,
     i_rev.당기_반기_누적 as 매출액,
     i_op.당기_반기_누적 as 영업이익,
-    ROUND(CAST(REPLACE(i_op.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL), 2) as 영업이익률
+    ROUND(CAST(i_op.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(i_rev.당기_반기_누적 AS REAL), 2) as 영업이익률
 FROM income_statement i_op
 JOIN income_statement i_rev 
     ON i_op.회사명 = i_rev.회사명 
     AND i_op.결산기준일 = i_rev.결산기준일
-WHERE (i_op.항목명 = '영업이익' OR i_op.항목명 = '영업이익(손실)')
-  AND (i_rev.항목명 = '매출액' OR i_rev.항목명 = '영업수익')
-  AND CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL) >= 10000000000   -- 100억 이상
-  AND CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL) < 100000000000   -- 1000억 미만 (CRITICAL!)
-  AND (CAST(REPLACE(i_op.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-       CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL)) >= 20  -- 영업이익률 20%+
+    AND i_op.연결구분 = i_rev.연결구분
+WHERE i_op.연결구분 = '연결'
+  AND i_op.항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+  AND i_rev.항목코드 = 'ifrs-full_Revenue'
+  AND i_rev.당기_반기_누적 >= 10000000000   -- 100억 이상
+  AND i_rev.당기_반기_누적 < 100000000000   -- 1000억 미만 (CRITICAL!)
+  AND (CAST(i_op.당기_반기_누적 AS REAL) * 100.0 / 
+       CAST(i_rev.당기_반기_누적 AS REAL)) >= 20  -- 영업이익률 20%+
 ORDER BY 영업이익률 DESC
 LIMIT 100;  -- "모두" 추출이므로 100
 ```
 
-**CRITICAL: Data Type Issue - Numbers are stored as TEXT with commas!**
-- Values like "11,361,329,000,000" are stored as TEXT, not REAL
-- You MUST remove commas before numeric comparison: `CAST(REPLACE(column, ',', '') AS REAL)`
-- For WHERE conditions: `CAST(REPLACE(당기_반기_누적, ',', '') AS REAL) > 100000000000`
-- For ORDER BY: `ORDER BY CAST(REPLACE(당기_반기_누적, ',', '') AS REAL) DESC`
-
-**Corrected Example:**
-```sql
-SELECT DISTINCT
-    i.회사명,
-    i.당기_반기_누적 as 영업이익,
-    b.당기_반기말 as 자산총계
-FROM income_statement i
-JOIN balance_sheet b 
-    ON i.회사명 = b.회사명 
-    AND i.결산기준일 = b.결산기준일
-WHERE i.항목명 LIKE '%영업이익%'
-  AND CAST(REPLACE(i.당기_반기_누적, ',', '') AS REAL) > 100000000000  -- Remove comma!
-  AND b.항목명 LIKE '%자산총계%'
-  AND CAST(REPLACE(b.당기_반기말, ',', '') AS REAL) > 1000000000000    -- Remove comma!
-ORDER BY CAST(REPLACE(i.당기_반기_누적, ',', '') AS REAL) DESC
-LIMIT 20;
-```
+**Amount columns are INTEGER (원):** compare and sort them directly (`당기_반기_누적 > 100000000000`);
+use `CAST(... AS REAL)` only when dividing one amount by another.
 
 ## IMPORTANT: Period/Time-based Data Selection
+**Report periods (보고 기간):**
+- balance_sheet, income_statement, cash_flow_statement, statement_of_changes_in_equity contain ONLY the latest DART report
+  (see 결산기준일/보고서종류 in the sample rows). Use them by default; do NOT add 결산기준일/보고서종류 filters.
+- For an earlier report ("2024년 사업보고서", "작년 3분기보고서"), query `<table>_history` (e.g. income_statement_history):
+  same columns plus 사업연도 (INTEGER) and 보고서종류 ('1분기보고서', '반기보고서', '3분기보고서', '사업보고서').
+  ALWAYS filter both, e.g. `WHERE 사업연도 = 2024 AND 보고서종류 = '사업보고서'`.
+- For trends across periods (추이, 증가율) prefer fact_timeseries / fact_growth below.
+
 **상반기 (Half-year) Data:**
 - When the question mentions "상반기" (half-year), "2025년 상반기", or "반기" (semi-annual):
   - For income_statement table, use the column `당기_반기_누적` (current half-year accumulated)
@@ -633,8 +620,8 @@ LIMIT 20;
   - The column name itself indicates the period
 
 **Examples:**
-- "삼성전자의 상반기 영업이익은?" → SELECT 당기_반기_누적 FROM income_statement WHERE 회사명='삼성전자' AND 항목명 LIKE '%영업이익%'
-- "2025년 상반기 매출" → SELECT 당기_반기_누적 FROM income_statement WHERE 항목명 LIKE '%매출%'
+- "삼성전자의 상반기 영업이익은?" → SELECT 당기_반기_누적 FROM income_statement WHERE 회사명='삼성전자' AND 항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+- "2025년 상반기 매출" → SELECT 당기_반기_누적 FROM income_statement WHERE 항목코드 = 'ifrs-full_Revenue'
 - "반기 데이터" → Use 당기_반기_누적 column
 
 **Column meanings:**
@@ -644,6 +631,67 @@ LIMIT 20;
 - 전기 = Previous year (전년도)
 - 전전기 = Year before previous
 
+## CRITICAL: Growth & Multi-period Questions (증가율/성장률/전년 대비) — use fact_growth / fact_timeseries
+Do NOT compute growth by subtracting wide columns (당기_반기_누적 - 전기_반기_누적). Use the precomputed views:
+- **fact_growth**: one row per (회사, 연결구분, 지표, 비교구분, 기간구분, 기간말) with 금액, 비교금액, 성장률 (%)
+  - 지표: 매출액, 영업이익, 순이익, 이자비용, 자산총계, 부채총계, 자본총계, 유동자산, 유동부채, 영업활동현금흐름
+  - 비교구분: '전년동기대비' (YoY, income_statement/cash_flow_statement) or '전기말대비' (balance_sheet: 반기말 vs 직전 회계연도말)
+  - 기간구분: '누적' (반기 누적, default for "상반기"), '3개월' (2분기), '시점' (balance_sheet)
+  - ALWAYS filter 기간말 = (SELECT MAX(기간말) FROM fact_growth) unless the question names a period
+  - 비교금액 < 0 means the base period was a loss (적자); say so when relevant (흑자전환)
+- **fact_timeseries**: long format (회사명, 연결구분, 재무제표, 항목코드, 항목명, 기간말, 기간구분, 금액)
+  for "추이", "전년 동기 금액", or items not in fact_growth. Filter by the resolved 항목코드.
+  It already handles financial companies (은행/증권/보험), whose 반기 누적 is stored in a different wide column.
+
+**Example: "영업이익이 전년 대비 30% 이상 증가한 기업"**
+```sql
+SELECT 회사명, 연결구분, 금액, 비교금액, 성장률
+FROM fact_growth
+WHERE 지표 = '영업이익' AND 비교구분 = '전년동기대비' AND 기간구분 = '누적'
+  AND 기간말 = (SELECT MAX(기간말) FROM fact_growth)
+  AND 성장률 >= 30
+ORDER BY 성장률 DESC
+LIMIT 100;
+```
+
+## CRITICAL: Sector / Peer Questions (업종 평균, 업종 내 위치, 순위) — use sector_metrics / company_metrics / metric_rankings
+Do NOT write GROUP BY over raw statement rows for sector statistics. Use the precomputed tables:
+- **sector_metrics**: one row per (지표, 분류, 분류값, 기간말, 연결구분) with 회사수, 평균, 중앙값, 제1사분위, 제3사분위,
+  최소, 최대, 상위기업/하위기업 ('회사명(값)' lists, 상위 = largest values)
+  - 분류: '전체', '업종구분' (은행/증권/보험/금융기타/일반), '시장구분' (유가증권시장상장법인/코스닥시장상장법인/기타법인),
+    '업종명' (e.g. '반도체 제조업', '은행 및 저축기관')
+  - "은행업" → 분류 = '업종구분' AND 분류값 = '은행'; other industries → 분류 = '업종명' AND 분류값 LIKE '%반도체%'
+- **company_metrics**: one row per (회사명, 연결구분, 지표, 기간말) with 값 and the company's 업종명 statistics
+  (업종회사수, 업종평균, 업종중앙값, 업종제1사분위, 업종제3사분위) — for "X의 업종 내 위치", "업종 평균 대비"
+- **metric_rankings**: precomputed ranks per (지표, 분류, 분류값, 기간말, 연결구분) with 순위 (1 = largest 값), 회사수, 회사명, 종목코드, 값
+  - "상위 N개 기업", "가장 높은 N곳" → ORDER BY 순위 LIMIT N; "가장 낮은/적은 N곳" → ORDER BY 순위 DESC LIMIT N
+  - "X의 순위", "업종 내 몇 위" → WHERE 회사명 = 'X' (returns 순위 and 회사수 for every 분류)
+  - Do NOT use ORDER BY 값 or RANK() over raw statements for these questions
+  - Latest period: 기간말 = (SELECT MAX(기간말) FROM metric_rankings WHERE 지표 = ... AND 분류 = ... AND 분류값 = ...)
+    (same 지표/분류/분류값 filters as the outer query so the lookup stays on the primary key)
+- 지표: 매출액, 영업이익, 순이익, 이자비용, 자산총계, 부채총계, 자본총계, 유동자산, 유동부채, 영업활동현금흐름 (amounts)
+  and 영업이익률, 순이익률, ROE, ROA, 부채비율, 유동비율 (%), 이자보상배율, 영업현금흐름/순이익 (배)
+- ALWAYS filter 기간말 = (SELECT MAX(기간말) FROM sector_metrics) and 연결구분 ('연결' unless 별도 is asked)
+
+**Example: "은행업 평균 부채비율"**
+```sql
+SELECT 분류값, 회사수, 평균, 중앙값, 제1사분위, 제3사분위, 상위기업
+FROM sector_metrics
+WHERE 지표 = '부채비율' AND 분류 = '업종구분' AND 분류값 = '은행'
+  AND 기간말 = (SELECT MAX(기간말) FROM sector_metrics) AND 연결구분 = '연결';
+```
+
+**Example: "영업이익 상위 10개 기업"**
+```sql
+SELECT 순위, 회사명, 값 AS 영업이익
+FROM metric_rankings
+WHERE 지표 = '영업이익' AND 분류 = '전체' AND 분류값 = '전체'
+  AND 기간말 = (SELECT MAX(기간말) FROM metric_rankings WHERE 지표 = '영업이익' AND 분류 = '전체' AND 분류값 = '전체')
+  AND 연결구분 = '연결'
+ORDER BY 순위
+LIMIT 10;
+```
+
 ## CRITICAL: ROE, ROA, 부채비율 - JOIN balance_sheet!
 **When the question asks for ROE, ROA, 부채비율, 유동비율:**
 - These ratios require data from BOTH income_statement AND balance_sheet
@@ -658,20 +706,21 @@ SELECT
     i_op.당기_반기_누적 as 영업이익,
     i.당기_반기_누적 as 순이익,
     b.당기_반기말 as 자본총계,
-    ROUND(CAST(REPLACE(i.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(b.당기_반기말, ',', '') AS REAL), 2) as ROE
+    ROUND(CAST(i.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(b.당기_반기말 AS REAL), 2) as ROE
 FROM income_statement i
 JOIN balance_sheet b 
-    ON i.회사명 = b.회사명 AND i.결산기준일 = b.결산기준일
-    AND b.항목명 = '자본총계'
+    ON i.회사명 = b.회사명 AND i.결산기준일 = b.결산기준일 AND i.연결구분 = b.연결구분
+    AND b.항목코드 = 'ifrs-full_Equity'
 LEFT JOIN income_statement i_rev
-    ON i.회사명 = i_rev.회사명 AND i.결산기준일 = i_rev.결산기준일
-    AND (i_rev.항목명 = '매출액' OR i_rev.항목명 = '영업수익')
+    ON i.회사명 = i_rev.회사명 AND i.결산기준일 = i_rev.결산기준일 AND i.연결구분 = i_rev.연결구분
+    AND i_rev.항목코드 = 'ifrs-full_Revenue'
 LEFT JOIN income_statement i_op
-    ON i.회사명 = i_op.회사명 AND i.결산기준일 = i_op.결산기준일
-    AND (i_op.항목명 = '영업이익' OR i_op.항목명 = '영업이익(손실)')
-WHERE i.회사명 = 'SK텔레콤'
-  AND (i.항목명 = '당기순이익' OR i.항목명 = '반기순이익')
+    ON i.회사명 = i_op.회사명 AND i.결산기준일 = i_op.결산기준일 AND i.연결구분 = i_op.연결구분
+    AND i_op.항목코드 IN ('dart_OperatingIncomeLoss', 'ifrs-full_ProfitLossFromOperatingActivities')
+WHERE i.연결구분 = '연결'
+  AND i.회사명 = 'SK텔레콤'
+  AND i.항목코드 = 'ifrs-full_ProfitLoss'
 LIMIT {top_k};
 ```
 
@@ -684,22 +733,23 @@ SELECT
     b_asset.당기_반기말 as 자산총계,
     b_equity.당기_반기말 as 자본총계,
     b_debt.당기_반기말 as 부채총계,
-    ROUND(CAST(REPLACE(i.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(b_asset.당기_반기말, ',', '') AS REAL), 2) as ROA,
-    ROUND(CAST(REPLACE(b_debt.당기_반기말, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(b_equity.당기_반기말, ',', '') AS REAL), 2) as 부채비율
+    ROUND(CAST(i.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(b_asset.당기_반기말 AS REAL), 2) as ROA,
+    ROUND(CAST(b_debt.당기_반기말 AS REAL) * 100.0 / 
+          CAST(b_equity.당기_반기말 AS REAL), 2) as 부채비율
 FROM income_statement i
 JOIN balance_sheet b_asset 
-    ON i.회사명 = b_asset.회사명 AND i.결산기준일 = b_asset.결산기준일
-    AND b_asset.항목명 = '자산총계'
+    ON i.회사명 = b_asset.회사명 AND i.결산기준일 = b_asset.결산기준일 AND i.연결구분 = b_asset.연결구분
+    AND b_asset.항목코드 = 'ifrs-full_Assets'
 JOIN balance_sheet b_equity
-    ON i.회사명 = b_equity.회사명 AND i.결산기준일 = b_equity.결산기준일
-    AND b_equity.항목명 = '자본총계'
+    ON i.회사명 = b_equity.회사명 AND i.결산기준일 = b_equity.결산기준일 AND i.연결구분 = b_equity.연결구분
+    AND b_equity.항목코드 = 'ifrs-full_Equity'
 LEFT JOIN balance_sheet b_debt
-    ON i.회사명 = b_debt.회사명 AND i.결산기준일 = b_debt.결산기준일
-    AND b_debt.항목명 = '부채총계'
-WHERE i.회사명 = '삼성전자'
-  AND (i.항목명 = '반기순이익' OR i.항목명 = '당기순이익')
+    ON i.회사명 = b_debt.회사명 AND i.결산기준일 = b_debt.결산기준일 AND i.연결구분 = b_debt.연결구분
+    AND b_debt.항목코드 = 'ifrs-full_Liabilities'
+WHERE i.연결구분 = '연결'
+  AND i.회사명 = '삼성전자'
+  AND i.항목코드 = 'ifrs-full_ProfitLoss'
 LIMIT {top_k};
 ```
 
@@ -712,22 +762,25 @@ SELECT
     i_rev.당기_반기_누적 as 매출액,
     i.당기_반기_누적 as 순이익,
     b.당기_반기말 as 자본총계,
-    ROUND(CAST(REPLACE(i.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-          CAST(REPLACE(b.당기_반기말, ',', '') AS REAL), 2) as ROE
+    ROUND(CAST(i.당기_반기_누적 AS REAL) * 100.0 / 
+          CAST(b.당기_반기말 AS REAL), 2) as ROE
 FROM income_statement i
 JOIN balance_sheet b 
     ON i.회사명 = b.회사명 
     AND i.결산기준일 = b.결산기준일
-    AND b.항목명 = '자본총계'
+    AND i.연결구분 = b.연결구분
+    AND b.항목코드 = 'ifrs-full_Equity'
 LEFT JOIN income_statement i_rev
     ON i.회사명 = i_rev.회사명 
     AND i.결산기준일 = i_rev.결산기준일
-    AND (i_rev.항목명 = '매출액' OR i_rev.항목명 = '영업수익')
-WHERE (i.항목명 = '당기순이익' OR i.항목명 = '반기순이익')
-  AND CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL) >= 10000000000    -- 100억 이상
-  AND CAST(REPLACE(i_rev.당기_반기_누적, ',', '') AS REAL) < 100000000000    -- 1000억 미만
-  AND (CAST(REPLACE(i.당기_반기_누적, ',', '') AS REAL) * 100.0 / 
-       CAST(REPLACE(b.당기_반기말, ',', '') AS REAL)) >= 10                -- ROE 10% 이상
+    AND i.연결구분 = i_rev.연결구분
+    AND i_rev.항목코드 = 'ifrs-full_Revenue'
+WHERE i.연결구분 = '연결'
+  AND i.항목코드 = 'ifrs-full_ProfitLoss'
+  AND i_rev.당기_반기_누적 >= 10000000000    -- 100억 이상
+  AND i_rev.당기_반기_누적 < 100000000000    -- 1000억 미만
+  AND (CAST(i.당기_반기_누적 AS REAL) * 100.0 / 
+       CAST(b.당기_반기말 AS REAL)) >= 10                -- ROE 10% 이상
 ORDER BY ROE DESC
 LIMIT 100;  -- "모두" 추출이므로 100
 ```
@@ -741,34 +794,66 @@ LIMIT 100;  -- "모두" 추출이므로 100
 **Key Points for balance_sheet JOIN:**
 - income_statement uses: `당기_반기_누적` (accumulated)
 - balance_sheet uses: `당기_반기말` (end of period)
-- JOIN condition: `ON i.회사명 = b.회사명 AND i.결산기준일 = b.결산기준일`
-- Always specify `항목명` in JOIN: `AND b.항목명 = '자본총계'`
+- JOIN condition: `ON i.회사명 = b.회사명 AND i.결산기준일 = b.결산기준일 AND i.연결구분 = b.연결구분`
+- Filter one basis on the main table: `WHERE i.연결구분 = '연결'` (or '별도' if asked)
+- Always specify `항목명` in JOIN: `AND b.항목코드 = 'ifrs-full_Equity'`
 
 Question: {input}
-""")
+"""
+    
+    def _build_text2sql_graph(self) -> StateGraph:
+        """Text2SQL 그래프를 구축합니다 (고유명사 처리 포함)."""
         
+        query_prompt_template = ChatPromptTemplate.from_template(self.sql_backend.adapt_prompt(self.QUERY_PROMPT))
+        
+        @traced("tool.sql_generation")
         def write_query(state: State):
             """SQL 쿼리를 생성합니다 (고유명사 정보 활용)."""
-            # 질문에서 고유명사 검색
+            # 질문에서 고유명사 검색 (벡터 유사도 + 재무용어 사전 + 항목명 부분 문자열 인덱스)
             entity_info = self.search_entities(state["question"])
+            companies = self.company_vocabulary.extract(state["question"])
+            resolved_terms = self.term_dictionary.resolve(state["question"], companies)
+            if resolved_terms:
+                tracer.annotate(resolved_terms=[item["term"] for item in resolved_terms])
+                entity_info = (entity_info + "\n\n" if entity_info else "") + (
+                    "Resolved financial terms (synonym dictionary → 항목코드 per industry group):\n"
+                    + self.term_dictionary.describe(resolved_terms)
+                )
+            item_names = self.match_item_names(state["question"])
+            if item_names:
+                entity_info = (entity_info + "\n\n" if entity_info else "") + (
+                    "Matched 항목명 values (exact DB values containing the question's terms):\n"
+                    + "\n".join(item_names)
+                )
             
             prompt = query_prompt_template.invoke({
-                "dialect": self.db.dialect,
+                "dialect": self.sql_backend.dialect,
                 "top_k": 10,
-                "table_info": self.db.get_table_info(),
+                "table_info": self.table_info,
                 "input": state["question"],
                 "entity_info": entity_info if entity_info else "No specific entities found"
             })
             
-            structured_llm = self.llm.with_structured_output(QueryOutput)
+            # include_raw로 원본 응답을 함께 받아 토큰 사용량을 기록
+            structured_llm = self.llm.with_structured_output(QueryOutput, include_raw=True)
             result = structured_llm.invoke(prompt)
-            return {"query": result["query"]}
+            tracer.record_llm_usage(result["raw"])
+            if result["parsing_error"] is not None:
+                raise result["parsing_error"]
+            return {"query": result["parsed"]["query"]}
         
+        @traced("tool.sql_execution")
         def execute_query(state: State):
-            """SQL 쿼리를 실행합니다."""
-            execute_query_tool = QuerySQLDatabaseTool(db=self.db)
-            return {"result": execute_query_tool.invoke(state["query"])}
+            """SQL 쿼리를 실행하고 재무비율을 계산해 결과에 붙입니다."""
+            try:
+                columns, rows = self.sql_backend.execute_query(state["query"])
+            except Exception as e:
+                tracer.annotate(sql_error=str(e)[:200])
+                return {"result": f"Error: {e}"}
+            tracer.annotate(rows=len(rows))
+            return {"result": ratio_engine.enrich_result(columns, rows)}
         
+        @traced("tool.answer_generation")
         def generate_answer(state: State):
             """쿼리 결과를 바탕으로 답변을 생성합니다."""
             prompt = (
@@ -787,39 +872,22 @@ Question: {input}
                 "- '**SK하이닉스**: 매출액: 39조원, 영업이익: 16조원, ROE: 5.86%'\n\n"
                 "**Example (BAD - DO NOT DO THIS!):**\n"
                 "- '매출액: 8조원, 영업이익: 9,056억원' (회사명 없음 ❌)\n\n"
-                "**CRITICAL: Financial Ratio - Check if Already Calculated in SQL!**\n"
-                "1. First, check if SQL Result already has ratio columns (영업이익률, 순이익률, ROE, etc.)\n"
-                "2. If YES: Use the calculated value AS IS (already in percentage) - DO NOT recalculate!\n"
-                "3. If NO: Calculate it yourself from the raw data\n\n"
-                "**Example:**\n"
-                "- SQL Result has '영업이익률: 14.05' → Answer: '영업이익률: 14.05%' (just add %)\n"
-                "- SQL Result has '영업이익: 1000, 매출액: 5000' → Calculate: '영업이익률: 20% (1000÷5000×100)'\n\n"
-                "**CRITICAL: Financial Ratio Calculation (재무비율 자동 계산)**\n"
-                "If the question asks for ratios (영업이익률, 순이익률, ROE, ROA, 부채비율, etc.),\n"
-                "and SQL Result contains the necessary data, YOU MUST CALCULATE IT!\n\n"
+                "**CRITICAL: Financial Ratios Are Already Calculated - DO NOT recalculate!**\n"
+                "- Ratio columns such as '영업이익률(%)', '순이익률(%)', 'ROE(%)', 'ROA(%)', '부채비율(%)',\n"
+                "  '유동비율(%)', '이자보상배율(배)', '영업현금흐름/순이익(배)' are computed exactly by the system\n"
+                "- They appear as extra columns or in the '[재무비율 (자동 계산)]' table - use the values AS IS\n"
+                "- Add the unit shown in the column name: '영업이익률(%)' 14.05 → '영업이익률: 14.05%'\n"
+                "- If a requested ratio is not in SQL Result, say that the data needed for it was not retrieved\n\n"
                 "**🚨 CRITICAL: Do NOT confuse 영업수익 vs 영업이익! 🚨**\n"
                 "- 영업수익 (Operating Revenue) = 매출액 (Revenue) = Total sales/income\n"
                 "- 영업이익 (Operating Profit/Income) = 영업수익 - 영업비용 = Profit after costs\n"
                 "- **NEVER say '영업수익 = 영업이익'! They are COMPLETELY DIFFERENT!**\n"
                 "- If SQL Result only has '영업수익' but NOT '영업이익', you MUST say:\n"
                 "  '영업수익은 X원입니다. 영업이익 정보는 제공되지 않았습니다.'\n\n"
-                "**Common Ratios:**\n"
-                "1. 영업이익률 (Operating Profit Margin) = (영업이익 / 매출액 or 영업수익) × 100\n"
-                "   ⚠️ Numerator MUST be 영업이익, NOT 영업수익!\n"
-                "2. 순이익률 (Net Profit Margin) = (순이익 / 매출액 or 영업수익) × 100\n"
-                "3. ROE (자기자본이익률) = (순이익 / 자본총계) × 100\n"
-                "4. ROA (총자산이익률) = (순이익 / 자산총계) × 100\n"
-                "5. 부채비율 (Debt Ratio) = (부채총계 / 자본총계) × 100\n\n"
-                "**How to Calculate:**\n"
-                "1. Remove commas from numbers: '47,687,046,619' → 47687046619\n"
-                "2. Divide and multiply by 100 for percentage\n"
-                "3. Round to 2 decimal places\n"
-                "4. Show calculation in answer: '영업이익률 = (47,289,352,211 ÷ 336,666,812,235) × 100 = 14.05%'\n\n"
                 "**Example:**\n"
                 "Question: 'SNT다이내믹스의 매출액과 영업이익, 영업이익률 조회해줘'\n"
-                "SQL Result: 매출액: 336,666,812,235, 영업이익: 47,289,352,211\n"
-                "Answer: '매출액: 336,666,812,235원, 영업이익: 47,289,352,211원, 영업이익률: 14.05% (계산: 47,289,352,211 ÷ 336,666,812,235 × 100)'\n\n"
-                "**NEVER say '영업이익률에 대한 정보는 제공되지 않았습니다' if you can calculate it!**\n\n"
+                "SQL Result: 회사명 | 영업이익 | 매출액 | 영업이익률(%) → SNT다이내믹스 | 47,289,352,211 | 336,666,812,235 | 14.05\n"
+                "Answer: '매출액: 336,666,812,235원, 영업이익: 47,289,352,211원, 영업이익률: 14.05%'\n\n"
                 "**CRITICAL: Number Formatting Rules**\n"
                 "- **NEVER calculate or convert number units yourself - you make mistakes!**\n"
                 "- **Use the EXACT numbers from SQL Result with commas (e.g., 47,687,046,619원)**\n"
@@ -834,14 +902,15 @@ Question: {input}
                 "Bad Examples (DO NOT DO THIS):\n"
                 "- ❌ '매출액은 4,768억 7,046만원' (wrong conversion!)\n"
                 "- ❌ '영업이익은 867억원' (wrong conversion!)\n"
-                "- ❌ '영업이익률에 대한 정보는 제공되지 않았습니다' (when you can calculate it!)\n\n"
+                "- ❌ '영업이익률에 대한 정보는 제공되지 않았습니다' (when a 영업이익률(%) column exists!)\n\n"
                 "Good Examples:\n"
                 "- ✅ '매출액은 47,687,046,619원입니다'\n"
                 "- ✅ '영업이익은 8,675,711,602원입니다'\n"
                 "- ✅ '순이익은 6,588,565,249원입니다'\n"
-                "- ✅ '영업이익률은 18.22%입니다 (계산: 8,675,711,602 ÷ 47,687,046,619 × 100)'"
+                "- ✅ '영업이익률은 18.22%입니다'"
             )
             response = self.llm.invoke(prompt)
+            tracer.record_llm_usage(response)
             return {"answer": response.content}
         
         # StateGraph 생성
@@ -852,6 +921,7 @@ Question: {input}
         
         return graph_builder.compile()
     
+    @traced("tool.financial_query")
     def query_financial_data(self, question: str) -> str:
         """재무 데이터를 조회합니다 (Text2SQL)."""
         try:
@@ -860,24 +930,62 @@ Question: {input}
         except Exception as e:
             return f"재무 데이터 조회 중 오류가 발생했습니다: {str(e)}"
     
+    @traced("tool.compare_companies")
+    def compare_companies(self, companies: list, metrics: list = None, basis: str = None) -> str:
+        """여러 회사의 지표를 한 번의 SQL로 조회해 회사 × 지표 비교표를 반환합니다 (LLM 호출 없음).
+        
+        Args:
+            companies: DB에 있는 회사명 리스트
+            metrics: 표준 지표명 리스트 (없으면 기본 비교 지표)
+            basis: '연결' 또는 '별도' (없으면 회사별로 연결 우선)
+        """
+        metrics = [m for m in (metrics or []) if m in METRIC_SOURCES] or list(DEFAULT_COMPARISON_METRICS)
+        try:
+            rows = self.financial_db.get_company_metrics(
+                companies, {metric: METRIC_SOURCES[metric] for metric in metrics}, basis=basis
+            )
+        except Exception as e:
+            return f"재무 데이터 조회 중 오류가 발생했습니다: {str(e)}"
+        
+        columns, table = ratio_engine.pivot_metric_rows(companies, metrics, rows)
+        missing = [row[0] for row in table if all(value is None for value in row[2:])]
+        basis_note = f"{basis} 재무제표" if basis else "연결 재무제표 우선, 없으면 별도"
+        
+        lines = [
+            f"[회사별 비교표] {', '.join(companies)}",
+            f"(손익·현금흐름: 당기 누적, 재무상태표: 당기말 기준 / {basis_note} / 비율은 시스템이 자동 계산)",
+            ratio_engine.format_table(columns, table),
+        ]
+        if missing:
+            lines.append(f"DB에서 데이터를 찾을 수 없는 회사: {', '.join(missing)}")
+        return "\n".join(lines)
+    
+    @traced("tool.web_search")
     def search_web(self, query: str) -> str:
         """웹 검색을 수행합니다."""
         try:
-            search_result = self.tavily_client.search(
-                query=query,
-                search_depth="advanced",
-                max_results=5
-            )
+            results = self.web_searcher.search(query, max_results=5)
             
-            if not search_result.get("results"):
+            if not results:
                 return "검색 결과를 찾을 수 없습니다."
             
-            # 검색 결과를 포맷팅
+            results = results[:3]
+            
+            # 선택 단계: 결과 페이지 본문을 동시에 가져와 스니펫 대신 사용
+            pages = {}
+            if self.page_fetcher is not None:
+                pages = self.page_fetcher.fetch_many([r.get("url", "") for r in results])
+            
+            # 검색 결과를 포맷팅 (여러 페이지에 걸친 중복 문단 제거)
             formatted_results = []
-            for result in search_result["results"][:3]:
+            seen_passages = []
+            for result in results:
                 title = result.get("title", "")
-                content = result.get("content", "")
                 url = result.get("url", "")
+                passages = pages.get(url) or [result.get("content", "")]
+                content = "\n".join(dedupe_passages(passages, seen=seen_passages))
+                if self.page_fetcher is not None:
+                    content = content[:self.page_fetcher.max_chars]
                 
                 formatted_results.append(f"제목: {title}\n내용: {content}\n출처: {url}\n")
             
@@ -889,6 +997,7 @@ Question: {input}
 
 # 전역 도구 인스턴스 (캐싱용)
 _tools_instance = None
+_tools_lock = threading.Lock()
 
 
 def get_tools_instance(force_reload=False):
@@ -899,6 +1008,19 @@ def get_tools_instance(force_reload=False):
     """
     global _tools_instance
     if _tools_instance is None or force_reload:
-        _tools_instance = FinancialAnalysisTools()
+        with _tools_lock:
+            if _tools_instance is None or force_reload:
+                _tools_instance = FinancialAnalysisTools()
     return _tools_instance
 
+
+def swap_tools_instance(new_instance: FinancialAnalysisTools) -> FinancialAnalysisTools:
+    """전역 도구 인스턴스를 새 인스턴스로 교체하고 이전 인스턴스를 반환합니다.
+    
+    이미 진행 중인 요청은 이전 인스턴스로 끝까지 처리되고, 이후 요청부터 새 인스턴스를 사용합니다.
+    """
+    global _tools_instance
+    with _tools_lock:
+        previous, _tools_instance = _tools_instance, new_instance
+    return previous
+
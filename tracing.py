@@ -0,0 +1,232 @@
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "OFF": 100}
+
+_current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """하나의 작업 구간(그래프 노드, 도구 호출 등)의 시간과 속성을 기록합니다."""
+
+    def __init__(self, name: str, level: int, parent: Optional["Span"], request_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.level = level
+        self.parent = parent
+        self.request_id = request_id
+        self.span_id = next(_span_ids)
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start = time.perf_counter()
+        self.duration_ms = 0.0
+
+    def set(self, **attributes):
+        """속성을 설정합니다."""
+        self.attributes.update(attributes)
+
+    def add(self, key: str, value: float = 1):
+        """수치 속성을 누적합니다 (상위 span에도 함께 누적)."""
+        span = self
+        while span is not None:
+            span.attributes[key] = span.attributes.get(key, 0) + value
+            span = span.parent
+
+    def root(self) -> "Span":
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+    def to_dict(self) -> Dict:
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "type": "span",
+            "request_id": self.request_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            **self.attributes,
+        }
+
+
+class RingBufferSink:
+    """최근 기록을 메모리에 보관하는 sink입니다 (가장 오래된 기록부터 버림)."""
+
+    def __init__(self, capacity: int = 1000):
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record: Dict):
+        self.records.append(record)
+
+    def recent(self, limit: int = None, request_id: str = None) -> List[Dict]:
+        """최근 기록을 반환합니다 (request_id를 주면 해당 요청만)."""
+        records = [r for r in list(self.records) if request_id is None or r.get("request_id") == request_id]
+        return records[-limit:] if limit else records
+
+
+class JsonLinesSink:
+    """기록을 한 줄에 하나의 JSON으로 파일(또는 stdout)에 씁니다."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def emit(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            stream = self._file or sys.stdout
+            stream.write(line + "\n")
+            stream.flush()
+
+
+class Tracer:
+    """요청 ID와 span 기반의 구조화 추적기입니다.
+
+    - INFO: 요청당 한 줄 (전체 시간, 노드/도구별 소요 시간 합계, 토큰 수, 캐시 적중)
+    - DEBUG: 모든 span과 이벤트
+    - WARNING 이상: 오류가 발생한 span만
+    span 시간 측정은 항상 수행하고, 출력만 로그 레벨로 거릅니다.
+    """
+
+    def __init__(self, sinks: List = None, level: str = "INFO"):
+        self.sinks = sinks or []
+        self.level = LEVELS.get(level.upper(), LEVELS["INFO"])
+        # 로그 레벨과 무관하게 모든 span 종료 시 호출되는 함수 (메트릭 집계 등)
+        self.listeners = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks) and self.level < LEVELS["OFF"]
+
+    @contextmanager
+    def request(self, request_id: str = None, **attributes):
+        """요청 하나의 추적 구간을 시작합니다 (하위 span은 같은 request_id를 가짐)."""
+        request_id = request_id or uuid.uuid4().hex[:12]
+        token = _current_request_id.set(request_id)
+        try:
+            with self.span("request", level="INFO", **attributes) as span:
+                yield span
+        finally:
+            _current_request_id.reset(token)
+
+    @contextmanager
+    def span(self, name: str, level: str = "DEBUG", **attributes):
+        """하위 작업 구간을 측정합니다."""
+        parent = _current_span.get()
+        span = Span(name, LEVELS.get(level, LEVELS["DEBUG"]), parent, _current_request_id.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_ms = (time.perf_counter() - span.start) * 1000
+            if parent is not None:
+                # 요청 span에 이름별 소요 시간 합계를 남겨 INFO 한 줄로 병목을 볼 수 있게 함
+                breakdown = span.root().attributes.setdefault("breakdown_ms", {})
+                breakdown[name] = round(breakdown.get(name, 0) + span.duration_ms, 2)
+            for listener in self.listeners:
+                try:
+                    listener(span)
+                except Exception as e:
+                    print(f"추적 리스너 오류: {e}")
+            self._emit(span, span.level if span.status == "ok" else LEVELS["ERROR"])
+
+    def event(self, name: str, level: str = "DEBUG", **attributes):
+        """시간 구간이 없는 단일 이벤트(라우팅 결정 등)를 기록합니다."""
+        if not self.enabled or LEVELS.get(level, LEVELS["DEBUG"]) < self.level:
+            return
+        parent = _current_span.get()
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "type": "event",
+            "request_id": _current_request_id.get(),
+            "parent_id": parent.span_id if parent else None,
+            "name": name,
+            **attributes,
+        }
+        for sink in self.sinks:
+            sink.emit(record)
+
+    def add_listener(self, listener):
+        """span이 끝날 때마다 호출될 함수를 등록합니다."""
+        self.listeners.append(listener)
+
+    def annotate(self, **attributes):
+        """현재 span에 속성을 설정합니다 (span 밖이면 무시)."""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def count(self, key: str, value: float = 1):
+        """현재 span과 상위 span에 수치 속성을 누적합니다 (span 밖이면 무시)."""
+        span = _current_span.get()
+        if span is not None:
+            span.add(key, value)
+
+    def record_llm_usage(self, response):
+        """LLM 응답의 토큰 사용량을 현재 span에 누적합니다."""
+        self.count("llm_calls")
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage:
+            self.count("input_tokens", usage.get("input_tokens", 0))
+            self.count("output_tokens", usage.get("output_tokens", 0))
+
+    def current_request_id(self) -> Optional[str]:
+        return _current_request_id.get()
+
+    def _emit(self, span: Span, level: int):
+        if not self.enabled or level < self.level:
+            return
+        record = span.to_dict()
+        for sink in self.sinks:
+            sink.emit(record)
+
+
+def traced(name: str, level: str = "DEBUG"):
+    """함수 실행을 span으로 감싸는 데코레이터입니다."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, level=level):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def create_tracer() -> Tracer:
+    """환경 변수 설정으로 Tracer를 생성합니다.
+
+    TRACE_SINK: jsonl (기본값, TRACE_FILE 또는 stdout), ring (메모리), both, off
+    """
+    sink_type = os.getenv("TRACE_SINK", "jsonl").lower()
+    sinks = []
+    if sink_type in ("ring", "both"):
+        sinks.append(RingBufferSink(int(os.getenv("TRACE_RING_SIZE", "1000"))))
+    if sink_type in ("jsonl", "both"):
+        sinks.append(JsonLinesSink(os.getenv("TRACE_FILE") or None))
+    return Tracer(sinks, level=os.getenv("LOG_LEVEL", "INFO"))
+
+
+# 전역 추적기 인스턴스
+tracer = create_tracer()
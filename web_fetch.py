@@ -0,0 +1,240 @@
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from tracing import tracer
+
+
+# 본문 추출 시 제거할 태그
+_NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg"]
+
+# 본문 문단으로 사용할 태그
+_TEXT_TAGS = ["p", "li", "h1", "h2", "h3", "h4", "td", "blockquote"]
+
+
+def extract_main_text(html: str, min_length: int = 20) -> List[str]:
+    """HTML에서 본문 문단을 추출합니다.
+
+    <article>나 <main>이 있으면 그 안에서, 없으면 <body> 전체에서
+    min_length 글자 이상의 문단만 순서대로 반환합니다.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(_NOISE_TAGS):
+        tag.decompose()
+
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    passages = []
+    for element in root.find_all(_TEXT_TAGS):
+        # 중첩된 문단 태그(li 안의 p 등)는 가장 안쪽 태그에서만 수집
+        if element.find(_TEXT_TAGS):
+            continue
+        text = re.sub(r"\s+", " ", element.get_text(" ", strip=True))
+        if len(text) >= min_length:
+            passages.append(text)
+
+    if not passages:
+        text = re.sub(r"\s+", " ", root.get_text(" ", strip=True))
+        if len(text) >= min_length:
+            passages.append(text)
+    return passages
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    """공백을 제거한 문자 n-gram 집합을 반환합니다."""
+    compact = re.sub(r"\s+", "", text.lower())
+    if len(compact) <= size:
+        return {compact}
+    return {compact[i:i + size] for i in range(len(compact) - size + 1)}
+
+
+def dedupe_passages(passages: List[str], threshold: float = 0.8, seen: Optional[List[set]] = None) -> List[str]:
+    """거의 같은 문단(문자 3-gram 자카드 유사도 ≥ threshold)을 제거합니다.
+
+    seen에 이전 문단들의 n-gram 집합을 넘기면 여러 페이지에 걸쳐 중복을 제거할 수 있습니다.
+    """
+    seen = seen if seen is not None else []
+    unique = []
+    for passage in passages:
+        shingles = _shingles(passage)
+        duplicate = False
+        for other in seen:
+            union = len(shingles | other)
+            if union and len(shingles & other) / union >= threshold:
+                duplicate = True
+                break
+        if not duplicate:
+            seen.append(shingles)
+            unique.append(passage)
+    return unique
+
+
+class PageCache:
+    """파싱된 페이지 본문을 URL별 JSON 파일로 저장하는 디스크 캐시입니다."""
+
+    def __init__(self, cache_dir: str = "web_page_cache", ttl_seconds: float = 86400):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[List[str]]:
+        """만료되지 않은 캐시 문단 목록을 반환합니다 (없으면 None)."""
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.ttl_seconds and time.time() - entry.get("fetched_at", 0) > self.ttl_seconds:
+            return None
+        return entry.get("passages", [])
+
+    def put(self, url: str, passages: List[str]):
+        """문단 목록을 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "fetched_at": time.time(), "passages": passages}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class PageFetcher:
+    """검색 결과 URL들의 본문을 동시에 가져와 추출합니다.
+
+    하나의 httpx.Client(keep-alive 연결 풀)를 공유하고, 호스트별 동시 요청 수와
+    요청/전체 타임아웃을 제한합니다. 실패한 URL은 빈 목록을 반환합니다.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_per_host: int = 4,
+        timeout: float = 8.0,
+        max_workers: int = 8,
+        max_bytes: int = 2 * 1024 * 1024,
+        max_chars: int = 3000,
+        cache: Optional[PageCache] = None,
+    ):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.cache = cache
+        self.client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 3.0)),
+            follow_redirects=True,
+            headers={"User-Agent": "Mozilla/5.0 (compatible; FinancialAnalysisBot/2.0)"},
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web_fetch")
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def fetch_many(self, urls: List[str]) -> Dict[str, List[str]]:
+        """여러 URL을 동시에 가져와 {url: 문단 목록}을 반환합니다 (전체 대기는 timeout의 2배까지)."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        with tracer.span("tool.web_fetch", urls=len(urls)) as span:
+            pages = self._fetch_all(urls)
+            span.set(fetched=sum(1 for passages in pages.values() if passages))
+        return pages
+
+    def _fetch_all(self, urls: List[str]) -> Dict[str, List[str]]:
+        # 작업 스레드에서도 현재 추적 span에 기록되도록 컨텍스트를 복사해 실행
+        futures = {url: self.executor.submit(contextvars.copy_context().run, self.fetch, url) for url in urls}
+        deadline = time.monotonic() + self.timeout * 2
+        pages = {}
+        for url, future in futures.items():
+            try:
+                pages[url] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except Exception:
+                pages[url] = []
+        return pages
+
+    def fetch(self, url: str) -> List[str]:
+        """URL 하나의 본문 문단을 반환합니다 (캐시 우선)."""
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                tracer.count("page_cache_hits")
+                return cached
+
+        try:
+            with self._host_semaphore(url), self.client.stream("GET", url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "")
+                if "html" not in content_type and "text" not in content_type:
+                    return []
+                body = self._read_limited(response)
+                encoding = response.encoding or "utf-8"
+        except httpx.HTTPError as e:
+            print(f"페이지 가져오기 실패 ({url}): {e}")
+            return []
+
+        passages = extract_main_text(body.decode(encoding, errors="replace"))
+
+        if self.cache is not None and passages:
+            try:
+                self.cache.put(url, passages)
+            except OSError as e:
+                print(f"페이지 캐시 저장 중 오류: {e}")
+        return passages
+
+    def _read_limited(self, response: httpx.Response) -> bytes:
+        """응답 본문을 max_bytes까지만 읽습니다.
+
+        한도나 timeout(조금씩 계속 보내는 서버 대비)에 도달하면 나머지를 받지 않고 연결을 닫습니다.
+        """
+        deadline = time.monotonic() + self.timeout
+        chunks = []
+        size = 0
+        for chunk in response.iter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                tracer.count("page_truncated")
+                break
+            if time.monotonic() > deadline:
+                raise httpx.ReadTimeout(f"본문을 {self.timeout}초 안에 받지 못했습니다", request=response.request)
+        return b"".join(chunks)[:self.max_bytes]
+
+    def close(self):
+        """연결 풀과 작업 스레드를 정리합니다."""
+        self.executor.shutdown(wait=False)
+        self.client.close()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """호스트별 동시 요청 수를 제한하는 세마포어를 반환합니다."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_semaphores[host]
+
+
+def create_page_fetcher() -> Optional[PageFetcher]:
+    """환경 변수 설정으로 PageFetcher를 생성합니다 (WEB_FETCH_ENABLED가 true가 아니면 None)."""
+    if os.getenv("WEB_FETCH_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return None
+
+    cache_dir = os.getenv("WEB_FETCH_CACHE_DIR", "web_page_cache")
+    cache = PageCache(cache_dir, float(os.getenv("WEB_FETCH_CACHE_TTL_SECONDS", "86400"))) if cache_dir else None
+    return PageFetcher(
+        max_connections=int(os.getenv("WEB_FETCH_MAX_CONNECTIONS", "20")),
+        max_per_host=int(os.getenv("WEB_FETCH_MAX_PER_HOST", "4")),
+        timeout=float(os.getenv("WEB_FETCH_TIMEOUT_SECONDS", "8")),
+        max_bytes=int(os.getenv("WEB_FETCH_MAX_BYTES", str(2 * 1024 * 1024))),
+        max_chars=int(os.getenv("WEB_FETCH_MAX_CHARS", "3000")),
+        cache=cache,
+    )
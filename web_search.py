@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from tracing import tracer
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용으로 검색어를 정규화합니다 (소문자, 구두점 제거, 단어 정렬·중복 제거)."""
+    tokens = re.findall(r"[0-9A-Za-z가-힣+&]+", (query or "").lower())
+    return " ".join(sorted(set(tokens)))
+
+
+class SearchBackend(ABC):
+    """웹 검색 백엔드 인터페이스입니다.
+
+    search()는 {"title", "content", "url"} 딕셔너리 리스트를 반환해야 합니다.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """검색어로 검색한 결과를 최대 max_results개 반환합니다."""
+
+
+class TavilySearchBackend(SearchBackend):
+    """Tavily API를 사용하는 검색 백엔드입니다."""
+
+    name = "tavily"
+
+    def __init__(self, api_key: str, search_depth: str = "advanced"):
+        from tavily import TavilyClient
+
+        self.client = TavilyClient(api_key=api_key)
+        self.search_depth = search_depth
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        response = self.client.search(query=query, search_depth=self.search_depth, max_results=max_results)
+        return [
+            {"title": r.get("title", ""), "content": r.get("content", ""), "url": r.get("url", "")}
+            for r in response.get("results", [])
+        ]
+
+
+class LocalFileSearchBackend(SearchBackend):
+    """JSON 파일에 저장된 검색 결과를 반환하는 로컬 대체 백엔드입니다 (네트워크 불필요).
+
+    파일 형식: {"검색어": [{"title": ..., "content": ..., "url": ...}, ...], ...}
+    정규화된 검색어가 정확히 일치하는 항목을 우선 사용하고,
+    없으면 단어가 가장 많이 겹치는 항목을 반환합니다.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for query, results in json.load(f).items():
+                    self.entries[normalize_query(query)] = results
+        else:
+            print(f"경고: 로컬 검색 결과 파일이 없습니다: {path}")
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        key = normalize_query(query)
+        if key in self.entries:
+            return self.entries[key][:max_results]
+
+        tokens = set(key.split())
+        best_key, best_overlap = None, 0
+        for candidate in self.entries:
+            overlap = len(tokens & set(candidate.split()))
+            if overlap > best_overlap:
+                best_key, best_overlap = candidate, overlap
+        return self.entries[best_key][:max_results] if best_key else []
+
+
+class SearchCache:
+    """정규화된 검색어를 키로 하는 SQLite 기반 영구 캐시입니다.
+
+    ttl_seconds가 지난 항목은 조회되지 않으며, max_entries를 넘으면
+    가장 오래전에 사용된 항목부터 삭제합니다.
+    """
+
+    def __init__(self, db_path: str = "web_search_cache.db", ttl_seconds: float = 86400, max_entries: int = 2000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """캐시 DB 연결을 반환합니다."""
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        conn = self.get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_cache (
+                cache_key TEXT PRIMARY KEY,
+                query TEXT,
+                results TEXT,
+                created_at REAL,
+                accessed_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache (accessed_at)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(backend_name: str, query: str, max_results: int) -> str:
+        """백엔드, 정규화된 검색어, 결과 수로 캐시 키를 만듭니다."""
+        raw = f"{backend_name}|{max_results}|{normalize_query(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """만료되지 않은 캐시 결과를 반환합니다 (없으면 None)."""
+        now = time.time()
+        with self._lock:
+            conn = self.get_connection()
+            row = conn.execute(
+                "SELECT results, created_at FROM search_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                conn.close()
+                return None
+            if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM search_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                conn.close()
+                return None
+            conn.execute("UPDATE search_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+            conn.commit()
+            conn.close()
+        return json.loads(row[0])
+
+    def put(self, key: str, query: str, results: List[Dict]):
+        """검색 결과를 저장하고 만료·초과 항목을 정리합니다."""
+        now = time.time()
+        with self._lock:
+            conn = self.get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (key, query, json.dumps(results, ensure_ascii=False), now, now),
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute("""
+                DELETE FROM search_cache WHERE cache_key IN (
+                    SELECT cache_key FROM search_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+            conn.close()
+
+    def __len__(self) -> int:
+        conn = self.get_connection()
+        count = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        conn.close()
+        return count
+
+
+class WebSearcher:
+    """검색 백엔드 앞에 영구 캐시를 두는 웹 검색기입니다."""
+
+    def __init__(self, backend: SearchBackend, cache: Optional[SearchCache] = None):
+        self.backend = backend
+        self.cache = cache
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """캐시를 먼저 확인하고, 없으면 백엔드로 검색한 뒤 결과를 캐시에 저장합니다."""
+        key = SearchCache.make_key(self.backend.name, query, max_results)
+        if self.cache is not None:
+            try:
+                cached = self.cache.get(key)
+            except sqlite3.Error as e:
+                print(f"검색 캐시 조회 중 오류: {e}")
+                cached = None
+            if cached is not None:
+                tracer.annotate(cache_hit=True, backend=self.backend.name)
+                return cached
+
+        tracer.annotate(cache_hit=False, backend=self.backend.name)
+        results = self.backend.search(query, max_results=max_results)
+
+        # 빈 결과는 일시적 실패일 수 있으므로 캐시하지 않음
+        if self.cache is not None and results:
+            try:
+                self.cache.put(key, query, results)
+            except sqlite3.Error as e:
+                print(f"검색 캐시 저장 중 오류: {e}")
+        return results
+
+
+def create_web_searcher(tavily_api_key: str = None) -> WebSearcher:
+    """환경 변수 설정에 따라 WebSearcher를 생성합니다.
+
+    WEB_SEARCH_BACKEND=local 이면 WEB_SEARCH_LOCAL_PATH의 JSON 파일을 사용하고,
+    그 외에는 Tavily를 사용합니다. WEB_SEARCH_CACHE_PATH가 비어 있으면 캐시를 끕니다.
+    """
+    backend_name = os.getenv("WEB_SEARCH_BACKEND", "tavily").lower()
+    if backend_name == "local":
+        backend = LocalFileSearchBackend(os.getenv("WEB_SEARCH_LOCAL_PATH", "web_search_local.json"))
+    else:
+        if not tavily_api_key:
+            raise ValueError("TAVILY_API_KEY가 설정되지 않았습니다.")
+        backend = TavilySearchBackend(tavily_api_key)
+
+    cache_path = os.getenv("WEB_SEARCH_CACHE_PATH", "web_search_cache.db")
+    cache = None
+    if cache_path:
+        cache = SearchCache(
+            cache_path,
+            ttl_seconds=float(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS", "86400")),
+            max_entries=int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "2000")),
+        )
+    return WebSearcher(backend, cache)